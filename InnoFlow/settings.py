@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from pathlib import Path
+import json
 import os
 from dotenv import load_dotenv
 
@@ -188,6 +189,129 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
+# Run tasks inline (no broker needed) for local runs and load tests
+CELERY_TASK_ALWAYS_EAGER = os.getenv('CELERY_TASK_ALWAYS_EAGER', 'False') == 'True'
+CELERY_BEAT_SCHEDULE = {
+    'probe-circuit-breakers': {
+        'task': 'ai_integration.tasks.probe_circuit_breakers',
+        'schedule': float(os.getenv('AI_BREAKER_PROBE_INTERVAL', '30')),
+    },
+}
+
+# Execute nodes through workflows.mock_handlers instead of real AI services
+WORKFLOW_MOCK_HANDLERS = os.getenv('WORKFLOW_MOCK_HANDLERS', 'False') == 'True'
+
+# Embedding nodes and per-workflow vector indexes (memory-mapped float32 files)
+WORKFLOW_VECTOR_INDEX_DIR = os.getenv('WORKFLOW_VECTOR_INDEX_DIR', str(BASE_DIR / 'vector_indexes'))
+WORKFLOW_EMBEDDING_BACKEND = os.getenv('WORKFLOW_EMBEDDING_BACKEND', 'sentence_transformers')  # or 'ollama'
+WORKFLOW_EMBEDDING_MODEL = os.getenv('WORKFLOW_EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
+WORKFLOW_EMBEDDING_BATCH_SIZE = int(os.getenv('WORKFLOW_EMBEDDING_BATCH_SIZE', '32'))
+
+# Summarization models to route between, smallest/fastest first, e.g.
+# [{"model": "sshleifer/distilbart-cnn-12-6", "max_input_tokens": 1024, "ms_per_token": 1.0},
+#  {"model": "facebook/bart-large-cnn", "max_input_tokens": 1024, "ms_per_token": 2.0}]
+WORKFLOW_SUMMARIZATION_MODELS = json.loads(os.getenv(
+    'WORKFLOW_SUMMARIZATION_MODELS',
+    '[{"model": "facebook/bart-large-cnn", "max_input_tokens": 1024, "ms_per_token": 2.0}]'
+))
+WORKFLOW_SUMMARIZATION_SHORT_INPUT_TOKENS = int(os.getenv('WORKFLOW_SUMMARIZATION_SHORT_INPUT_TOKENS', '200'))  # Smallest model at or below
+WORKFLOW_ROUTING_QUEUE_PENALTY = float(os.getenv('WORKFLOW_ROUTING_QUEUE_PENALTY', '0.1'))  # Latency estimate growth per queued task
+WORKFLOW_ROUTING_QUEUE_DEPTH_TTL = float(os.getenv('WORKFLOW_ROUTING_QUEUE_DEPTH_TTL', '2'))  # Seconds between broker checks
+WORKFLOW_ROUTING_QUEUE_DEPTH_RETRY_INTERVAL = float(os.getenv('WORKFLOW_ROUTING_QUEUE_DEPTH_RETRY_INTERVAL', '60'))  # Seconds between checks after one failed
+WORKFLOW_ROUTING_BROKER_TIMEOUT = float(os.getenv('WORKFLOW_ROUTING_BROKER_TIMEOUT', '0.5'))  # Seconds to connect for a check
+
+# Streaming execution (workflow config "streaming": true)
+WORKFLOW_STREAM_BUFFER = int(os.getenv('WORKFLOW_STREAM_BUFFER', '4'))  # Chunks a node may get ahead of the next
+WORKFLOW_STREAM_SEGMENT_TOKENS = int(os.getenv('WORKFLOW_STREAM_SEGMENT_TOKENS', '400'))  # Input summarized per streamed chunk
+
+# Items a map node runs through its sub-workflow at once, unless the node sets "concurrency"
+WORKFLOW_MAP_CONCURRENCY = int(os.getenv('WORKFLOW_MAP_CONCURRENCY', '4'))
+
+# AI Integration Settings
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY')
+DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY')
+
+# Pooled provider HTTP clients (seconds / connection counts)
+AI_PROVIDER_CONNECT_TIMEOUT = float(os.getenv('AI_PROVIDER_CONNECT_TIMEOUT', '5'))
+AI_PROVIDER_READ_TIMEOUT = float(os.getenv('AI_PROVIDER_READ_TIMEOUT', '60'))
+AI_PROVIDER_MAX_CONNECTIONS = int(os.getenv('AI_PROVIDER_MAX_CONNECTIONS', '20'))
+AI_PROVIDER_MAX_KEEPALIVE = int(os.getenv('AI_PROVIDER_MAX_KEEPALIVE', '10'))
+# Per-provider time limit for concurrent model comparisons
+AI_COMPARISON_PROVIDER_TIMEOUT = float(os.getenv('AI_COMPARISON_PROVIDER_TIMEOUT', '30'))
+
+# Shared Redis used by ai_integration (response cache, coordination)
+AI_REDIS_URL = os.getenv('AI_REDIS_URL', 'redis://localhost:6379/1')
+
+# Prompt response cache: in-process LRU in front of Redis
+AI_CACHE_ENABLED = os.getenv('AI_CACHE_ENABLED', 'True') == 'True'
+AI_CACHE_DEFAULT_TTL = int(os.getenv('AI_CACHE_DEFAULT_TTL', '86400'))  # Seconds, overridable per AIModelConfig
+AI_CACHE_LOCAL_MAX_ENTRIES = int(os.getenv('AI_CACHE_LOCAL_MAX_ENTRIES', '1024'))
+AI_CACHE_RETRY_INTERVAL = float(os.getenv('AI_CACHE_RETRY_INTERVAL', '10'))  # Seconds local-only after Redis fails
+
+# Prompt x model matrix comparisons: prompts per batch/bulk insert, upload
+# size limit, and concurrent calls per provider while a matrix runs
+AI_MATRIX_BATCH_SIZE = int(os.getenv('AI_MATRIX_BATCH_SIZE', '50'))
+AI_MATRIX_MAX_PROMPTS = int(os.getenv('AI_MATRIX_MAX_PROMPTS', '10000'))
+AI_PROVIDER_CONCURRENCY = {
+    provider: int(os.getenv(f'AI_{provider}_CONCURRENCY', default))
+    for provider, default in {
+        'OPENAI': '8', 'ANTHROPIC': '4', 'DEEPSEEK': '4', 'OLLAMA': '2', 'HUGGINGFACE': '1',
+    }.items()
+}
+
+# Bulk task status and long-polling (seconds / ids per request)
+AI_TASK_POLL_INTERVAL = float(os.getenv('AI_TASK_POLL_INTERVAL', '0.5'))
+AI_TASK_POLL_MAX_WAIT = float(os.getenv('AI_TASK_POLL_MAX_WAIT', '30'))
+AI_TASK_STATUS_MAX_IDS = int(os.getenv('AI_TASK_STATUS_MAX_IDS', '500'))
+
+# Local tokenizer for counting tokens of providers that don't report usage
+# (Hugging Face models use their own tokenizer; empty = rough estimate)
+AI_TOKENIZER_FALLBACK_MODEL = os.getenv('AI_TOKENIZER_FALLBACK_MODEL', '')
+
+# Single-flight coalescing of identical in-flight provider calls across workers
+AI_COALESCE_ENABLED = os.getenv('AI_COALESCE_ENABLED', 'True') == 'True'
+AI_COALESCE_LOCK_TTL = float(os.getenv('AI_COALESCE_LOCK_TTL', '120'))  # Seconds a leader may hold a key
+AI_COALESCE_WAIT_TIMEOUT = float(os.getenv('AI_COALESCE_WAIT_TIMEOUT', '90'))  # Seconds a follower waits
+AI_COALESCE_RETRY_INTERVAL = float(os.getenv('AI_COALESCE_RETRY_INTERVAL', '10'))  # Seconds without coalescing after Redis fails
+
+# Hedged routing: wait for a config's observed p95 latency before hedging
+AI_HEDGE_DEFAULT_DELAY = float(os.getenv('AI_HEDGE_DEFAULT_DELAY', '2'))  # Seconds, used until enough samples exist
+AI_HEDGE_MIN_SAMPLES = int(os.getenv('AI_HEDGE_MIN_SAMPLES', '20'))
+AI_HEDGE_SAMPLE_SIZE = int(os.getenv('AI_HEDGE_SAMPLE_SIZE', '200'))
+
+# Per-config circuit breakers, shared across workers through AI_REDIS_URL
+AI_BREAKER_ENABLED = os.getenv('AI_BREAKER_ENABLED', 'True') == 'True'
+AI_BREAKER_FAILURE_THRESHOLD = int(os.getenv('AI_BREAKER_FAILURE_THRESHOLD', '5'))  # Consecutive failures
+AI_BREAKER_ERROR_RATE = float(os.getenv('AI_BREAKER_ERROR_RATE', '0.5'))  # Or this error rate over the window
+AI_BREAKER_MIN_REQUESTS = int(os.getenv('AI_BREAKER_MIN_REQUESTS', '10'))  # Before the error rate counts
+AI_BREAKER_WINDOW = int(os.getenv('AI_BREAKER_WINDOW', '300'))  # Seconds of error rate history
+AI_BREAKER_RESET_TIMEOUT = float(os.getenv('AI_BREAKER_RESET_TIMEOUT', '30'))  # Seconds open before a probe
+# Open circuits are also probed in the background (celery beat) instead of only by the next caller
+AI_BREAKER_PROBE_INTERVAL = float(os.getenv('AI_BREAKER_PROBE_INTERVAL', '30'))  # Seconds between probe runs
+AI_BREAKER_PROBE_PROMPT = os.getenv('AI_BREAKER_PROBE_PROMPT', 'ping')
+AI_BREAKER_PROBE_TIMEOUT = float(os.getenv('AI_BREAKER_PROBE_TIMEOUT', '30'))  # Seconds before a probe counts as failed
+
+# Per-worker pool of loaded Hugging Face pipelines
+HF_MODEL_POOL_MEMORY_MB = int(os.getenv('HF_MODEL_POOL_MEMORY_MB', '4096'))
+# Comma-separated text-generation models to load when a worker process starts
+HF_WARMUP_MODELS = [name for name in os.getenv('HF_WARMUP_MODELS', '').split(',') if name.strip()]
+# Where `manage.py models prefetch` stages model artifacts; empty uses the Hugging Face cache (HF_HOME)
+HF_MODEL_CACHE_DIR = os.getenv('HF_MODEL_CACHE_DIR', '')
+# Exported ONNX Runtime graphs for the 'onnx' inference backend
+HF_ONNX_CACHE_DIR = os.getenv('HF_ONNX_CACHE_DIR', str(BASE_DIR / 'onnx_models'))
+# Per-host inference server (`manage.py inference_server`); empty runs models in each worker
+HF_INFERENCE_SOCKET = os.getenv('HF_INFERENCE_SOCKET', '')
+HF_INFERENCE_TIMEOUT = float(os.getenv('HF_INFERENCE_TIMEOUT', '120'))  # Seconds per request
+HF_INFERENCE_RETRY_INTERVAL = float(os.getenv('HF_INFERENCE_RETRY_INTERVAL', '30'))  # Seconds in-process after a failed connect
+HF_INFERENCE_MAX_BATCH_SIZE = int(os.getenv('HF_INFERENCE_MAX_BATCH_SIZE', '8'))
+HF_INFERENCE_MAX_WAIT_MS = float(os.getenv('HF_INFERENCE_MAX_WAIT_MS', '10'))  # Wait for more requests to batch
+# Reuse of attention key/value state for prompt prefixes shared across text generation calls
+HF_PREFIX_CACHE_ENABLED = os.getenv('HF_PREFIX_CACHE_ENABLED', 'True') == 'True'
+HF_PREFIX_CACHE_MEMORY_MB = int(os.getenv('HF_PREFIX_CACHE_MEMORY_MB', '512'))
+HF_PREFIX_CACHE_BLOCK_TOKENS = int(os.getenv('HF_PREFIX_CACHE_BLOCK_TOKENS', '32'))  # Prefix granularity
+HF_PREFIX_CACHE_MIN_USES = int(os.getenv('HF_PREFIX_CACHE_MIN_USES', '2'))  # Uses before a prefix is cached
+HF_PREFIX_CACHE_RETRY_INTERVAL = float(os.getenv('HF_PREFIX_CACHE_RETRY_INTERVAL', '10'))  # Seconds without shared stats after Redis fails
 
 
 # Internationalization
@@ -61,6 +61,7 @@ urlpatterns = [
     # App APIs
     path('api/users/', include('users.urls')),
     path('api/workflows/', include('workflows.urls')),
+    path('api/ai/', include('ai_integration.urls')),
 
     # REST auth
     path('api/auth/', include('dj_rest_auth.urls')),
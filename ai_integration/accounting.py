@@ -0,0 +1,132 @@
+import logging
+import re
+import threading
+from decimal import Decimal
+from typing import Optional
+
+from django.conf import settings
+from django.db.models import Avg, Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+
+logger = logging.getLogger(__name__)
+
+_pieces = re.compile(r"\w+|[^\w\s]")
+
+_tokenizers = {}
+_tokenizers_lock = threading.Lock()
+
+
+def _load_tokenizer(name: str):
+    """Tokenizer (only, not the model) for a Hugging Face model name, loaded once per process."""
+    if name not in _tokenizers:
+        with _tokenizers_lock:
+            if name not in _tokenizers:
+                from transformers import AutoTokenizer
+
+                _tokenizers[name] = AutoTokenizer.from_pretrained(name)
+    return _tokenizers[name]
+
+
+def _get_tokenizer(model_config):
+    if model_config.provider == 'HUGGINGFACE':
+        return _load_tokenizer(model_config.model_name)
+    if settings.AI_TOKENIZER_FALLBACK_MODEL:
+        return _load_tokenizer(settings.AI_TOKENIZER_FALLBACK_MODEL)
+    return None
+
+
+def count_tokens(text: str, model_config) -> int:
+    """
+    Token count for text when the provider didn't report one: the model's
+    own tokenizer for Hugging Face, AI_TOKENIZER_FALLBACK_MODEL for others
+    (Ollama), and a word/punctuation estimate if neither is available.
+    """
+    try:
+        tokenizer = _get_tokenizer(model_config)
+        if tokenizer is not None:
+            return len(tokenizer(text)['input_ids'])
+    except Exception as e:
+        logger.warning(f"Tokenizer unavailable for {model_config}: {e}")
+    return len(_pieces.findall(text))
+
+
+def estimate_cost(model_config, prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> Optional[Decimal]:
+    """USD cost from the config's per-1K token prices, or None if unpriced."""
+    if model_config.prompt_cost_per_1k is None and model_config.completion_cost_per_1k is None:
+        return None
+    cost = Decimal(0)
+    if prompt_tokens and model_config.prompt_cost_per_1k is not None:
+        cost += Decimal(prompt_tokens) * model_config.prompt_cost_per_1k / 1000
+    if completion_tokens and model_config.completion_cost_per_1k is not None:
+        cost += Decimal(completion_tokens) * model_config.completion_cost_per_1k / 1000
+    return cost.quantize(Decimal('0.000001'))
+
+
+def usage_fields(model_config, prompt: str, response: str, latency: float,
+                 prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None,
+                 time_to_first_token: Optional[float] = None, cached: bool = False) -> dict:
+    """
+    ModelResponse token, throughput and cost fields for one generation,
+    counting tokens locally where the provider didn't report them. Cache
+    hits cost nothing and have no meaningful throughput.
+    """
+    if prompt_tokens is None:
+        prompt_tokens = count_tokens(prompt, model_config)
+    if completion_tokens is None:
+        completion_tokens = count_tokens(response, model_config)
+
+    tokens_per_second = None
+    if not cached and completion_tokens:
+        # Decode rate, measured from the first token when streaming
+        duration = latency - (time_to_first_token or 0)
+        if duration <= 0:
+            duration = latency
+        tokens_per_second = completion_tokens / duration if duration > 0 else None
+
+    return {
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'tokens_per_second': tokens_per_second,
+        'cost': Decimal(0) if cached else estimate_cost(model_config, prompt_tokens, completion_tokens),
+    }
+
+
+ROLLUP_GROUPS = {
+    'model_config': {'config': F('model_config_id'), 'config_name': F('model_config__name')},
+    'user': {'user': F('comparison__user_id'), 'username': F('comparison__user__username')},
+    'day': {'day': TruncDate('created_at')},
+}
+
+
+def rollup(responses, group_by: str) -> list:
+    """
+    Token, cost and throughput totals for a ModelResponse queryset grouped
+    by model config, user or day. Throughput is total completion tokens
+    over total generation time of responses that made their own provider
+    call (not cached or coalesced).
+    """
+    group = ROLLUP_GROUPS[group_by]
+    generated = Q(cached=False, coalesced=False)
+    rows = (
+        responses.values(**group)
+        .annotate(
+            responses=Count('id'),
+            cached_responses=Count('id', filter=Q(cached=True)),
+            coalesced_responses=Count('id', filter=Q(coalesced=True)),
+            total_prompt_tokens=Sum('prompt_tokens'),
+            total_completion_tokens=Sum('completion_tokens'),
+            total_cost=Sum('cost'),
+            avg_latency=Avg('latency', filter=generated),
+            avg_tokens_per_second=Avg('tokens_per_second', filter=generated),
+            generated_tokens=Sum('completion_tokens', filter=generated),
+            generation_time=Sum('latency', filter=generated),
+        )
+        .order_by(*group)
+    )
+    results = []
+    for row in rows:
+        generated_tokens = row.pop('generated_tokens')
+        generation_time = row.pop('generation_time')
+        row['throughput'] = generated_tokens / generation_time if generated_tokens and generation_time else None
+        results.append(row)
+    return results
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+
+from .clients import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'ai:response:'
+STATS_KEY = 'ai:response-cache:stats'
+
+_whitespace = re.compile(r'\s+')
+
+# Monotonic time until which Redis is skipped after it failed
+_unavailable_until = 0.0
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so trivially different prompts share an entry."""
+    return _whitespace.sub(' ', prompt).strip()
+
+
+def prompt_fingerprint(model_config, prompt: str, params: Optional[dict] = None) -> str:
+    """Hash identifying a (provider, model, normalized prompt, params) request."""
+    payload = json.dumps(
+        [model_config.provider, model_config.model_name, normalize_prompt(prompt), params or {}],
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def request_fingerprint(model_config, prompt: str) -> str:
+    """
+    prompt_fingerprint for one configuration: also keyed on the config id,
+    endpoint and (hashed) API key, so requests are only shared between
+    callers that would have made the same provider call.
+    """
+    api_key = hashlib.sha256((model_config.api_key or '').encode('utf-8')).hexdigest()
+    return prompt_fingerprint(model_config, prompt, {
+        'config': model_config.id, 'base_url': model_config.base_url or '', 'api_key': api_key
+    })
+
+
+def make_key(model_config, prompt: str, params: Optional[dict] = None) -> str:
+    return KEY_PREFIX + prompt_fingerprint(model_config, prompt, params)
+
+
+def cache_ttl(model_config) -> int:
+    """TTL in seconds for a model config; 0 disables caching for it."""
+    if model_config.cache_ttl is not None:
+        return model_config.cache_ttl
+    return settings.AI_CACHE_DEFAULT_TTL
+
+
+class LocalLRU:
+    """Small thread-safe LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: int):
+        with self._lock:
+            self._data[key] = (monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def _redis_available() -> bool:
+    return monotonic() >= _unavailable_until
+
+
+def _redis_failed(e: Exception):
+    """Serve from the local tier only for AI_CACHE_RETRY_INTERVAL seconds."""
+    global _unavailable_until
+    logger.warning(f"Response cache unavailable for {settings.AI_CACHE_RETRY_INTERVAL}s: {e}")
+    _unavailable_until = monotonic() + settings.AI_CACHE_RETRY_INTERVAL
+
+
+class ResponseCache:
+    """
+    Exact-match cache of provider responses, keyed by provider, model name,
+    normalized prompt and generation params. Lookups hit the in-process LRU
+    first and fall back to Redis; Redis errors degrade to local-only until
+    AI_CACHE_RETRY_INTERVAL has passed.
+    """
+
+    def __init__(self):
+        self.local = LocalLRU(settings.AI_CACHE_LOCAL_MAX_ENTRIES)
+        self.counters = {'local_hits': 0, 'redis_hits': 0, 'misses': 0, 'writes': 0}
+        self._lock = threading.Lock()
+
+    def enabled_for(self, model_config) -> bool:
+        return settings.AI_CACHE_ENABLED and cache_ttl(model_config) > 0
+
+    def _count(self, **amounts):
+        amounts = {name: amount for name, amount in amounts.items() if amount}
+        if not amounts:
+            return
+        with self._lock:
+            for name, amount in amounts.items():
+                self.counters[name] += amount
+        if not _redis_available():
+            return
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for name, amount in amounts.items():
+                pipe.hincrby(STATS_KEY, name, amount)
+            pipe.execute()
+        except Exception as e:
+            _redis_failed(e)
+
+    def get_many(self, model_configs: Iterable, prompt: str, params: Optional[dict] = None) -> Dict[int, dict]:
+        """
+        Return cached values by model config id. Local misses are fetched
+        from Redis in one round trip.
+        """
+        found = {}
+        remote = {}
+        for model_config in model_configs:
+            if not self.enabled_for(model_config):
+                continue
+            key = make_key(model_config, prompt, params)
+            value = self.local.get(key)
+            if value is not None:
+                found[model_config.id] = value
+            else:
+                remote[key] = model_config
+
+        local_hits = len(found)
+        if remote:
+            values = [None] * len(remote)
+            if _redis_available():
+                try:
+                    values = get_redis().mget(list(remote))
+                except Exception as e:
+                    _redis_failed(e)
+            for (key, model_config), raw in zip(remote.items(), values):
+                if raw is not None:
+                    value = json.loads(raw)
+                    found[model_config.id] = value
+                    self.local.set(key, value, cache_ttl(model_config))
+
+        redis_hits = len(found) - local_hits
+        self._count(local_hits=local_hits, redis_hits=redis_hits, misses=len(remote) - redis_hits)
+        return found
+
+    def get(self, model_config, prompt: str, params: Optional[dict] = None) -> Optional[dict]:
+        return self.get_many([model_config], prompt, params).get(model_config.id)
+
+    def set(self, model_config, prompt: str, value: dict, params: Optional[dict] = None):
+        if not self.enabled_for(model_config):
+            return
+        key = make_key(model_config, prompt, params)
+        ttl = cache_ttl(model_config)
+        self.local.set(key, value, ttl)
+        if _redis_available():
+            try:
+                get_redis().set(key, json.dumps(value), ex=ttl)
+            except Exception as e:
+                _redis_failed(e)
+        self._count(writes=1)
+
+    def stats(self) -> dict:
+        """Counters for this process and, when reachable, all workers."""
+        with self._lock:
+            stats = {'process': dict(self.counters)}
+        try:
+            shared = get_redis().hgetall(STATS_KEY)
+            stats['shared'] = {name.decode(): int(value) for name, value in shared.items()}
+        except Exception:
+            stats['shared'] = None
+        return stats
+
+
+response_cache = ResponseCache()
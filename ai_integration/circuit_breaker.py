@@ -0,0 +1,205 @@
+import asyncio
+import logging
+from time import time
+from typing import Optional
+
+from django.conf import settings
+
+from .clients import get_async_redis, get_redis
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+BUCKET_SECONDS = 60
+
+# Cancellation message for calls that lost a race (hedging) rather than
+# timing out; these say nothing about the provider's health
+SUPERSEDED = 'superseded'
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+def _state_key(model_config_id) -> str:
+    return f'ai:breaker:{model_config_id}'
+
+
+def _probe_key(model_config_id) -> str:
+    return f'ai:breaker:{model_config_id}:probe'
+
+
+def _bucket_key(model_config_id, bucket: int) -> str:
+    return f'ai:breaker:{model_config_id}:bucket:{bucket}'
+
+
+def _window_buckets(now: float):
+    current = int(now // BUCKET_SECONDS)
+    count = max(int(settings.AI_BREAKER_WINDOW // BUCKET_SECONDS), 1)
+    return range(current - count + 1, current + 1)
+
+
+def _decode(data: dict) -> dict:
+    return {
+        (key.decode() if isinstance(key, bytes) else key): (value.decode() if isinstance(value, bytes) else value)
+        for key, value in data.items()
+    }
+
+
+def _error_rate(buckets) -> dict:
+    requests = failures = 0
+    for bucket in buckets:
+        bucket = _decode(bucket or {})
+        requests += int(bucket.get('success', 0)) + int(bucket.get('failure', 0))
+        failures += int(bucket.get('failure', 0))
+    return {'requests': requests, 'failures': failures, 'error_rate': failures / requests if requests else 0.0}
+
+
+async def _window_stats(redis, model_config_id, now: float) -> dict:
+    pipe = redis.pipeline(transaction=False)
+    for bucket in _window_buckets(now):
+        pipe.hgetall(_bucket_key(model_config_id, bucket))
+    return _error_rate(await pipe.execute())
+
+
+async def _record(redis, model_config_id, outcome: str, now: float):
+    key = _bucket_key(model_config_id, int(now // BUCKET_SECONDS))
+    pipe = redis.pipeline(transaction=False)
+    pipe.hincrby(key, outcome, 1)
+    pipe.expire(key, int(settings.AI_BREAKER_WINDOW) + BUCKET_SECONDS)
+    await pipe.execute()
+
+
+async def before_call(model_config):
+    """
+    Raise CircuitOpenError while the config's circuit is open. Once the
+    reset timeout has passed a single caller is let through as a half-open
+    probe; everyone else keeps failing fast until the probe succeeds.
+    """
+    redis = get_async_redis()
+    state = _decode(await redis.hgetall(_state_key(model_config.id)))
+    if state.get('state', CLOSED) == CLOSED:
+        return
+
+    opened_at = float(state.get('opened_at', 0))
+    if time() - opened_at < settings.AI_BREAKER_RESET_TIMEOUT:
+        raise CircuitOpenError(f"Circuit open for {model_config}")
+
+    if await redis.set(_probe_key(model_config.id), 1, nx=True, ex=int(settings.AI_BREAKER_RESET_TIMEOUT)):
+        await redis.hset(_state_key(model_config.id), 'state', HALF_OPEN)
+        logger.info(f"Circuit half-open for {model_config}, probing")
+        return
+    raise CircuitOpenError(f"Circuit open for {model_config} (probe in progress)")
+
+
+async def record_success(model_config):
+    redis = get_async_redis()
+    now = time()
+    await _record(redis, model_config.id, 'success', now)
+    state = _decode(await redis.hgetall(_state_key(model_config.id)))
+    if state.get('state', CLOSED) != CLOSED or state.get('consecutive_failures', '0') != '0':
+        await redis.hset(_state_key(model_config.id), mapping={'state': CLOSED, 'consecutive_failures': 0})
+        await redis.delete(_probe_key(model_config.id))
+        if state.get('state', CLOSED) != CLOSED:
+            logger.info(f"Circuit closed for {model_config}")
+
+
+async def record_failure(model_config):
+    redis = get_async_redis()
+    now = time()
+    await _record(redis, model_config.id, 'failure', now)
+    key = _state_key(model_config.id)
+    consecutive = await redis.hincrby(key, 'consecutive_failures', 1)
+    state = _decode(await redis.hgetall(key)).get('state', CLOSED)
+
+    if state == HALF_OPEN:
+        trip = True
+    elif state == CLOSED:
+        stats = await _window_stats(redis, model_config.id, now)
+        trip = consecutive >= settings.AI_BREAKER_FAILURE_THRESHOLD or (
+            stats['requests'] >= settings.AI_BREAKER_MIN_REQUESTS
+            and stats['error_rate'] >= settings.AI_BREAKER_ERROR_RATE
+        )
+    else:
+        trip = False
+
+    if trip:
+        await redis.hset(key, mapping={'state': OPEN, 'opened_at': now})
+        await redis.delete(_probe_key(model_config.id))
+        logger.warning(f"Circuit opened for {model_config} after {consecutive} consecutive failures")
+
+
+async def _record_failure_safely(model_config):
+    try:
+        await record_failure(model_config)
+    except Exception as e:
+        logger.warning(f"Circuit breaker unavailable: {e}")
+
+
+def due_for_probe(model_config_id) -> bool:
+    """Whether the config's circuit is open and its reset timeout has passed."""
+    state = status(model_config_id)
+    return state is not None and state['state'] == HALF_OPEN
+
+
+async def call_with_breaker(model_config, call):
+    """
+    Run call() guarded by the config's circuit breaker. Redis problems never
+    block provider calls; the breaker just stops tracking.
+    """
+    if not settings.AI_BREAKER_ENABLED:
+        return await call()
+
+    try:
+        await before_call(model_config)
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.warning(f"Circuit breaker unavailable: {e}")
+        return await call()
+
+    try:
+        result = await call()
+    except asyncio.CancelledError as e:
+        # Timeouts (asyncio.wait_for) cancel the call: a hung provider fails
+        if SUPERSEDED not in e.args:
+            await _record_failure_safely(model_config)
+        raise
+    except Exception:
+        await _record_failure_safely(model_config)
+        raise
+    try:
+        await record_success(model_config)
+    except Exception as e:
+        logger.warning(f"Circuit breaker unavailable: {e}")
+    return result
+
+
+def status(model_config_id) -> Optional[dict]:
+    """Current breaker state and recent error rate, or None without Redis."""
+    now = time()
+    try:
+        redis = get_redis()
+        state = _decode(redis.hgetall(_state_key(model_config_id)))
+        pipe = redis.pipeline(transaction=False)
+        for bucket in _window_buckets(now):
+            pipe.hgetall(_bucket_key(model_config_id, bucket))
+        stats = _error_rate(pipe.execute())
+    except Exception as e:
+        logger.warning(f"Circuit breaker unavailable: {e}")
+        return None
+
+    current = state.get('state', CLOSED)
+    opened_at = float(state['opened_at']) if state.get('opened_at') else None
+    if current == OPEN and opened_at and now - opened_at >= settings.AI_BREAKER_RESET_TIMEOUT:
+        current = HALF_OPEN  # Next call will probe
+    return {
+        'state': current,
+        'consecutive_failures': int(state.get('consecutive_failures', 0)),
+        'opened_at': opened_at,
+        'window_seconds': settings.AI_BREAKER_WINDOW,
+        **stats,
+    }
@@ -0,0 +1,196 @@
+import asyncio
+import atexit
+import concurrent.futures
+import importlib.util
+import json
+import logging
+import os
+import threading
+from typing import Optional
+
+import httpx
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URLS = {
+    'OPENAI': 'https://api.openai.com/v1',
+    'ANTHROPIC': 'https://api.anthropic.com/v1',
+    'DEEPSEEK': 'https://api.deepseek.com/v1',
+    'OLLAMA': 'http://localhost:11434',
+}
+
+API_KEY_SETTINGS = {
+    'OPENAI': 'OPENAI_API_KEY',
+    'ANTHROPIC': 'ANTHROPIC_API_KEY',
+    'DEEPSEEK': 'DEEPSEEK_API_KEY',
+}
+
+ANTHROPIC_VERSION = '2023-06-01'
+
+HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+_lock = threading.Lock()
+_loop = None
+_loop_pid = None
+_clients = {}
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the process-wide event loop that owns the pooled clients,
+    starting it in a daemon thread on first use. Prefork workers get their
+    own loop (and pool) after fork.
+    """
+    global _loop, _loop_pid
+    with _lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            _clients.clear()
+            threading.Thread(target=_loop.run_forever, name='ai-provider-loop', daemon=True).start()
+        return _loop
+
+
+def submit(coro) -> concurrent.futures.Future:
+    """Schedule a coroutine on the shared provider loop from synchronous code."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop())
+
+
+def run_sync(coro, timeout: Optional[float] = None):
+    """
+    Run a coroutine on the shared provider loop from synchronous code
+    (Celery tasks, views) and return its result.
+    """
+    return submit(coro).result(timeout)
+
+
+def resolve_base_url(provider: str, base_url: Optional[str] = None) -> Optional[str]:
+    return (base_url or DEFAULT_BASE_URLS.get(provider, '')).rstrip('/') or None
+
+
+def resolve_api_key(provider: str, api_key: Optional[str] = None) -> Optional[str]:
+    if api_key:
+        return api_key
+    setting = API_KEY_SETTINGS.get(provider)
+    return getattr(settings, setting, None) if setting else None
+
+
+def _default_headers(provider: str, api_key: Optional[str]) -> dict:
+    headers = {'Content-Type': 'application/json'}
+    if provider == 'ANTHROPIC':
+        headers['anthropic-version'] = ANTHROPIC_VERSION
+        if api_key:
+            headers['x-api-key'] = api_key
+    elif api_key:
+        headers['Authorization'] = f"Bearer {api_key}"
+    return headers
+
+
+def get_client(provider: str, base_url: Optional[str] = None, api_key: Optional[str] = None) -> httpx.AsyncClient:
+    """
+    Return the long-lived pooled client for a provider endpoint/credential
+    pair. Must be awaited on the loop used by run_sync.
+    """
+    base_url = resolve_base_url(provider, base_url)
+    api_key = resolve_api_key(provider, api_key)
+    key = (provider, base_url, api_key)
+
+    client = _clients.get(key)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            base_url=base_url or '',
+            headers=_default_headers(provider, api_key),
+            http2=HTTP2_AVAILABLE and bool(base_url) and base_url.startswith('https'),
+            timeout=httpx.Timeout(
+                settings.AI_PROVIDER_READ_TIMEOUT,
+                connect=settings.AI_PROVIDER_CONNECT_TIMEOUT
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.AI_PROVIDER_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.AI_PROVIDER_MAX_KEEPALIVE
+            ),
+        )
+        _clients[key] = client
+    return client
+
+
+def get_client_for_config(model_config) -> httpx.AsyncClient:
+    """Pooled client honoring an AIModelConfig's api_key and base_url."""
+    return get_client(model_config.provider, model_config.base_url, model_config.api_key)
+
+
+async def _close_all():
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+def close_clients():
+    """Close all pooled clients (worker shutdown)."""
+    if _loop is None or _loop_pid != os.getpid() or not _loop.is_running():
+        return
+    try:
+        run_sync(_close_all(), timeout=5)
+    except Exception as e:
+        logger.warning(f"Failed to close provider clients: {e}")
+
+
+atexit.register(close_clients)
+
+
+async def iter_sse_json(response: httpx.Response):
+    """
+    Yield the JSON payload of each `data:` line of a server-sent events
+    stream, stopping at the OpenAI-style `[DONE]` sentinel.
+    """
+    async for line in response.aiter_lines():
+        if not line.startswith('data:'):
+            continue
+        data = line[len('data:'):].strip()
+        if not data:
+            continue
+        if data == '[DONE]':
+            break
+        yield json.loads(data)
+
+
+async def iter_ndjson(response: httpx.Response):
+    """Yield each JSON object of a newline-delimited JSON stream."""
+    async for line in response.aiter_lines():
+        if line.strip():
+            yield json.loads(line)
+
+
+_redis = None
+_redis_pid = None
+
+
+def get_redis():
+    """Shared redis-py client for ai_integration coordination data."""
+    global _redis, _redis_pid
+    if _redis is None or _redis_pid != os.getpid():
+        import redis
+
+        _redis = redis.Redis.from_url(settings.AI_REDIS_URL, socket_timeout=1, socket_connect_timeout=1)
+        _redis_pid = os.getpid()
+    return _redis
+
+
+_async_redis = None
+_async_redis_pid = None
+
+
+def get_async_redis():
+    """
+    redis.asyncio client for coroutines running on the shared provider loop
+    (see run_sync); its connections are bound to that loop.
+    """
+    global _async_redis, _async_redis_pid
+    if _async_redis is None or _async_redis_pid != os.getpid():
+        import redis.asyncio
+
+        _async_redis = redis.asyncio.Redis.from_url(settings.AI_REDIS_URL, socket_timeout=1, socket_connect_timeout=1)
+        _async_redis_pid = os.getpid()
+    return _async_redis
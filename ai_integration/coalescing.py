@@ -0,0 +1,111 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable
+
+from django.conf import settings
+
+from .clients import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+LOCK_PREFIX = 'ai:inflight:'
+RESULT_PREFIX = 'ai:inflight-result:'
+CHANNEL_PREFIX = 'ai:inflight-channel:'
+RESULT_TTL = 30  # Seconds a finished result stays readable for late followers
+
+# After Redis fails, calls go straight to the provider for a while instead
+# of paying for a connection attempt each time
+_unavailable_until = 0.0
+
+# Delete the lock only if this leader still owns it
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+async def _wait_for_result(redis, key: str, timeout: float):
+    pubsub = redis.pubsub()
+    try:
+        await pubsub.subscribe(CHANNEL_PREFIX + key)
+        # The leader may have finished before we subscribed
+        raw = await redis.get(RESULT_PREFIX + key)
+        if raw is not None:
+            return raw
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=min(remaining, 1.0))
+            if message is not None:
+                return message['data']
+            if not await redis.exists(LOCK_PREFIX + key):
+                # Leader gone; pick up its result if it published one
+                return await redis.get(RESULT_PREFIX + key)
+    finally:
+        try:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+        except Exception:
+            pass
+
+
+async def single_flight(key: str, call: Callable[[], Awaitable[str]]) -> str:
+    """
+    Run call() once per key across all workers. The first caller (leader)
+    takes a Redis lock and runs it; concurrent callers with the same key
+    (followers) wait for the leader's published result instead. Followers
+    fall back to calling themselves if the leader fails or times out, and
+    everything degrades to a direct call when Redis is unavailable (for
+    AI_COALESCE_RETRY_INTERVAL seconds before Redis is tried again).
+    """
+    global _unavailable_until
+    if not settings.AI_COALESCE_ENABLED or time.monotonic() < _unavailable_until:
+        return await call()
+
+    token = uuid.uuid4().hex
+    try:
+        redis = get_async_redis()
+        leader = await redis.set(LOCK_PREFIX + key, token, nx=True, px=int(settings.AI_COALESCE_LOCK_TTL * 1000))
+    except Exception as e:
+        logger.warning(f"Request coalescing unavailable for {settings.AI_COALESCE_RETRY_INTERVAL}s: {e}")
+        _unavailable_until = time.monotonic() + settings.AI_COALESCE_RETRY_INTERVAL
+        return await call()
+
+    if leader:
+        payload = {'error': 'cancelled'}
+        try:
+            value = await call()
+            payload = {'value': value}
+        except Exception as e:
+            payload = {'error': str(e)}
+            raise
+        finally:
+            try:
+                raw = json.dumps(payload)
+                await redis.set(RESULT_PREFIX + key, raw, ex=RESULT_TTL)
+                await redis.publish(CHANNEL_PREFIX + key, raw)
+                await redis.eval(RELEASE_SCRIPT, 1, LOCK_PREFIX + key, token)
+            except Exception as e:
+                logger.warning(f"Failed to publish coalesced result: {e}")
+        return value
+
+    try:
+        raw = await _wait_for_result(redis, key, settings.AI_COALESCE_WAIT_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Request coalescing unavailable: {e}")
+        raw = None
+
+    payload = json.loads(raw) if raw is not None else {}
+    if 'value' in payload:
+        logger.info(f"Coalesced provider call {key[:12]} onto in-flight request")
+        return payload['value']
+    return await call()
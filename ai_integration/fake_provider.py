@@ -0,0 +1,273 @@
+"""
+Stand-in for the AI provider HTTP APIs, for benchmarks, load tests and CI
+runs without network access. Speaks the OpenAI/DeepSeek chat completions,
+Anthropic messages and Ollama /api/generate wire formats (streaming and
+non-streaming) with simulated time to first token, decode rate and
+injected errors.
+"""
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+
+WORDS = (
+    "the quick brown fox jumps over a lazy dog while models compare latency "
+    "throughput and tokens across providers in this simulated response"
+).split()
+
+
+def parse_distribution(spec: str) -> Callable[[random.Random], float]:
+    """
+    Parse a distribution spec into a sampler returning a non-negative value:
+    "fixed:V", "uniform:LOW:HIGH", "normal:MEAN:STDDEV" or
+    "lognormal:MEDIAN:SIGMA".
+    """
+    kind, *params = spec.split(':')
+    try:
+        values = [float(param) for param in params]
+    except ValueError:
+        raise ValueError(f"Invalid distribution parameters: {spec}")
+
+    expected = {'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2}
+    if kind not in expected or len(values) != expected[kind]:
+        raise ValueError(f"Invalid distribution: {spec}")
+    if kind == 'fixed':
+        return lambda rng: max(values[0], 0.0)
+    if kind == 'uniform':
+        return lambda rng: max(rng.uniform(values[0], values[1]), 0.0)
+    if kind == 'normal':
+        return lambda rng: max(rng.gauss(values[0], values[1]), 0.0)
+    return lambda rng: rng.lognormvariate(math.log(values[0]), values[1]) if values[0] > 0 else 0.0
+
+
+@dataclass
+class FakeProfile:
+    """How a simulated model behaves. Times are in milliseconds."""
+    first_token_ms: str = 'lognormal:200:0.4'
+    tokens_per_second: float = 50.0
+    completion_tokens: str = 'uniform:20:120'
+    error_rate: float = 0.0
+    error_status: int = 500
+
+    def __post_init__(self):
+        self.sample_first_token = parse_distribution(self.first_token_ms)
+        self.sample_completion_tokens = parse_distribution(self.completion_tokens)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'FakeProfile':
+        known = {f.name for f in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Unknown profile settings: {sorted(unknown)}")
+        return cls(**data)
+
+
+@dataclass
+class FakeProviderConfig:
+    default: FakeProfile = field(default_factory=FakeProfile)
+    models: Dict[str, FakeProfile] = field(default_factory=dict)
+    seed: Optional[int] = None
+
+    def profile(self, model: str) -> FakeProfile:
+        return self.models.get(model, self.default)
+
+    @classmethod
+    def from_dict(cls, data: dict, seed: Optional[int] = None) -> 'FakeProviderConfig':
+        """Build from {"default": {...}, "models": {"model-name": {...}}}."""
+        return cls(
+            default=FakeProfile.from_dict(data.get('default', {})),
+            models={name: FakeProfile.from_dict(profile) for name, profile in data.get('models', {}).items()},
+            seed=seed,
+        )
+
+
+class FakeProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FakeProvider/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return self._send_json(400, {'error': 'invalid JSON'})
+
+        path = self.path.split('?')[0]
+        if path.startswith('/v1/'):
+            path = path[len('/v1'):]
+        routes = {
+            '/chat/completions': self._chat_completions,
+            '/messages': self._messages,
+            '/api/generate': self._ollama_generate,
+        }
+        route = routes.get(path)
+        if route is None:
+            return self._send_json(404, {'error': f'unknown path {self.path}'})
+
+        model = body.get('model', '')
+        profile = self.server.config.profile(model)
+        with self.server.rng_lock:
+            failed = self.server.rng.random() < profile.error_rate
+            first_token = profile.sample_first_token(self.server.rng) / 1000.0
+            tokens = max(int(profile.sample_completion_tokens(self.server.rng)), 1)
+        prompt = self._prompt_text(body)
+        prompt_tokens = len(prompt.split())
+
+        if failed:
+            time.sleep(first_token)
+            return self._send_json(profile.error_status, {'error': {'message': 'injected error', 'type': 'server_error'}})
+        route(body, model, prompt_tokens, tokens, first_token, 1.0 / max(profile.tokens_per_second, 1e-6))
+
+    @staticmethod
+    def _prompt_text(body: dict) -> str:
+        if 'prompt' in body:
+            return str(body['prompt'])
+        return " ".join(str(message.get('content', '')) for message in body.get('messages', []))
+
+    @staticmethod
+    def _words(count: int):
+        return [WORDS[i % len(WORDS)] + ' ' for i in range(count)]
+
+    def _send_json(self, status: int, payload: dict):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _start_stream(self, content_type: str):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+    def _write_chunk(self, data: str):
+        raw = data.encode()
+        self.wfile.write(f"{len(raw):X}\r\n".encode() + raw + b"\r\n")
+        self.wfile.flush()
+
+    def _end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _emit(self, words, first_token, per_token, write):
+        """Write each word after the simulated first-token and decode delays."""
+        time.sleep(first_token)
+        for index, word in enumerate(words):
+            if index:
+                time.sleep(per_token)
+            write(word)
+
+    def _generate_text(self, words, first_token, per_token) -> str:
+        time.sleep(first_token + per_token * (len(words) - 1))
+        return "".join(words)
+
+    def _chat_completions(self, body, model, prompt_tokens, tokens, first_token, per_token):
+        words = self._words(tokens)
+        usage = {'prompt_tokens': prompt_tokens, 'completion_tokens': tokens, 'total_tokens': prompt_tokens + tokens}
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        if not body.get('stream'):
+            return self._send_json(200, {
+                'id': completion_id,
+                'object': 'chat.completion',
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': self._generate_text(words, first_token, per_token)},
+                    'finish_reason': 'stop',
+                }],
+                'usage': usage,
+            })
+
+        self._start_stream('text/event-stream')
+
+        def write(word):
+            self._write_chunk("data: " + json.dumps({
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'model': model,
+                'choices': [{'index': 0, 'delta': {'content': word}, 'finish_reason': None}],
+            }) + "\n\n")
+
+        self._emit(words, first_token, per_token, write)
+        if (body.get('stream_options') or {}).get('include_usage'):
+            self._write_chunk("data: " + json.dumps({'id': completion_id, 'choices': [], 'usage': usage}) + "\n\n")
+        self._write_chunk("data: [DONE]\n\n")
+        self._end_stream()
+
+    def _messages(self, body, model, prompt_tokens, tokens, first_token, per_token):
+        words = self._words(tokens)
+        message_id = f"msg_{uuid.uuid4().hex[:12]}"
+        if not body.get('stream'):
+            return self._send_json(200, {
+                'id': message_id,
+                'type': 'message',
+                'role': 'assistant',
+                'model': model,
+                'content': [{'type': 'text', 'text': self._generate_text(words, first_token, per_token)}],
+                'stop_reason': 'end_turn',
+                'usage': {'input_tokens': prompt_tokens, 'output_tokens': tokens},
+            })
+
+        self._start_stream('text/event-stream')
+
+        def event(name, payload):
+            self._write_chunk(f"event: {name}\ndata: {json.dumps(payload)}\n\n")
+
+        event('message_start', {'type': 'message_start', 'message': {
+            'id': message_id, 'type': 'message', 'role': 'assistant', 'model': model, 'content': [],
+            'usage': {'input_tokens': prompt_tokens, 'output_tokens': 0},
+        }})
+        event('content_block_start', {'type': 'content_block_start', 'index': 0, 'content_block': {'type': 'text', 'text': ''}})
+        self._emit(words, first_token, per_token, lambda word: event('content_block_delta', {
+            'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': word},
+        }))
+        event('content_block_stop', {'type': 'content_block_stop', 'index': 0})
+        event('message_delta', {'type': 'message_delta', 'delta': {'stop_reason': 'end_turn'}, 'usage': {'output_tokens': tokens}})
+        event('message_stop', {'type': 'message_stop'})
+        self._end_stream()
+
+    def _ollama_generate(self, body, model, prompt_tokens, tokens, first_token, per_token):
+        words = self._words(tokens)
+        final = {
+            'model': model,
+            'done': True,
+            'prompt_eval_count': prompt_tokens,
+            'eval_count': tokens,
+            'eval_duration': int(per_token * tokens * 1e9),
+        }
+        if body.get('stream') is False:
+            return self._send_json(200, {**final, 'response': self._generate_text(words, first_token, per_token)})
+
+        self._start_stream('application/x-ndjson')
+        self._emit(words, first_token, per_token, lambda word: self._write_chunk(
+            json.dumps({'model': model, 'response': word, 'done': False}) + "\n"
+        ))
+        self._write_chunk(json.dumps({**final, 'response': ''}) + "\n")
+        self._end_stream()
+
+
+class FakeProviderServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: FakeProviderConfig, verbose: bool = False):
+        super().__init__(address, FakeProviderHandler)
+        self.config = config
+        self.verbose = verbose
+        self.rng = random.Random(config.seed)
+        self.rng_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
@@ -0,0 +1,88 @@
+"""
+CPU inference backends for Hugging Face pipelines: eager fp32 PyTorch,
+PyTorch dynamic int8 quantization of the Linear layers, and ONNX Runtime
+running an exported graph. Exported ONNX models are kept under
+HF_ONNX_CACHE_DIR so each model is only exported once per host.
+"""
+import difflib
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('eager', 'int8', 'onnx')
+DEFAULT_BACKEND = 'eager'
+
+# optimum.onnxruntime model class for each pipeline task
+ORT_MODEL_CLASSES = {
+    'summarization': 'ORTModelForSeq2SeqLM',
+    'text-generation': 'ORTModelForCausalLM',
+}
+
+
+def validate_backend(backend: str) -> str:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+    return backend
+
+
+def quantize_int8(pipe):
+    """Swap the pipeline's Linear layers for dynamically quantized int8 ones."""
+    import torch
+
+    pipe.model = torch.ao.quantization.quantize_dynamic(pipe.model, {torch.nn.Linear}, dtype=torch.qint8)
+    return pipe
+
+
+def onnx_export_dir(model_name: str) -> Path:
+    return Path(settings.HF_ONNX_CACHE_DIR) / model_name.replace('/', '--')
+
+
+def load_onnx_pipeline(task: str, model_name: str):
+    """
+    Pipeline running the model on ONNX Runtime, exporting it on first use.
+    Exports go to a temporary directory that is renamed into place, so
+    workers exporting the same model at once don't see a partial graph.
+    """
+    from optimum import onnxruntime
+    from transformers import AutoTokenizer, pipeline
+    from .model_artifacts import resolve
+
+    if task not in ORT_MODEL_CLASSES:
+        raise ValueError(f"The onnx backend does not support {task}")
+    model_class = getattr(onnxruntime, ORT_MODEL_CLASSES[task])
+    source = resolve(model_name)
+    export_dir = onnx_export_dir(model_name)
+
+    if not (export_dir / 'config.json').exists():
+        logger.info(f"Exporting {model_name} to ONNX in {export_dir}")
+        export_dir.parent.mkdir(parents=True, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=export_dir.parent, prefix=f".{export_dir.name}-")
+        try:
+            model_class.from_pretrained(source, export=True).save_pretrained(staging)
+            os.rename(staging, export_dir)
+        except OSError:
+            if not (export_dir / 'config.json').exists():
+                raise
+            # Another worker finished the export first
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    model = model_class.from_pretrained(export_dir)
+    return pipeline(task, model=model, tokenizer=AutoTokenizer.from_pretrained(source))
+
+
+def generated_text(output) -> str:
+    """The text of a summarization or text-generation pipeline output."""
+    first = output[0] if isinstance(output, list) else output
+    return first.get('summary_text', first.get('generated_text', ''))
+
+
+def output_drift(reference: str, candidate: str) -> float:
+    """1 - token-level similarity ratio between two outputs (0 = identical)."""
+    return 1.0 - difflib.SequenceMatcher(None, reference.split(), candidate.split()).ratio()
@@ -0,0 +1,380 @@
+"""
+Per-host inference server for Hugging Face pipelines. One process (see
+`manage.py inference_server`) owns the loaded models and serves every
+Celery worker on the host over a Unix socket, batching concurrent requests
+for the same model into a single pipeline call. Workers call `infer_remote`
+and fall back to in-process inference when the server isn't configured or
+can't be reached.
+
+Messages are 4-byte big-endian length-prefixed JSON documents.
+"""
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import List, Optional
+
+from django.conf import settings
+
+from .inference_backends import DEFAULT_BACKEND, validate_backend
+from .model_pool import ModelPool, model_pool
+from .prefix_cache import prefix_cache, run_text_generation
+
+logger = logging.getLogger(__name__)
+
+_length = struct.Struct('>I')
+MAX_MESSAGE_BYTES = 64 * 2**20
+
+
+class InferenceUnavailable(RuntimeError):
+    """The inference server isn't configured or can't be reached."""
+
+
+class InferenceError(RuntimeError):
+    """The inference server accepted a request but couldn't complete it."""
+
+
+def send_message(sock, payload: dict):
+    data = json.dumps(payload).encode('utf-8')
+    sock.sendall(_length.pack(len(data)) + data)
+
+
+def _recv_exact(sock, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 2**20))
+        if not chunk:
+            raise ConnectionError("Connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def recv_message(sock) -> Optional[dict]:
+    """Next message from sock, or None if the peer closed between messages."""
+    header = sock.recv(_length.size, socket.MSG_WAITALL)
+    if not header:
+        return None
+    if len(header) < _length.size:
+        raise ConnectionError("Connection closed")
+    (size,) = _length.unpack(header)
+    if size > MAX_MESSAGE_BYTES:
+        raise ValueError(f"Message of {size} bytes exceeds {MAX_MESSAGE_BYTES}")
+    return json.loads(_recv_exact(sock, size))
+
+
+def pipeline_usage(pipe, task: str, prompt: str, output) -> Optional[dict]:
+    """
+    prompt/completion token counts for one pipeline output, using the
+    pipeline's own tokenizer. Text generation output includes the prompt.
+    """
+    tokenizer = getattr(pipe, 'tokenizer', None)
+    if tokenizer is None or not output:
+        return None
+    prompt_tokens = len(tokenizer(prompt)['input_ids'])
+    first = output[0] if isinstance(output, list) else output
+    if task == 'text-generation':
+        completion_tokens = max(len(tokenizer(first.get('generated_text', ''))['input_ids']) - prompt_tokens, 0)
+    else:
+        text = first.get('summary_text', first.get('generated_text', ''))
+        completion_tokens = len(tokenizer(text)['input_ids'])
+    return {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens}
+
+
+def _prepare_for_batching(pipe, task: str):
+    """Decoder-only tokenizers (gpt2) need a pad token and left padding to batch."""
+    tokenizer = getattr(pipe, 'tokenizer', None)
+    if tokenizer is None or task != 'text-generation':
+        return
+    if getattr(tokenizer, 'pad_token', None) is None and getattr(tokenizer, 'eos_token', None) is not None:
+        tokenizer.pad_token = tokenizer.eos_token
+        model_config = getattr(getattr(pipe, 'model', None), 'config', None)
+        if model_config is not None and getattr(model_config, 'pad_token_id', None) is None:
+            model_config.pad_token_id = tokenizer.eos_token_id
+    tokenizer.padding_side = 'left'
+
+
+def _batch_options(pipe, task: str, inputs: List[str], options: dict) -> List[dict]:
+    """
+    Generation options for each input of a batch. Text generation's
+    max_length counts the left-padded prompt, so within a batch it would
+    depend on the longest prompt in it; each input gets the max_new_tokens
+    it would have had on its own instead.
+    """
+    if task != 'text-generation' or 'max_length' not in options:
+        return [options] * len(inputs)
+    rest = {key: value for key, value in options.items() if key != 'max_length'}
+    return [
+        {**rest, 'max_new_tokens': max(options['max_length'] - len(pipe.tokenizer(text)['input_ids']), 1)}
+        for text in inputs
+    ]
+
+
+class _Request:
+    def __init__(self, inputs: List[str], usage: bool):
+        self.inputs = inputs
+        self.usage = usage
+        self.results = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class Batcher(threading.Thread):
+    """
+    Collects requests for one (task, model, backend, options) and runs them
+    through the pipeline together: the first queued request waits up to
+    max_wait seconds for others, up to max_batch_size inputs in total.
+    """
+
+    def __init__(self, pool: ModelPool, task: str, model: str, backend: str, options: dict,
+                 max_batch_size: int, max_wait: float):
+        super().__init__(name=f"batcher-{task}-{model}-{backend}", daemon=True)
+        self.pool = pool
+        self.task = task
+        self.model = model
+        self.backend = backend
+        self.options = options
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+        self.batches = 0
+        self.inputs = 0
+
+    def submit(self, inputs: List[str], usage: bool = False, timeout: Optional[float] = None) -> list:
+        request = _Request(inputs, usage)
+        self.queue.put(request)
+        if not request.done.wait(timeout):
+            raise TimeoutError(f"{self.task} {self.model} did not finish in {timeout}s")
+        if request.error is not None:
+            raise request.error
+        return request.results
+
+    def _collect(self) -> List[_Request]:
+        batch = [self.queue.get()]
+        size = len(batch[0].inputs)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request.inputs)
+        return batch
+
+    def _run_batched(self, pipe, inputs: List[str]) -> list:
+        """Outputs for inputs in order, batching those with the same options."""
+        groups = {}
+        for index, options in enumerate(_batch_options(pipe, self.task, inputs, self.options)):
+            groups.setdefault(json.dumps(options, sort_keys=True), (options, []))[1].append(index)
+        outputs = [None] * len(inputs)
+        for options, indexes in groups.values():
+            batch = [inputs[index] for index in indexes]
+            for index, output in zip(indexes, pipe(batch, batch_size=len(batch), **options)):
+                outputs[index] = output
+        return outputs
+
+    def _run(self, requests: List[_Request]):
+        entry = self.pool.get(self.task, self.model, self.backend)
+        inputs = [text for request in requests for text in request.inputs]
+        with entry.lock:
+            if len(inputs) > 1:
+                _prepare_for_batching(entry.pipe, self.task)
+                outputs = self._run_batched(entry.pipe, inputs)
+            elif self.task == 'text-generation':
+                outputs = [run_text_generation(entry.pipe, self.model, self.backend, inputs[0], self.options)]
+            else:
+                outputs = [entry.pipe(inputs[0], **self.options)]
+        # A single-input call returns a list of candidates; batched
+        # summarization returns bare dicts, so normalize to the former
+        outputs = [output if isinstance(output, list) else [output] for output in outputs]
+
+        position = 0
+        for request in requests:
+            results = []
+            for text in request.inputs:
+                output = outputs[position]
+                position += 1
+                results.append({
+                    'output': output,
+                    'usage': pipeline_usage(entry.pipe, self.task, text, output) if request.usage else None,
+                })
+            request.results = results
+        self.batches += 1
+        self.inputs += len(inputs)
+
+    def run(self):
+        while True:
+            requests = self._collect()
+            try:
+                self._run(requests)
+            except Exception as e:
+                if len(requests) == 1:
+                    requests[0].error = e
+                else:
+                    # Don't let one bad input fail everyone it was batched with
+                    logger.warning(f"Batch of {len(requests)} {self.model} requests failed ({e}), retrying separately")
+                    for request in requests:
+                        try:
+                            self._run([request])
+                        except Exception as request_error:
+                            request.error = request_error
+            for request in requests:
+                request.done.set()
+
+
+class InferenceRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                message = recv_message(self.request)
+            except (ConnectionError, ValueError) as e:
+                logger.debug(f"Dropping inference connection: {e}")
+                return
+            if message is None:
+                return
+            try:
+                response = self.server.dispatch(message)
+            except Exception as e:
+                response = {'error': str(e), 'type': type(e).__name__}
+            try:
+                send_message(self.request, response)
+            except OSError:
+                return
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, pool: ModelPool = None, max_batch_size: int = None, max_wait: float = None):
+        self.pool = pool or model_pool
+        self.max_batch_size = max_batch_size or settings.HF_INFERENCE_MAX_BATCH_SIZE
+        self.max_wait = settings.HF_INFERENCE_MAX_WAIT_MS / 1000 if max_wait is None else max_wait
+        self.batchers = {}
+        self._batchers_lock = threading.Lock()
+        self.started = time.time()
+        super().__init__(path, InferenceRequestHandler)
+        os.chmod(path, 0o660)
+
+    def batcher(self, task: str, model: str, backend: str, options: dict) -> Batcher:
+        key = (task, model, backend, json.dumps(options, sort_keys=True))
+        with self._batchers_lock:
+            batcher = self.batchers.get(key)
+            if batcher is None:
+                batcher = self.batchers[key] = Batcher(
+                    self.pool, task, model, backend, options, self.max_batch_size, self.max_wait)
+                batcher.start()
+        return batcher
+
+    def dispatch(self, message: dict) -> dict:
+        if message.get('op') == 'ping':
+            return self.stats()
+        inputs = message.get('inputs')
+        if not message.get('task') or not message.get('model') or not isinstance(inputs, list):
+            raise ValueError("task, model and a list of inputs are required")
+        backend = validate_backend(message.get('backend') or DEFAULT_BACKEND)
+        results = self.batcher(message['task'], message['model'], backend, message.get('options') or {}).submit(
+            [str(text) for text in inputs], usage=bool(message.get('usage')))
+        return {'results': results}
+
+    def stats(self) -> dict:
+        return {
+            'pid': os.getpid(),
+            'uptime': time.time() - self.started,
+            'models': self.pool.loaded(),
+            'batchers': [
+                {'task': task, 'model': model, 'backend': backend, 'batches': batcher.batches,
+                 'inputs': batcher.inputs, 'queued': batcher.queue.qsize()}
+                for (task, model, backend, _), batcher in self.batchers.items()
+            ],
+            'prefix_cache': prefix_cache.stats()['process'],
+        }
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+class InferenceClient:
+    def __init__(self, path: str, timeout: float = None, connect_timeout: float = 1.0):
+        self.path = path
+        self.timeout = settings.HF_INFERENCE_TIMEOUT if timeout is None else timeout
+        self.connect_timeout = connect_timeout
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.connect_timeout)
+        try:
+            sock.connect(self.path)
+        except OSError as e:
+            sock.close()
+            raise InferenceUnavailable(f"Inference server at {self.path} unavailable: {e}")
+        sock.settimeout(self.timeout)
+        return sock
+
+    def call(self, payload: dict) -> dict:
+        """
+        Send one request. Failing to connect raises InferenceUnavailable; a
+        request that was sent but failed or timed out raises InferenceError,
+        since retrying it in-process would load the model in this worker.
+        """
+        sock = self._connect()
+        try:
+            send_message(sock, payload)
+            response = recv_message(sock)
+        except (OSError, ValueError) as e:
+            raise InferenceError(f"Inference request failed: {e}")
+        finally:
+            sock.close()
+        if response is None:
+            raise InferenceError("Inference server closed the connection")
+        if 'error' in response:
+            raise InferenceError(f"{response.get('type', 'Error')}: {response['error']}")
+        return response
+
+    def infer(self, task: str, model: str, inputs: List[str], options: dict = None, usage: bool = False,
+              backend: str = DEFAULT_BACKEND) -> list:
+        """One {'output', 'usage'} dict per input, in order."""
+        return self.call({
+            'task': task, 'model': model, 'backend': backend, 'inputs': inputs,
+            'options': options or {}, 'usage': usage,
+        })['results']
+
+    def ping(self) -> dict:
+        return self.call({'op': 'ping'})
+
+
+# After a failed connection, workers stay in-process for a while instead of
+# paying for a connection attempt on every call
+_unavailable_until = 0.0
+
+
+def infer_remote(task: str, model: str, inputs: List[str], options: dict = None, usage: bool = False,
+                 backend: str = DEFAULT_BACKEND) -> list:
+    """
+    Run inputs through the host's inference server. Raises
+    InferenceUnavailable when HF_INFERENCE_SOCKET is unset or the server
+    can't be reached, so callers can fall back to in-process inference.
+    """
+    global _unavailable_until
+    if not settings.HF_INFERENCE_SOCKET:
+        raise InferenceUnavailable("HF_INFERENCE_SOCKET is not set")
+    if time.monotonic() < _unavailable_until:
+        raise InferenceUnavailable("Inference server recently unavailable")
+    try:
+        return InferenceClient(settings.HF_INFERENCE_SOCKET).infer(task, model, inputs, options, usage, backend)
+    except InferenceUnavailable as e:
+        logger.warning(f"{e}; using in-process inference for {settings.HF_INFERENCE_RETRY_INTERVAL}s")
+        _unavailable_until = time.monotonic() + settings.HF_INFERENCE_RETRY_INTERVAL
+        raise
@@ -0,0 +1,118 @@
+# ai_integration/management/commands/benchmark_backends.py
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ai_integration.inference_backends import BACKENDS, DEFAULT_BACKEND, generated_text, output_drift
+from ai_integration.model_pool import estimate_pipeline_bytes, load_pipeline
+from ai_integration.routing import percentile
+
+SAMPLE_INPUTS = [
+    "The city council met on Tuesday to discuss the proposed expansion of the public library. "
+    "Supporters argued that the current building is too small for the growing number of visitors "
+    "and lacks space for community programs, while opponents raised concerns about the cost and "
+    "the loss of parking. The council agreed to commission a study before voting next month.",
+    "Researchers have developed a new battery chemistry that stores twice as much energy as "
+    "conventional lithium-ion cells while using more abundant materials. Early tests show the "
+    "cells survive thousands of charge cycles, but the team cautions that manufacturing at scale "
+    "remains a challenge and commercial products are likely several years away.",
+    "Short input about a cat sitting on a mat in the sun.",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare CPU inference backends (eager fp32, dynamic int8, ONNX Runtime) for one "
+        "model: load time, latency percentiles, speedup over fp32 and how far each "
+        "backend's outputs drift from the fp32 outputs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', default='facebook/bart-large-cnn')
+        parser.add_argument('--task', choices=['summarization', 'text-generation'], default='summarization')
+        parser.add_argument('--backends', default=','.join(BACKENDS))
+        parser.add_argument('--inputs', help="File with one input text per line (JSON strings are decoded)")
+        parser.add_argument('--runs', type=int, default=3, help="Timed passes over the inputs")
+        parser.add_argument('--max-new-tokens', type=int, default=60)
+
+    def handle(self, *args, **options):
+        backends = [backend.strip() for backend in options['backends'].split(',') if backend.strip()]
+        unknown = set(backends) - set(BACKENDS)
+        if unknown or not backends:
+            raise CommandError(f"--backends must be a subset of {','.join(BACKENDS)}")
+        if DEFAULT_BACKEND not in backends:
+            backends.insert(0, DEFAULT_BACKEND)  # The reference for speedup and drift
+        if options['runs'] < 1:
+            raise CommandError("--runs must be at least 1")
+
+        inputs = self.read_inputs(options['inputs']) if options['inputs'] else SAMPLE_INPUTS
+        generation = {'max_new_tokens': options['max_new_tokens'], 'do_sample': False}
+
+        results = {}
+        for backend in backends:
+            self.stdout.write(f"Benchmarking {options['model']} on {backend}...")
+            try:
+                results[backend] = self.run_backend(options['task'], options['model'], backend, inputs,
+                                                    options['runs'], generation)
+            except Exception as e:
+                self.stderr.write(f"{backend}: {e}")
+        if DEFAULT_BACKEND not in results:
+            raise CommandError("The eager fp32 reference run failed")
+        self.report(results, len(inputs))
+
+    def read_inputs(self, path):
+        try:
+            with open(path) as f:
+                lines = [line.strip() for line in f if line.strip()]
+        except OSError as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+        inputs = []
+        for line in lines:
+            try:
+                decoded = json.loads(line)
+            except ValueError:
+                decoded = line
+            inputs.append(decoded if isinstance(decoded, str) else line)
+        if not inputs:
+            raise CommandError(f"{path} has no inputs")
+        return inputs
+
+    def run_backend(self, task, model_name, backend, inputs, runs, generation):
+        start = time.perf_counter()
+        pipe = load_pipeline(task, model_name, backend)
+        load_time = time.perf_counter() - start
+
+        outputs = [generated_text(pipe(text, **generation)) for text in inputs]  # Warmup pass
+        latencies = []
+        for _ in range(runs):
+            for text in inputs:
+                start = time.perf_counter()
+                pipe(text, **generation)
+                latencies.append(time.perf_counter() - start)
+        return {
+            'load_time': load_time,
+            'size': estimate_pipeline_bytes(pipe),
+            'latencies': latencies,
+            'outputs': outputs,
+        }
+
+    def report(self, results, input_count):
+        reference = results[DEFAULT_BACKEND]
+        reference_p50 = percentile(reference['latencies'], 50)
+        header = (f"{'backend':<10}{'load s':>9}{'size MiB':>10}{'p50 ms':>9}{'p95 ms':>9}"
+                  f"{'speedup':>9}{'drift':>8}{'exact':>8}")
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for backend, result in results.items():
+            p50 = percentile(result['latencies'], 50)
+            drifts = [output_drift(expected, actual) for expected, actual in zip(reference['outputs'], result['outputs'])]
+            exact = sum(expected == actual for expected, actual in zip(reference['outputs'], result['outputs']))
+            self.stdout.write(
+                f"{backend:<10}{result['load_time']:>9.1f}{result['size'] / 2**20:>10.0f}"
+                f"{p50 * 1000:>9.0f}{percentile(result['latencies'], 95) * 1000:>9.0f}"
+                f"{reference_p50 / p50 if p50 else 0:>8.2f}x{sum(drifts) / len(drifts):>8.3f}"
+                f"{exact:>5}/{input_count:<2}"
+            )
+        self.stdout.write('-' * len(header))
+        self.stdout.write("drift: mean 1 - token similarity to the fp32 output (0 = identical)")
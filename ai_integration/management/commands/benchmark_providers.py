@@ -0,0 +1,180 @@
+# ai_integration/management/commands/benchmark_providers.py
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from ai_integration.models import AIModelConfig, ModelComparison, ModelResponse
+from ai_integration.routing import percentile
+
+CONFIG_PREFIX = 'benchmark-'
+PROVIDERS = ['OPENAI', 'ANTHROPIC', 'DEEPSEEK', 'OLLAMA']
+DONE_STATES = {'SUCCESS', 'FAILURE'}
+
+
+def summarize_latencies(latencies):
+    """count, p50/p95/p99 and max of a list of latencies in seconds."""
+    return {
+        'count': len(latencies),
+        'p50': percentile(latencies, 50) or 0.0,
+        'p95': percentile(latencies, 95) or 0.0,
+        'p99': percentile(latencies, 99) or 0.0,
+        'max': max(latencies) if latencies else 0.0,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark model comparisons end to end against the fake provider server: "
+        "provisions one AIModelConfig per provider pointing at --fake-url, drives "
+        "compare_models on a running InnoFlow server, waits for every comparison "
+        "through the long-poll status endpoint and reports throughput and tail "
+        "latency. Start `manage.py fake_providers` and the server (plus a Celery "
+        "worker, or CELERY_TASK_ALWAYS_EAGER=True) against the same database first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--fake-url', default='http://127.0.0.1:8765')
+        parser.add_argument('--providers', default=','.join(PROVIDERS))
+        parser.add_argument('--comparisons', type=int, default=50, help="Number of compare_models requests")
+        parser.add_argument('--concurrency', type=int, default=8, help="Concurrent client threads")
+        parser.add_argument('--mode', choices=['per_model', 'concurrent', 'hedged'], default='per_model')
+        parser.add_argument('--stream', action='store_true')
+        parser.add_argument('--cache', choices=['use', 'refresh', 'bypass'], default='bypass',
+                            help="Response cache mode; bypass by default so providers are always called")
+        parser.add_argument('--wait', type=float, default=120.0, help="Seconds to wait for each comparison")
+        parser.add_argument('--cleanup', action='store_true', help="Delete the benchmark configs and comparisons afterwards")
+
+    def handle(self, *args, **options):
+        providers = [provider.strip().upper() for provider in options['providers'].split(',') if provider.strip()]
+        unknown = set(providers) - set(PROVIDERS)
+        if unknown or not providers:
+            raise CommandError(f"--providers must be a subset of {','.join(PROVIDERS)}")
+        if options['comparisons'] < 1 or options['concurrency'] < 1:
+            raise CommandError("--comparisons and --concurrency must be at least 1")
+
+        model_configs = self.provision_configs(providers, options['fake_url'].rstrip('/'))
+        self.stdout.write(
+            f"Running {options['comparisons']} {options['mode']} comparisons of {len(model_configs)} models "
+            f"against {options['base_url']} with {options['concurrency']} threads"
+        )
+        result = self.run([model_config.id for model_config in model_configs], options)
+        self.report(result, model_configs)
+
+        if options['cleanup']:
+            ModelComparison.objects.filter(id__in=result['comparison_ids']).delete()
+            AIModelConfig.objects.filter(name__startswith=CONFIG_PREFIX).delete()
+            self.stdout.write("Removed benchmark configs and comparisons")
+
+    def provision_configs(self, providers, fake_url):
+        model_configs = []
+        for provider in providers:
+            model_config, _ = AIModelConfig.objects.update_or_create(
+                name=f"{CONFIG_PREFIX}{provider.lower()}",
+                defaults={
+                    'provider': provider,
+                    'model_name': f"fake-{provider.lower()}",
+                    'api_key': 'fake-key',
+                    'base_url': fake_url if provider == 'OLLAMA' else f"{fake_url}/v1",
+                    'is_active': True,
+                    'cache_ttl': 0,
+                }
+            )
+            model_configs.append(model_config)
+        return model_configs
+
+    def run(self, model_ids, options):
+        base_url = options['base_url'].rstrip('/')
+        latencies = []
+        failures = defaultdict(int)
+        comparison_ids = []
+        lock = threading.Lock()
+        local = threading.local()
+
+        def compare(index):
+            if not hasattr(local, 'session'):
+                local.session = requests.Session()
+            session = local.session
+            start = time.perf_counter()
+            try:
+                response = session.post(f"{base_url}/api/ai/comparisons/compare_models/", json={
+                    'prompt': f"Benchmark prompt {index}: summarize the benefits of load testing.",
+                    'model_ids': model_ids,
+                    'mode': options['mode'],
+                    'stream': options['stream'],
+                    'cache': options['cache'],
+                }, timeout=30)
+                response.raise_for_status()
+                created = response.json()
+                with lock:
+                    comparison_ids.append(created['comparison_id'])
+                state = self.wait_for(session, base_url, created['task_ids'], options['wait'])
+            except (requests.RequestException, ValueError, KeyError):
+                state = 'REQUEST_ERROR'
+            latency = time.perf_counter() - start
+            with lock:
+                if state == 'SUCCESS':
+                    latencies.append(latency)
+                else:
+                    failures[state] += 1
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            list(pool.map(compare, range(options['comparisons'])))
+        elapsed = time.perf_counter() - started
+
+        return {'latencies': latencies, 'failures': dict(failures), 'comparison_ids': comparison_ids, 'elapsed': elapsed}
+
+    def wait_for(self, session, base_url, task_ids, wait):
+        """Long-poll until every task has finished; returns the aggregate state."""
+        deadline = time.monotonic() + wait
+        version = None
+        while time.monotonic() < deadline:
+            response = session.get(f"{base_url}/api/ai/tasks/poll/", params={
+                'ids': ','.join(task_ids),
+                'version': version or '',
+                'timeout': max(min(deadline - time.monotonic(), 30), 0),
+            }, timeout=wait + 5)
+            response.raise_for_status()
+            data = response.json()
+            if data['status'] in DONE_STATES:
+                return data['status']
+            version = data['version']
+        return 'TIMEOUT'
+
+    def report(self, result, model_configs):
+        elapsed = result['elapsed'] or 1e-9
+        completed = summarize_latencies(result['latencies'])
+        failed = sum(result['failures'].values())
+        breakdown = f" {result['failures']}" if failed else ""
+        self.stdout.write(
+            f"Comparisons: {completed['count']} completed, {failed} failed{breakdown} "
+            f"in {elapsed:.2f}s ({completed['count'] / elapsed:.2f}/s)"
+        )
+        self.stdout.write(
+            f"End to end: p50 {completed['p50'] * 1000:.0f} ms, p95 {completed['p95'] * 1000:.0f} ms, "
+            f"p99 {completed['p99'] * 1000:.0f} ms, max {completed['max'] * 1000:.0f} ms"
+        )
+
+        header = f"{'model':<22}{'count':>7}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'tok/s':>9}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        responses = ModelResponse.objects.filter(comparison_id__in=result['comparison_ids'])
+        total_tokens = 0
+        for model_config in model_configs:
+            rows = list(responses.filter(model_config=model_config).values_list('latency', 'completion_tokens', 'tokens_per_second'))
+            succeeded = [row for row in rows if row[1] is not None]
+            stats = summarize_latencies([row[0] for row in succeeded])
+            rates = [row[2] for row in succeeded if row[2]]
+            total_tokens += sum(row[1] for row in succeeded)
+            self.stdout.write(
+                f"{model_config.name:<22}{len(rows):>7}{len(rows) - len(succeeded):>8}"
+                f"{stats['p50'] * 1000:>9.0f}{stats['p95'] * 1000:>9.0f}{stats['p99'] * 1000:>9.0f}"
+                f"{(sum(rates) / len(rates) if rates else 0):>9.1f}"
+            )
+        self.stdout.write('-' * len(header))
+        self.stdout.write(f"Throughput: {total_tokens / elapsed:.1f} completion tokens/s")
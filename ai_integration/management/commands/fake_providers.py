@@ -0,0 +1,62 @@
+# ai_integration/management/commands/fake_providers.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ai_integration.fake_provider import FakeProfile, FakeProviderConfig, FakeProviderServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve fake OpenAI (/v1/chat/completions), DeepSeek (same format), Anthropic "
+        "(/v1/messages) and Ollama (/api/generate) endpoints with simulated latency, "
+        "token rates, streaming and injected errors. Point AIModelConfig.base_url at "
+        "http://HOST:PORT/v1 (or http://HOST:PORT for Ollama)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--first-token-ms', default=FakeProfile.first_token_ms,
+                            help="Time to first token distribution, e.g. fixed:100, uniform:50:300, "
+                                 "normal:200:50, lognormal:200:0.4 (median, sigma)")
+        parser.add_argument('--tokens-per-second', type=float, default=FakeProfile.tokens_per_second)
+        parser.add_argument('--completion-tokens', default=FakeProfile.completion_tokens,
+                            help="Completion length distribution in tokens")
+        parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests that fail")
+        parser.add_argument('--error-status', type=int, default=500, help="HTTP status of injected failures")
+        parser.add_argument('--config', help='JSON file with {"default": {...}, "models": {"name": {...}}} '
+                                             'profiles overriding the options above per model name')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--verbose-requests', action='store_true', help="Log every request")
+
+    def handle(self, *args, **options):
+        data = {'default': {
+            'first_token_ms': options['first_token_ms'],
+            'tokens_per_second': options['tokens_per_second'],
+            'completion_tokens': options['completion_tokens'],
+            'error_rate': options['error_rate'],
+            'error_status': options['error_status'],
+        }}
+        if options['config']:
+            try:
+                with open(options['config']) as f:
+                    overrides = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read {options['config']}: {e}")
+            data['default'].update(overrides.get('default', {}))
+            data['models'] = overrides.get('models', {})
+
+        try:
+            config = FakeProviderConfig.from_dict(data, seed=options['seed'])
+        except (TypeError, ValueError) as e:
+            raise CommandError(str(e))
+
+        server = FakeProviderServer((options['host'], options['port']), config, verbose=options['verbose_requests'])
+        self.stdout.write(f"Fake providers listening on {server.url} (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
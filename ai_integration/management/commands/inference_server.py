@@ -0,0 +1,71 @@
+# ai_integration/management/commands/inference_server.py
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ai_integration.inference_backends import BACKENDS, DEFAULT_BACKEND
+from ai_integration.inference_server import InferenceClient, InferenceServer, InferenceUnavailable
+from ai_integration.model_pool import ModelPool
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the per-host inference server: one process that owns the Hugging Face "
+        "models and serves every Celery worker on the host over a Unix socket, "
+        "batching concurrent requests. Start workers with HF_INFERENCE_SOCKET set to "
+        "the same path; they fall back to in-process inference while it's down."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', default=settings.HF_INFERENCE_SOCKET or '/tmp/innoflow-inference.sock')
+        parser.add_argument('--max-batch-size', type=int, default=settings.HF_INFERENCE_MAX_BATCH_SIZE)
+        parser.add_argument('--max-wait-ms', type=float, default=settings.HF_INFERENCE_MAX_WAIT_MS)
+        parser.add_argument('--memory-mb', type=int, default=settings.HF_MODEL_POOL_MEMORY_MB,
+                            help="Memory budget for loaded models")
+        parser.add_argument('--warmup', default='',
+                            help="Comma-separated task:model[:backend] entries to load at startup, "
+                                 "e.g. summarization:facebook/bart-large-cnn:int8,text-generation:gpt2")
+        parser.add_argument('--status', action='store_true', help="Print the running server's models and batch stats")
+
+    def handle(self, *args, **options):
+        path = options['socket']
+        if options['status']:
+            try:
+                self.stdout.write(json.dumps(InferenceClient(path).ping(), indent=2))
+            except InferenceUnavailable as e:
+                raise CommandError(str(e))
+            return
+
+        warmup = []
+        for pair in filter(None, (item.strip() for item in options['warmup'].split(','))):
+            task, _, model = pair.partition(':')
+            model, _, backend = model.partition(':')
+            if not model:
+                raise CommandError(f"--warmup entries must be task:model[:backend], got {pair}")
+            if backend and backend not in BACKENDS:
+                raise CommandError(f"Unknown inference backend in --warmup: {backend}")
+            warmup.append((task, model, backend or DEFAULT_BACKEND))
+
+        if os.path.exists(path):
+            try:
+                InferenceClient(path).ping()
+            except InferenceUnavailable:
+                os.unlink(path)  # Left behind by a server that didn't shut down cleanly
+            else:
+                raise CommandError(f"An inference server is already listening on {path}")
+
+        pool = ModelPool(options['memory_mb'] * 2**20)
+        for task, model, backend in warmup:
+            entry = pool.get(task, model, backend)
+            self.stdout.write(f"Loaded {task} model {model} ({backend}) in {entry.load_time:.1f}s")
+
+        server = InferenceServer(path, pool, options['max_batch_size'], options['max_wait_ms'] / 1000)
+        self.stdout.write(f"Inference server listening on {path} (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,115 @@
+# ai_integration/management/commands/models.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ai_integration import model_artifacts
+
+
+def _mib(size):
+    return f"{size / 2**20:.0f} MiB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Manage the local Hugging Face model artifact cache. `prefetch` stages the "
+        "models referenced by AIModelConfig rows and workflow nodes (or the ones "
+        "named), `list` shows what is cached with its last load time and `evict` "
+        "removes models from the cache."
+    )
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest='action', required=True)
+
+        prefetch = subparsers.add_parser('prefetch', help="Download model artifacts into the local cache")
+        prefetch.add_argument('models', nargs='*', help="Models to stage; defaults to every referenced model")
+        prefetch.add_argument('--task', default='text-generation', help="Pipeline task of the named models")
+        prefetch.add_argument('--load', action='store_true', help="Load each model after staging and report load time")
+
+        subparsers.add_parser('list', help="Show cached models")
+
+        evict = subparsers.add_parser('evict', help="Remove models from the local cache")
+        evict.add_argument('models', nargs='*')
+        evict.add_argument('--unreferenced', action='store_true',
+                           help="Evict every cached model no AIModelConfig or workflow node uses")
+
+    def handle(self, *args, **options):
+        getattr(self, f"handle_{options['action']}")(options)
+
+    def handle_prefetch(self, options):
+        if options['models']:
+            models = [(options['task'], model_name) for model_name in options['models']]
+        else:
+            models = model_artifacts.referenced_models()
+            if not models:
+                self.stdout.write("No Hugging Face models are referenced")
+                return
+
+        failed = 0
+        for task, model_name in models:
+            try:
+                staged = model_artifacts.prefetch(model_name)
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"{model_name}: prefetch failed: {e}")
+                continue
+            weights = 'safetensors' if staged['safetensors'] else 'pickled weights'
+            self.stdout.write(
+                f"{model_name} ({task}): {_mib(staged['size'])} {weights} staged in {staged['seconds']:.1f}s"
+            )
+            if options['load']:
+                try:
+                    seconds = self.load_model(task, model_name)
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"{model_name}: load failed: {e}")
+                    continue
+                self.stdout.write(f"{model_name} ({task}): loaded in {seconds:.2f}s")
+        if failed:
+            raise CommandError(f"{failed} of {len(models)} models failed")
+
+    def load_model(self, task, model_name):
+        start = time.perf_counter()
+        if task == model_artifacts.SENTENCE_TRANSFORMERS:
+            from workflows.embeddings import get_sentence_transformer
+
+            get_sentence_transformer(model_name)
+        else:
+            from ai_integration.model_pool import load_pipeline
+
+            load_pipeline(task, model_name)
+        return time.perf_counter() - start
+
+    def handle_list(self, options):
+        models = model_artifacts.cached_models()
+        if not models:
+            self.stdout.write("The model cache is empty")
+            return
+        referenced = {model_name for _, model_name in model_artifacts.referenced_models()}
+        header = f"{'model':<45}{'size':>10}{'weights':>13}{'used':>6}  last load"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for model in models:
+            load_times = ", ".join(f"{task} {seconds:.2f}s" for task, seconds in sorted(model['load_times'].items()))
+            self.stdout.write(
+                f"{model['model']:<45}{_mib(model['size']):>10}"
+                f"{'safetensors' if model['safetensors'] else 'pickle':>13}"
+                f"{'yes' if model['model'] in referenced else 'no':>6}  {load_times or '-'}"
+            )
+        self.stdout.write('-' * len(header))
+        self.stdout.write(f"Total: {_mib(sum(model['size'] for model in models))}")
+
+    def handle_evict(self, options):
+        model_names = set(options['models'])
+        if options['unreferenced']:
+            referenced = {model_name for _, model_name in model_artifacts.referenced_models()}
+            model_names |= {model['model'] for model in model_artifacts.cached_models()} - referenced
+        if not model_names:
+            raise CommandError("Name models to evict or pass --unreferenced")
+
+        freed = model_artifacts.evict(model_names)
+        for model_name in sorted(model_names):
+            if model_name in freed:
+                self.stdout.write(f"Evicted {model_name} ({_mib(freed[model_name])})")
+            else:
+                self.stdout.write(f"{model_name} is not cached")
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-19 11:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_integration', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modelresponse',
+            name='completion_tokens',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='modelresponse',
+            name='streamed',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='modelresponse',
+            name='time_to_first_token',
+            field=models.FloatField(blank=True, help_text='Seconds until the first streamed token', null=True),
+        ),
+        migrations.AddField(
+            model_name='modelresponse',
+            name='tokens_per_second',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
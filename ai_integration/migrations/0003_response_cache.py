@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-19 11:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_integration', '0002_modelresponse_streaming_metrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aimodelconfig',
+            name='cache_ttl',
+            field=models.PositiveIntegerField(blank=True, help_text='Response cache TTL in seconds (empty = AI_CACHE_DEFAULT_TTL, 0 = never cache)', null=True),
+        ),
+        migrations.AddField(
+            model_name='modelresponse',
+            name='cached',
+            field=models.BooleanField(default=False, help_text='Served from the response cache'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-19 11:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_integration', '0003_response_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComparisonMatrix',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('total_prompts', models.PositiveIntegerField(default=0)),
+                ('completed_prompts', models.PositiveIntegerField(default=0)),
+                ('task_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('model_configs', models.ManyToManyField(related_name='matrices', to='ai_integration.aimodelconfig')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='modelcomparison',
+            name='matrix',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='comparisons', to='ai_integration.comparisonmatrix'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 11:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_integration', '0004_comparison_matrix'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modelcomparison',
+            name='task_ids',
+            field=models.JSONField(blank=True, default=list, help_text="Celery tasks producing this comparison's responses"),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.6 on 2026-10-19 11:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_integration', '0005_modelcomparison_task_ids'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aimodelconfig',
+            name='completion_cost_per_1k',
+            field=models.DecimalField(blank=True, decimal_places=6, help_text='USD per 1K completion tokens', max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='aimodelconfig',
+            name='prompt_cost_per_1k',
+            field=models.DecimalField(blank=True, decimal_places=6, help_text='USD per 1K prompt tokens', max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='modelcomparison',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='model_comparisons', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='modelresponse',
+            name='cost',
+            field=models.DecimalField(blank=True, decimal_places=6, help_text='Estimated USD cost', max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='modelresponse',
+            name='prompt_tokens',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
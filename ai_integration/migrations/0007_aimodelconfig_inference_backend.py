@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 11:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_integration', '0006_usage_accounting'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aimodelconfig',
+            name='inference_backend',
+            field=models.CharField(choices=[('eager', 'PyTorch fp32'), ('int8', 'PyTorch dynamic int8'), ('onnx', 'ONNX Runtime')], default='eager', help_text='CPU inference backend for Hugging Face models', max_length=10),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_integration', '0007_aimodelconfig_inference_backend'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modelresponse',
+            name='coalesced',
+            field=models.BooleanField(default=False, help_text='Shared the provider call of an identical in-flight request'),
+        ),
+    ]
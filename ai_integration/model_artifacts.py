@@ -0,0 +1,200 @@
+"""
+Local cache of Hugging Face model artifacts. Models referenced by
+AIModelConfig rows and workflow nodes are staged ahead of time (see
+`manage.py models`), preferring safetensors weights, and loaded from the
+local snapshot so a cold worker neither touches the network nor
+deserializes pickled checkpoints: safetensors files are memory-mapped and
+low_cpu_mem_usage skips the random weight initialization.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Config, tokenizer and safetensors weights; pickled .bin weights are only
+# fetched for repositories without safetensors
+ARTIFACT_PATTERNS = [
+    '*.json', '*.txt', '*.model', '*.safetensors', 'tokenizer*', 'vocab*', 'merges*', 'spiece*',
+    '1_Pooling/*', '2_Normalize/*',
+]
+LEGACY_WEIGHT_PATTERNS = ['pytorch_model*.bin']
+LOAD_TIMES_FILE = 'innoflow-load-times.json'
+
+# Task name used for sentence-transformers embedding models
+SENTENCE_TRANSFORMERS = 'sentence-transformers'
+
+_load_times_lock = threading.Lock()
+
+
+def cache_dir() -> Optional[str]:
+    """HF_MODEL_CACHE_DIR, or None for the Hugging Face default cache."""
+    return settings.HF_MODEL_CACHE_DIR or None
+
+
+def cache_root() -> str:
+    if settings.HF_MODEL_CACHE_DIR:
+        return settings.HF_MODEL_CACHE_DIR
+    from huggingface_hub import constants
+
+    return constants.HF_HUB_CACHE
+
+
+def referenced_models() -> List[Tuple[str, str]]:
+    """
+    Sorted (task, model) pairs for every locally run model: active Hugging
+    Face AIModelConfig rows, the summarization models nodes can be routed
+    to (or are pinned to) and sentence-transformers embedding nodes.
+    """
+    from .models import AIModelConfig
+    from workflows.models import Node
+    from workflows.routing import configured_models
+    from workflows.utils import _embedding_model_id
+
+    models = {
+        ('text-generation', model_name)
+        for model_name in AIModelConfig.objects.filter(provider='HUGGINGFACE', is_active=True)
+        .values_list('model_name', flat=True)
+    }
+    summarization_configs = list(Node.objects.filter(type='huggingface_summarization').values_list('config', flat=True))
+    if summarization_configs:
+        models.update(('summarization', model.model) for model in configured_models())
+        models.update(('summarization', config['model']) for config in summarization_configs if (config or {}).get('model'))
+    for config in Node.objects.filter(type__in=['embedding', 'similarity_search']).values_list('config', flat=True):
+        backend, model_name = _embedding_model_id(config or {})
+        if backend == 'sentence_transformers':
+            models.add((SENTENCE_TRANSFORMERS, model_name))
+    return sorted(models)
+
+
+def prefetch(model_name: str) -> dict:
+    """
+    Stage a model's artifacts in the local cache, returning its snapshot
+    path, size on disk, whether it has safetensors weights and the time taken.
+    """
+    from huggingface_hub import snapshot_download
+
+    start = time.perf_counter()
+    path = snapshot_download(model_name, cache_dir=cache_dir(), allow_patterns=ARTIFACT_PATTERNS)
+    safetensors = _has_safetensors(path)
+    if not safetensors:
+        logger.warning(f"{model_name} has no safetensors weights, fetching pickled checkpoint")
+        path = snapshot_download(model_name, cache_dir=cache_dir(),
+                                 allow_patterns=ARTIFACT_PATTERNS + LEGACY_WEIGHT_PATTERNS)
+    return {
+        'model': model_name,
+        'path': path,
+        'size': _directory_size(path),
+        'safetensors': safetensors,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def _has_safetensors(path: str) -> bool:
+    return any(name.endswith('.safetensors') for _, _, names in os.walk(path) for name in names)
+
+
+def _directory_size(path: str) -> int:
+    # Snapshot entries are symlinks into the blob store
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+    )
+
+
+def resolve(model_name: str) -> str:
+    """
+    Local snapshot directory of a staged model, or the model name itself
+    (downloaded on load as before) if it isn't staged.
+    """
+    if os.path.isdir(model_name):
+        return model_name
+    try:
+        from huggingface_hub import snapshot_download
+
+        return snapshot_download(model_name, cache_dir=cache_dir(), local_files_only=True)
+    except Exception:
+        return model_name
+
+
+def load_kwargs() -> dict:
+    """from_pretrained keyword arguments for fast loading."""
+    return {'low_cpu_mem_usage': True}
+
+
+def cached_models() -> List[dict]:
+    """Models in the local cache with their size and last recorded load times."""
+    from huggingface_hub import scan_cache_dir
+
+    load_times = read_load_times()
+    models = []
+    for repo in scan_cache_dir(cache_dir()).repos:
+        if repo.repo_type != 'model':
+            continue
+        files = {file.file_name for revision in repo.revisions for file in revision.files}
+        models.append({
+            'model': repo.repo_id,
+            'size': repo.size_on_disk,
+            'files': repo.nb_files,
+            'safetensors': any(name.endswith('.safetensors') for name in files),
+            'last_accessed': repo.last_accessed,
+            'load_times': {
+                task: seconds for (task, model_name), seconds in load_times.items() if model_name == repo.repo_id
+            },
+        })
+    return sorted(models, key=lambda model: model['model'])
+
+
+def evict(model_names) -> dict:
+    """Delete cached models; returns {model: bytes freed} for those found."""
+    from huggingface_hub import scan_cache_dir
+
+    cache = scan_cache_dir(cache_dir())
+    freed = {}
+    revisions = []
+    for repo in cache.repos:
+        if repo.repo_type == 'model' and repo.repo_id in model_names:
+            freed[repo.repo_id] = repo.size_on_disk
+            revisions.extend(revision.commit_hash for revision in repo.revisions)
+    if revisions:
+        cache.delete_revisions(*revisions).execute()
+    return freed
+
+
+def _load_times_path() -> str:
+    return os.path.join(cache_root(), LOAD_TIMES_FILE)
+
+
+def read_load_times() -> dict:
+    """{(task, model): seconds} of the most recent load of each model."""
+    try:
+        with open(_load_times_path()) as f:
+            entries = json.load(f)
+    except (OSError, ValueError, ImportError):
+        return {}
+    return {(entry['task'], entry['model']): entry['seconds'] for entry in entries}
+
+
+def record_load_time(task: str, model_name: str, seconds: float):
+    """Remember how long a model took to load, for `manage.py models list`."""
+    try:
+        with _load_times_lock:
+            load_times = read_load_times()
+            load_times[(task, model_name)] = round(seconds, 3)
+            path = _load_times_path()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so concurrent workers never read a partial file
+            with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(path), delete=False) as f:
+                json.dump([
+                    {'task': entry_task, 'model': entry_model, 'seconds': entry_seconds}
+                    for (entry_task, entry_model), entry_seconds in sorted(load_times.items())
+                ], f)
+            os.replace(f.name, path)
+    except (OSError, ImportError) as e:
+        logger.debug(f"Could not record load time for {model_name}: {e}")
@@ -0,0 +1,144 @@
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Iterable, Optional
+
+from django.conf import settings
+
+from .inference_backends import DEFAULT_BACKEND, load_onnx_pipeline, quantize_int8, validate_backend
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_pipeline_bytes(pipe) -> int:
+    """Approximate resident size of a transformers pipeline from its weights."""
+    model = getattr(pipe, 'model', None)
+    if model is None:
+        return 0
+    if not hasattr(model, 'parameters'):
+        # ONNX Runtime models: size of the exported graph and weights
+        model_dir = getattr(model, 'model_save_dir', None)
+        if model_dir is None:
+            return 0
+        return sum(path.stat().st_size for path in Path(model_dir).rglob('*.onnx*'))
+    size = sum(param.numel() * param.element_size() for param in model.parameters())
+    if hasattr(model, 'buffers'):
+        size += sum(buffer.numel() * buffer.element_size() for buffer in model.buffers())
+    return size
+
+
+def load_pipeline(task: str, model_name: str, backend: str = DEFAULT_BACKEND):
+    """
+    Load a transformers pipeline on the given inference backend, from the
+    local artifact cache when the model has been staged with
+    `manage.py models prefetch`.
+    """
+    from .model_artifacts import load_kwargs, record_load_time, resolve
+
+    validate_backend(backend)
+    start = perf_counter()
+    if backend == 'onnx':
+        pipe = load_onnx_pipeline(task, model_name)
+    else:
+        from transformers import pipeline
+
+        pipe = pipeline(task, model=resolve(model_name), model_kwargs=load_kwargs())
+        if backend == 'int8':
+            pipe = quantize_int8(pipe)
+    record_load_time(task if backend == DEFAULT_BACKEND else f"{task}:{backend}", model_name, perf_counter() - start)
+    return pipe
+
+
+class PooledModel:
+    def __init__(self, pipe, size: int, load_time: float):
+        self.pipe = pipe
+        self.size = size
+        self.load_time = load_time
+        # Pipelines aren't guaranteed thread-safe; serialize inference per model
+        self.lock = threading.Lock()
+
+
+class ModelPool:
+    """
+    Per-process pool of loaded transformers pipelines keyed by (task, model,
+    backend), evicting least recently used models to stay under a memory
+    budget. Concurrent requests for a model that is still loading wait for
+    that load instead of loading it again.
+    """
+
+    def __init__(self, memory_budget: int, loader: Callable = load_pipeline, sizer: Callable = estimate_pipeline_bytes):
+        self.memory_budget = memory_budget
+        self.loader = loader
+        self.sizer = sizer
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    @property
+    def used_bytes(self) -> int:
+        return sum(entry.size for entry in self._models.values())
+
+    def get(self, task: str, model_name: str, backend: str = DEFAULT_BACKEND) -> PooledModel:
+        key = (task, model_name, backend)
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models.move_to_end(key)
+                return entry
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                entry = self._models.get(key)
+                if entry is not None:
+                    self._models.move_to_end(key)
+                    return entry
+
+            start = perf_counter()
+            pipe = self.loader(task, model_name, backend)
+            entry = PooledModel(pipe, self.sizer(pipe), perf_counter() - start)
+            logger.info(
+                f"Loaded {task} model {model_name} ({backend}) in {entry.load_time:.2f}s "
+                f"({entry.size / 2**20:.0f} MiB)"
+            )
+
+            with self._lock:
+                self._models[key] = entry
+                self._evict(keep=key)
+                self._loading.pop(key, None)
+            return entry
+
+    def _evict(self, keep):
+        while self.used_bytes > self.memory_budget and len(self._models) > 1:
+            key, entry = next(iter(self._models.items()))
+            if key == keep:
+                break
+            del self._models[key]
+            logger.info(f"Evicted {key[0]} model {key[1]} ({key[2]}, {entry.size / 2**20:.0f} MiB) from model pool")
+
+    def evict(self, task: str, model_name: str, backend: str = DEFAULT_BACKEND) -> bool:
+        with self._lock:
+            return self._models.pop((task, model_name, backend), None) is not None
+
+    def loaded(self) -> list:
+        with self._lock:
+            return [
+                {'task': task, 'model': model, 'backend': backend, 'size': entry.size, 'load_time': entry.load_time}
+                for (task, model, backend), entry in self._models.items()
+            ]
+
+    def warmup(self, model_names: Iterable[str], task: str = 'text-generation', prompt: Optional[str] = 'Hello'):
+        """Load models ahead of the first task and run one tiny inference."""
+        for model_name in model_names:
+            try:
+                entry = self.get(task, model_name)
+                if prompt:
+                    with entry.lock:
+                        entry.pipe(prompt, max_new_tokens=1)
+            except Exception as e:
+                logger.error(f"Warmup of {task} model {model_name} failed: {e}")
+
+
+model_pool = ModelPool(settings.HF_MODEL_POOL_MEMORY_MB * 2**20)
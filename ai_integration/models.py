@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 from django.core.exceptions import ValidationError
 
@@ -9,6 +10,11 @@ class AIModelConfig(models.Model):
         ('OLLAMA', 'Ollama'),
         ('HUGGINGFACE', 'Hugging Face'),
     ]
+    INFERENCE_BACKEND_CHOICES = [
+        ('eager', 'PyTorch fp32'),
+        ('int8', 'PyTorch dynamic int8'),
+        ('onnx', 'ONNX Runtime'),
+    ]
     
     name = models.CharField(max_length=100)
     provider = models.CharField(max_length=20, choices=MODEL_CHOICES)
@@ -16,6 +22,20 @@ class AIModelConfig(models.Model):
     is_active = models.BooleanField(default=True)
     api_key = models.CharField(max_length=255, blank=True, null=True)
     base_url = models.CharField(max_length=255, blank=True, null=True)
+    cache_ttl = models.PositiveIntegerField(
+        null=True, blank=True,
+        help_text="Response cache TTL in seconds (empty = AI_CACHE_DEFAULT_TTL, 0 = never cache)"
+    )
+    prompt_cost_per_1k = models.DecimalField(
+        max_digits=10, decimal_places=6, null=True, blank=True, help_text="USD per 1K prompt tokens"
+    )
+    completion_cost_per_1k = models.DecimalField(
+        max_digits=10, decimal_places=6, null=True, blank=True, help_text="USD per 1K completion tokens"
+    )
+    inference_backend = models.CharField(
+        max_length=10, choices=INFERENCE_BACKEND_CHOICES, default='eager',
+        help_text="CPU inference backend for Hugging Face models"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -30,8 +50,34 @@ class AIModelConfig(models.Model):
         if self.provider in ['OPENAI', 'ANTHROPIC', 'DEEPSEEK'] and not self.api_key:
             raise ValidationError(f"API key is required for {self.get_provider_display()} models")
 
+class ComparisonMatrix(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    model_configs = models.ManyToManyField(AIModelConfig, related_name='matrices')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    total_prompts = models.PositiveIntegerField(default=0)
+    completed_prompts = models.PositiveIntegerField(default=0)
+    task_id = models.CharField(max_length=255, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"Matrix {self.id}: {self.total_prompts} prompts"
+
 class ModelComparison(models.Model):
     prompt = models.TextField()
+    matrix = models.ForeignKey(
+        ComparisonMatrix, on_delete=models.CASCADE, related_name='comparisons', null=True, blank=True
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='model_comparisons'
+    )
+    task_ids = models.JSONField(default=list, blank=True, help_text="Celery tasks producing this comparison's responses")
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
@@ -42,6 +88,14 @@ class ModelResponse(models.Model):
     model_config = models.ForeignKey(AIModelConfig, on_delete=models.CASCADE)
     response = models.TextField()
     latency = models.FloatField(help_text="Response time in seconds")
+    time_to_first_token = models.FloatField(null=True, blank=True, help_text="Seconds until the first streamed token")
+    prompt_tokens = models.IntegerField(null=True, blank=True)
+    completion_tokens = models.IntegerField(null=True, blank=True)
+    tokens_per_second = models.FloatField(null=True, blank=True)
+    streamed = models.BooleanField(default=False)
+    cached = models.BooleanField(default=False, help_text="Served from the response cache")
+    coalesced = models.BooleanField(default=False, help_text="Shared the provider call of an identical in-flight request")
+    cost = models.DecimalField(max_digits=12, decimal_places=6, null=True, blank=True, help_text="Estimated USD cost")
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -0,0 +1,234 @@
+"""
+Reuse of attention key/value state for prompt prefixes shared across Hugging
+Face text generation calls (system prompts, instructions, few-shot examples).
+Prompts are tokenized and their prefixes hashed at block boundaries; once a
+prefix has been seen HF_PREFIX_CACHE_MIN_USES times its past key/values are
+kept in a per-process LRU bounded by memory, and later prompts starting with
+it only prefill the remaining tokens.
+"""
+import copy
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+
+from .clients import get_redis
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = 'ai:prefix-cache:stats'
+# Prefix hashes whose use counts are tracked for admission
+MAX_TRACKED_PREFIXES = 4096
+
+# Monotonic time until which shared stats aren't written after Redis failed
+_unavailable_until = 0.0
+
+
+def cache_bytes(past_key_values) -> int:
+    """Memory held by a transformers Cache or legacy tuple of tensors."""
+    if hasattr(past_key_values, 'key_cache'):
+        tensors = list(past_key_values.key_cache) + list(past_key_values.value_cache)
+    else:
+        tensors = [tensor for layer in past_key_values for tensor in layer]
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+class PrefixCache:
+    def __init__(self, memory_budget: int, block_size: int, min_uses: int, sizer=cache_bytes):
+        self.memory_budget = memory_budget
+        self.block_size = block_size
+        self.min_uses = min_uses
+        self.sizer = sizer
+        self._entries = OrderedDict()  # key -> (past_key_values, size)
+        self._uses = OrderedDict()  # key -> times the prefix was seen
+        self._lock = threading.Lock()
+        self.used_bytes = 0
+        self.counters = {'hits': 0, 'misses': 0, 'prompt_tokens': 0, 'reused_tokens': 0, 'stored': 0, 'evicted': 0}
+
+    def _boundaries(self, token_ids: List[int]) -> List[int]:
+        """Block-aligned prefix lengths, longest first, leaving at least one token to prefill."""
+        return list(range((len(token_ids) - 1) // self.block_size * self.block_size, 0, -self.block_size))
+
+    @staticmethod
+    def _key(model_key: str, token_ids: List[int], length: int) -> str:
+        digest = hashlib.sha1(model_key.encode('utf-8'))
+        digest.update(b','.join(str(token).encode() for token in token_ids[:length]))
+        return digest.hexdigest()
+
+    def lookup(self, model_key: str, token_ids: List[int]) -> Tuple[int, Optional[object]]:
+        """
+        Longest cached prefix of token_ids as (length, private copy of its
+        past key/values), or (0, None). Generation extends the cache in
+        place, hence the copy.
+        """
+        with self._lock:
+            for length in self._boundaries(token_ids):
+                key = self._key(model_key, token_ids, length)
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    past_key_values = entry[0]
+                    break
+            else:
+                return 0, None
+        return length, copy.deepcopy(past_key_values)
+
+    def admit(self, model_key: str, token_ids: List[int]) -> int:
+        """
+        Count a use of each prefix of token_ids and return the longest prefix
+        length now used often enough to cache, or 0.
+        """
+        admitted = 0
+        with self._lock:
+            for length in self._boundaries(token_ids):
+                key = self._key(model_key, token_ids, length)
+                uses = self._uses.pop(key, 0) + 1
+                self._uses[key] = uses
+                if uses >= self.min_uses and not admitted:
+                    admitted = length
+            while len(self._uses) > MAX_TRACKED_PREFIXES:
+                self._uses.popitem(last=False)
+        return admitted
+
+    def store(self, model_key: str, token_ids: List[int], length: int, past_key_values):
+        size = self.sizer(past_key_values)
+        if size > self.memory_budget:
+            return
+        key = self._key(model_key, token_ids, length)
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = (copy.deepcopy(past_key_values), size)
+            self.used_bytes += size
+            evicted = 0
+            while self.used_bytes > self.memory_budget:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.used_bytes -= evicted_size
+                evicted += 1
+        self.count(model_key, stored=1, evicted=evicted)
+
+    def count(self, model_key: str, **amounts):
+        """
+        Add to the process counters and the shared ones in Redis. After a
+        Redis error only the process counters are kept for
+        HF_PREFIX_CACHE_RETRY_INTERVAL seconds, so generation doesn't wait
+        on an unreachable server.
+        """
+        global _unavailable_until
+        amounts = {name: amount for name, amount in amounts.items() if amount}
+        if not amounts:
+            return
+        with self._lock:
+            for name, amount in amounts.items():
+                self.counters[name] += amount
+        if time.monotonic() < _unavailable_until:
+            return
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for name, amount in amounts.items():
+                pipe.hincrby(STATS_KEY, f"{model_key}|{name}", amount)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Shared prefix cache stats unavailable for {settings.HF_PREFIX_CACHE_RETRY_INTERVAL}s: {e}")
+            _unavailable_until = time.monotonic() + settings.HF_PREFIX_CACHE_RETRY_INTERVAL
+
+    @staticmethod
+    def _with_rates(counters: dict) -> dict:
+        lookups = counters.get('hits', 0) + counters.get('misses', 0)
+        prompt_tokens = counters.get('prompt_tokens', 0)
+        return {
+            **counters,
+            'hit_rate': counters.get('hits', 0) / lookups if lookups else None,
+            'token_reuse_rate': counters.get('reused_tokens', 0) / prompt_tokens if prompt_tokens else None,
+        }
+
+    def stats(self) -> dict:
+        """Hit rates for this process and, per model, across all workers."""
+        with self._lock:
+            stats = {
+                'process': {**self._with_rates(dict(self.counters)), 'entries': len(self._entries),
+                            'used_bytes': self.used_bytes},
+            }
+        try:
+            shared = {}
+            for field, value in get_redis().hgetall(STATS_KEY).items():
+                model_key, _, name = field.decode().rpartition('|')
+                shared.setdefault(model_key, {})[name] = int(value)
+            stats['shared'] = {model_key: self._with_rates(counters) for model_key, counters in shared.items()}
+        except Exception:
+            stats['shared'] = None
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._uses.clear()
+            self.used_bytes = 0
+
+
+prefix_cache = PrefixCache(
+    settings.HF_PREFIX_CACHE_MEMORY_MB * 2**20,
+    settings.HF_PREFIX_CACHE_BLOCK_TOKENS,
+    settings.HF_PREFIX_CACHE_MIN_USES,
+)
+
+
+def supports_prefix_cache(pipe) -> bool:
+    """PyTorch causal LMs (eager or int8); ONNX Runtime models keep their own state."""
+    if not settings.HF_PREFIX_CACHE_ENABLED:
+        return False
+    try:
+        import torch
+    except ImportError:
+        return False
+    return isinstance(getattr(pipe, 'model', None), torch.nn.Module)
+
+
+def generate_with_prefix_cache(pipe, model_key: str, prompt: str, options: dict, cache: PrefixCache = None) -> list:
+    """
+    Text generation equivalent to pipe(prompt, **options) that prefills
+    only the part of the prompt not covered by a cached prefix. Returns the
+    pipeline's output format: [{'generated_text': prompt + completion}].
+    """
+    import torch
+    from transformers import DynamicCache
+
+    cache = cache or prefix_cache
+    tokenizer, model = pipe.tokenizer, pipe.model
+    input_ids = tokenizer(prompt, return_tensors='pt')['input_ids']
+    token_ids = input_ids[0].tolist()
+
+    reused, past_key_values = cache.lookup(model_key, token_ids)
+    if past_key_values is None:
+        length = cache.admit(model_key, token_ids)
+        if length:
+            with torch.no_grad():
+                prefix = model(input_ids[:, :length], past_key_values=DynamicCache(), use_cache=True)
+            cache.store(model_key, token_ids, length, prefix.past_key_values)
+            past_key_values = prefix.past_key_values
+    cache.count(model_key, hits=1 if reused else 0, misses=0 if reused else 1,
+                prompt_tokens=len(token_ids), reused_tokens=reused)
+
+    # The pipeline's generation defaults (e.g. its max_new_tokens) differ from the model's
+    generation_config = getattr(pipe, 'generation_config', None) or model.generation_config
+    generation = {key: value for key, value in options.items() if key != 'num_return_sequences'}
+    if getattr(generation_config, 'pad_token_id', None) is None:
+        generation['pad_token_id'] = tokenizer.eos_token_id
+    with torch.no_grad():
+        output = model.generate(
+            input_ids, attention_mask=torch.ones_like(input_ids), past_key_values=past_key_values,
+            generation_config=generation_config, **generation
+        )
+    completion = tokenizer.decode(output[0][input_ids.shape[1]:], skip_special_tokens=True)
+    return [{'generated_text': prompt + completion}]
+
+
+def run_text_generation(pipe, model: str, backend: str, prompt: str, options: dict) -> list:
+    """pipe(prompt, **options), reusing cached prompt prefixes where the model allows."""
+    if supports_prefix_cache(pipe):
+        return generate_with_prefix_cache(pipe, f"{model}:{backend}", prompt, options)
+    return pipe(prompt, **options)
@@ -0,0 +1,230 @@
+import asyncio
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Callable, Dict, Optional
+import logging
+from .cache import request_fingerprint
+from .circuit_breaker import CircuitOpenError, call_with_breaker
+from .clients import get_client_for_config
+from .coalescing import single_flight
+from .utils import (
+    openai_utils,
+    claude_utils,
+    deepseek__utils as deepseek_utils,
+    ollama_utils,
+    huggingface_utils
+)
+
+logger = logging.getLogger(__name__)
+
+
+class UnsupportedProviderError(ValueError):
+    pass
+
+
+@dataclass
+class GenerationResult:
+    model_config: Any
+    response: str
+    latency: float
+    time_to_first_token: Optional[float] = None
+    completion_tokens: Optional[int] = None
+    prompt_tokens: Optional[int] = None
+    streamed: bool = False
+    error: bool = False
+    coalesced: bool = False  # Shared another request's provider call
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Decode rate, measured from the first token when streaming."""
+        if not self.completion_tokens:
+            return None
+        duration = self.latency - (self.time_to_first_token or 0)
+        if duration <= 0:
+            duration = self.latency
+        return self.completion_tokens / duration if duration > 0 else None
+
+
+async def _openai(model_config, prompt, usage):
+    return await openai_utils.openai_chat_completion(
+        get_client_for_config(model_config), prompt, model_config.model_name, usage=usage)
+
+async def _anthropic(model_config, prompt, usage):
+    return await claude_utils.claude_messages_completion(
+        get_client_for_config(model_config), prompt, model_config.model_name, usage=usage)
+
+async def _deepseek(model_config, prompt, usage):
+    return await deepseek_utils.deepseek_chat_completion(
+        get_client_for_config(model_config), prompt, model_config.model_name, usage=usage)
+
+async def _ollama(model_config, prompt, usage):
+    return await ollama_utils.ollama_generate(
+        get_client_for_config(model_config), prompt, model_config.model_name, usage=usage)
+
+async def _huggingface(model_config, prompt, usage):
+    # Local inference is CPU bound; keep it off the shared event loop
+    response = await asyncio.to_thread(
+        huggingface_utils.huggingface_text_completion, prompt, model_config.model_name, usage=usage,
+        backend=model_config.inference_backend)
+    if response is None:
+        raise RuntimeError("HuggingFace generation failed")
+    return response
+
+
+PROVIDERS = {
+    'OPENAI': _openai,
+    'ANTHROPIC': _anthropic,
+    'DEEPSEEK': _deepseek,
+    'OLLAMA': _ollama,
+    'HUGGINGFACE': _huggingface,
+}
+
+# Async generators yielding text chunks; filled usage dicts on completion
+STREAMING_PROVIDERS = {
+    'OPENAI': lambda config, prompt, usage: openai_utils.openai_chat_stream(
+        get_client_for_config(config), prompt, config.model_name, usage=usage),
+    'ANTHROPIC': lambda config, prompt, usage: claude_utils.claude_messages_stream(
+        get_client_for_config(config), prompt, config.model_name, usage=usage),
+    'DEEPSEEK': lambda config, prompt, usage: deepseek_utils.deepseek_chat_stream(
+        get_client_for_config(config), prompt, config.model_name, usage=usage),
+    'OLLAMA': lambda config, prompt, usage: ollama_utils.ollama_generate_stream(
+        get_client_for_config(config), prompt, config.model_name, usage=usage),
+}
+
+
+async def generate(model_config, prompt: str, usage: Optional[dict] = None) -> str:
+    """
+    Generate a completion for prompt with the provider configured by
+    model_config, using the pooled client for that configuration. When a
+    usage dict is given it is filled with the prompt_tokens and
+    completion_tokens the provider reports.
+    Raises on provider errors, or CircuitOpenError without calling the
+    provider while its circuit breaker is open.
+    """
+    handler = PROVIDERS.get(model_config.provider)
+    if handler is None:
+        raise UnsupportedProviderError(f"Unsupported model provider: {model_config.provider}")
+    usage = usage if usage is not None else {}
+    return await call_with_breaker(model_config, lambda: handler(model_config, prompt, usage))
+
+
+async def generate_coalesced(model_config, prompt: str, usage: Optional[dict] = None) -> str:
+    """
+    generate(), but identical concurrent requests across workers share a
+    single provider call (and its reported usage). Requests that got
+    another request's response have 'coalesced' set in usage, so the call
+    is only billed once.
+    """
+    called = False
+
+    async def call():
+        nonlocal called
+        called = True
+        reported = {}
+        response = await generate(model_config, prompt, reported)
+        return {'response': response, 'usage': reported}
+
+    shared = await single_flight(request_fingerprint(model_config, prompt), call)
+    if usage is not None:
+        usage.update(shared['usage'])
+        usage['coalesced'] = not called
+    return shared['response']
+
+
+async def generate_stream(model_config, prompt: str, on_chunk: Optional[Callable[[str], None]] = None) -> GenerationResult:
+    """
+    Generate a completion token by token, recording time to first token and
+    the completion token count. on_chunk receives the text produced so far
+    after every chunk. Providers without streaming support fall back to a
+    regular completion. Raises on provider errors.
+    """
+    stream = STREAMING_PROVIDERS.get(model_config.provider)
+    start = perf_counter()
+    if stream is None:
+        usage = {}
+        response = await generate(model_config, prompt, usage)
+        return GenerationResult(
+            model_config, response, perf_counter() - start,
+            completion_tokens=usage.get("completion_tokens"),
+            prompt_tokens=usage.get("prompt_tokens"),
+        )
+
+    usage = {}
+    text = ""
+    deltas = 0
+    time_to_first_token = None
+
+    async def consume():
+        nonlocal text, deltas, time_to_first_token
+        async for chunk in stream(model_config, prompt, usage):
+            if time_to_first_token is None:
+                time_to_first_token = perf_counter() - start
+            text += chunk
+            deltas += 1
+            if on_chunk is not None:
+                on_chunk(text)
+
+    await call_with_breaker(model_config, consume)
+    return GenerationResult(
+        model_config,
+        text,
+        perf_counter() - start,
+        time_to_first_token=time_to_first_token,
+        # Providers normally report usage; otherwise one delta ~ one token
+        completion_tokens=usage.get("completion_tokens", deltas),
+        prompt_tokens=usage.get("prompt_tokens"),
+        streamed=True,
+    )
+
+
+async def _timed(model_config, prompt: str, timeout: float, stream: bool = False) -> GenerationResult:
+    start = perf_counter()
+    usage = {}
+    try:
+        if stream:
+            return await asyncio.wait_for(generate_stream(model_config, prompt), timeout)
+        response = await asyncio.wait_for(generate_coalesced(model_config, prompt, usage), timeout)
+    except asyncio.TimeoutError:
+        response = f"Timed out after {timeout:g}s"
+    except (UnsupportedProviderError, CircuitOpenError) as e:
+        response = str(e)
+    except Exception as e:
+        logger.error(f"{model_config.get_provider_display()} error for model {model_config.model_name}: {e}")
+        response = "Error occurred while generating response"
+    else:
+        return GenerationResult(
+            model_config, response, perf_counter() - start,
+            completion_tokens=usage.get("completion_tokens"),
+            prompt_tokens=usage.get("prompt_tokens"),
+            coalesced=usage.get("coalesced", False),
+        )
+    return GenerationResult(model_config, response, perf_counter() - start, error=True)
+
+
+async def generate_many(model_configs, prompt: str, timeout: float, stream: bool = False):
+    """
+    Call every configured provider concurrently, each bounded by timeout
+    seconds, and return GenerationResults in input order. Failures and
+    timeouts become error responses rather than cancelling the other calls.
+    """
+    return await asyncio.gather(*(_timed(model_config, prompt, timeout, stream) for model_config in model_configs))
+
+
+async def generate_batch(calls, timeout: float, concurrency: Dict[str, int]):
+    """
+    generate_many() for arbitrary (model_config, prompt) pairs, running at
+    most concurrency[provider] calls per provider at a time (unlimited for
+    providers not listed). Results are returned in input order.
+    """
+    semaphores = {
+        provider: asyncio.Semaphore(limit) for provider, limit in concurrency.items() if limit
+    }
+
+    async def limited(model_config, prompt):
+        semaphore = semaphores.get(model_config.provider)
+        if semaphore is None:
+            return await _timed(model_config, prompt, timeout)
+        async with semaphore:
+            return await _timed(model_config, prompt, timeout)
+
+    return await asyncio.gather(*(limited(model_config, prompt) for model_config, prompt in calls))
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import math
+from time import perf_counter
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+from .circuit_breaker import SUPERSEDED
+from .models import ModelResponse
+from .providers import GenerationResult, generate_coalesced
+
+logger = logging.getLogger(__name__)
+
+
+class AllProvidersFailed(RuntimeError):
+    def __init__(self, errors: Dict[int, str]):
+        self.errors = errors
+        super().__init__("; ".join(f"model {model_id}: {error}" for model_id, error in errors.items()) or "No providers")
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    rank = max(math.ceil(pct / 100.0 * len(values)), 1)
+    return values[min(rank, len(values)) - 1]
+
+
+def observed_p95(model_config) -> Optional[float]:
+    """
+    p95 of recent uncached response latencies for a model config, or None
+    when there aren't enough samples to trust it.
+    """
+    latencies = list(
+        ModelResponse.objects.filter(model_config=model_config, cached=False)
+        .order_by('-created_at')
+        .values_list('latency', flat=True)[:settings.AI_HEDGE_SAMPLE_SIZE]
+    )
+    if len(latencies) < settings.AI_HEDGE_MIN_SAMPLES:
+        return None
+    return percentile(latencies, 95)
+
+
+def hedge_delays(model_configs, override: Optional[float] = None) -> Dict[int, float]:
+    """How long to wait on each config before hedging to the next one."""
+    if override is not None:
+        return {model_config.id: override for model_config in model_configs}
+    delays = {}
+    for model_config in model_configs:
+        p95 = observed_p95(model_config)
+        delays[model_config.id] = p95 if p95 is not None else settings.AI_HEDGE_DEFAULT_DELAY
+    return delays
+
+
+async def generate_hedged(model_configs, prompt: str, delays: Dict[int, float], timeout: float) -> GenerationResult:
+    """
+    Send prompt to model_configs[0] and, whenever the most recently started
+    request hasn't answered within its hedge delay (or a request fails),
+    also send it to the next config. The first successful answer wins and
+    the remaining requests are cancelled. Raises AllProvidersFailed if none
+    succeed before timeout.
+    """
+    loop = asyncio.get_running_loop()
+    start = perf_counter()
+    deadline = loop.time() + timeout
+    queue = list(model_configs)
+    pending = {}
+    errors = {}
+    usages = {}
+    next_launch = loop.time()
+    winner = None
+
+    try:
+        while queue or pending:
+            now = loop.time()
+            if now >= deadline:
+                break
+            if queue and (not pending or now >= next_launch):
+                model_config = queue.pop(0)
+                usages[model_config.id] = {}
+                task = asyncio.ensure_future(generate_coalesced(model_config, prompt, usages[model_config.id]))
+                pending[task] = model_config
+                next_launch = now + delays.get(model_config.id, settings.AI_HEDGE_DEFAULT_DELAY)
+                if len(pending) > 1 or errors:
+                    logger.info(f"Hedging request to {model_config}")
+
+            wake_at = min(deadline, next_launch) if queue else deadline
+            done, _ = await asyncio.wait(
+                list(pending), timeout=max(wake_at - loop.time(), 0), return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                model_config = pending.pop(task)
+                if task.exception() is None:
+                    usage = usages[model_config.id]
+                    winner = GenerationResult(
+                        model_config, task.result(), perf_counter() - start,
+                        completion_tokens=usage.get('completion_tokens'),
+                        prompt_tokens=usage.get('prompt_tokens'),
+                        coalesced=usage.get('coalesced', False),
+                    )
+                    return winner
+                errors[model_config.id] = str(task.exception())
+                logger.warning(f"Routed request to {model_config} failed: {task.exception()}")
+                # Don't wait out the hedge delay after a failure
+                next_launch = loop.time()
+    finally:
+        for task in pending:
+            # Attempts still running at the deadline timed out and count as breaker failures
+            if winner is not None:
+                task.cancel(SUPERSEDED)
+            else:
+                task.cancel()
+
+    for model_config in pending.values():
+        errors.setdefault(model_config.id, f"Timed out after {timeout:g}s")
+    for model_config in queue:
+        errors.setdefault(model_config.id, "Not attempted")
+    raise AllProvidersFailed(errors)
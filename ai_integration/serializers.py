@@ -1,17 +1,25 @@
+import json
+from django.conf import settings
 from rest_framework import serializers
-from .models import AIModelConfig, ModelComparison, ModelResponse
+from .models import AIModelConfig, ComparisonMatrix, ModelComparison, ModelResponse
 
 class AIModelConfigSerializer(serializers.ModelSerializer):
     class Meta:
         model = AIModelConfig
-        fields = ['id', 'name', 'provider', 'model_name', 'is_active']
+        fields = [
+            'id', 'name', 'provider', 'model_name', 'is_active', 'cache_ttl',
+            'prompt_cost_per_1k', 'completion_cost_per_1k', 'inference_backend'
+        ]
 
 class ModelResponseSerializer(serializers.ModelSerializer):
     model_config = AIModelConfigSerializer()
     
     class Meta:
         model = ModelResponse
-        fields = ['id', 'model_config', 'response', 'latency', 'created_at']
+        fields = [
+            'id', 'model_config', 'response', 'latency', 'time_to_first_token', 'prompt_tokens',
+            'completion_tokens', 'tokens_per_second', 'cost', 'streamed', 'cached', 'coalesced', 'created_at'
+        ]
 
 class ModelComparisonSerializer(serializers.ModelSerializer):
     responses = ModelResponseSerializer(many=True, read_only=True)
@@ -22,4 +30,63 @@ class ModelComparisonSerializer(serializers.ModelSerializer):
 
 class CompareModelsSerializer(serializers.Serializer):
     prompt = serializers.CharField()
-    model_ids = serializers.ListField(child=serializers.IntegerField())
\ No newline at end of file
+    model_ids = serializers.ListField(child=serializers.IntegerField())
+    # per_model: one task per model, concurrent: one task calling all models,
+    # hedged: model_ids are a primary followed by ordered fallbacks and only
+    # the first good answer is kept
+    mode = serializers.ChoiceField(choices=['per_model', 'concurrent', 'hedged'], default='per_model')
+    timeout = serializers.FloatField(required=False, min_value=0.1)
+    hedge_delay = serializers.FloatField(required=False, min_value=0, help_text="Override the observed p95 hedge delay")
+    stream = serializers.BooleanField(default=False)
+    # use: read and write the response cache, refresh: skip reads but store
+    # the fresh response, bypass: don't touch the cache at all
+    cache = serializers.ChoiceField(choices=['use', 'refresh', 'bypass'], default='use')
+
+class ComparisonMatrixSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ComparisonMatrix
+        fields = [
+            'id', 'model_configs', 'status', 'total_prompts', 'completed_prompts',
+            'task_id', 'created_at', 'completed_at'
+        ]
+        read_only_fields = fields
+
+class CreateMatrixSerializer(serializers.Serializer):
+    """
+    Prompts come either inline as a JSON list or as an uploaded NDJSON file
+    with one JSON string or {"prompt": ...} object per line.
+    """
+    prompts = serializers.ListField(child=serializers.CharField(), required=False)
+    file = serializers.FileField(required=False)
+    model_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    timeout = serializers.FloatField(required=False, min_value=0.1)
+    cache = serializers.ChoiceField(choices=['use', 'refresh', 'bypass'], default='use')
+
+    def _read_ndjson(self, upload):
+        prompts = []
+        for number, line in enumerate(upload, start=1):
+            line = line.decode('utf-8').strip() if isinstance(line, bytes) else line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                raise serializers.ValidationError({'file': f"Line {number} is not valid JSON"})
+            prompt = item.get('prompt') if isinstance(item, dict) else item
+            if not isinstance(prompt, str) or not prompt:
+                raise serializers.ValidationError({'file': f"Line {number} has no prompt"})
+            prompts.append(prompt)
+        return prompts
+
+    def validate(self, data):
+        if ('prompts' in data) == ('file' in data):
+            raise serializers.ValidationError("Provide either prompts or an NDJSON file")
+        if 'file' in data:
+            data['prompts'] = self._read_ndjson(data.pop('file'))
+        if not data['prompts']:
+            raise serializers.ValidationError({'prompts': "No prompts given"})
+        if len(data['prompts']) > settings.AI_MATRIX_MAX_PROMPTS:
+            raise serializers.ValidationError(
+                {'prompts': f"At most {settings.AI_MATRIX_MAX_PROMPTS} prompts per matrix"}
+            )
+        return data
@@ -0,0 +1,97 @@
+import asyncio
+import hashlib
+import json
+from typing import Dict, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from celery import current_app, states
+from celery.backends.base import KeyValueStoreBackend
+from django.conf import settings
+
+
+def _entry(task_id: str, meta: Optional[dict], backend) -> dict:
+    status = meta.get('status', states.PENDING) if meta else states.PENDING
+    result = meta.get('result') if meta else None
+    entry = {
+        'task_id': task_id,
+        'status': status,
+        'result': result if status == states.SUCCESS else None,
+        # Partial text of streaming tasks
+        'progress': result if status == 'PROGRESS' else None,
+    }
+    if status in states.PROPAGATE_STATES:
+        entry['error'] = str(backend.exception_to_python(result)) if result else status
+    return entry
+
+
+def fetch_statuses(task_ids: List[str]) -> List[dict]:
+    """
+    Status of many Celery tasks, in input order. Key-value result backends
+    (Redis) are read with a single MGET instead of one request per task.
+    """
+    if not task_ids:
+        return []
+    backend = current_app.backend
+    if isinstance(backend, KeyValueStoreBackend):
+        keys = [backend.get_key_for_task(task_id) for task_id in task_ids]
+        values = backend.mget(keys)
+        if hasattr(values, 'items'):
+            # Memcached-style clients return a mapping of the keys found
+            values = [values.get(key) for key in keys]
+        metas = [backend.decode_result(value) if value is not None else None for value in values]
+    else:
+        metas = [backend.get_task_meta(task_id) for task_id in task_ids]
+    return [_entry(task_id, meta, backend) for task_id, meta in zip(task_ids, metas)]
+
+
+def aggregate_status(statuses: List[dict]) -> str:
+    """Single Celery-style state summarizing a set of task statuses."""
+    if not statuses:
+        return states.PENDING
+    found = {entry['status'] for entry in statuses}
+    if found == {states.SUCCESS}:
+        return states.SUCCESS
+    if found <= states.READY_STATES:
+        return states.FAILURE
+    if found == {states.PENDING}:
+        return states.PENDING
+    return 'PROGRESS'
+
+
+def summarize(statuses: List[dict]) -> Dict:
+    counts = {}
+    for entry in statuses:
+        counts[entry['status']] = counts.get(entry['status'], 0) + 1
+    return {
+        'status': aggregate_status(statuses),
+        'counts': counts,
+        'version': status_version(statuses),
+        'tasks': statuses,
+    }
+
+
+def status_version(statuses: List[dict]) -> str:
+    """Opaque token that changes whenever any task's status or progress does."""
+    payload = json.dumps(
+        [(entry['task_id'], entry['status'], entry['progress']) for entry in statuses], default=str
+    )
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+async def wait_for_change(task_ids: List[str], version: Optional[str], timeout: float) -> Tuple[List[dict], bool]:
+    """
+    Poll the result backend until the statuses no longer match version or
+    timeout seconds pass, sleeping between polls without holding a thread.
+    Returns the latest statuses and whether they changed.
+    """
+    fetch = sync_to_async(fetch_statuses, thread_sensitive=False)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        statuses = await fetch(task_ids)
+        if status_version(statuses) != version:
+            return statuses, True
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return statuses, False
+        await asyncio.sleep(min(settings.AI_TASK_POLL_INTERVAL, remaining))
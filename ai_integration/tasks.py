@@ -1,45 +1,357 @@
 from celery import shared_task
+from celery.signals import worker_process_init
+import asyncio
+import concurrent.futures
 from time import time
-from .models import AIModelConfig, ModelComparison, ModelResponse
-from .utils import (
-    openai_utils,
-    claude_utils,
-    deepseek_utils,
-    ollama_utils,
-    huggingface_utils
+import logging
+from typing import List, Optional
+from django.db.models import F
+from django.utils import timezone
+from .models import AIModelConfig, ComparisonMatrix, ModelComparison, ModelResponse
+from .cache import response_cache
+from .accounting import usage_fields
+from . import circuit_breaker
+from .model_pool import model_pool
+from .clients import run_sync, submit
+from django.conf import settings
+from .providers import (
+    generate, generate_coalesced, generate_stream, generate_many, generate_batch, GenerationResult, UnsupportedProviderError
 )
+from .routing import AllProvidersFailed, generate_hedged, hedge_delays
 
-@shared_task
-def run_ai_model_task(model_config_id: int, prompt: str, comparison_id: int) -> str:
+logger = logging.getLogger(__name__)
+
+PROGRESS_INTERVAL = 0.25  # Seconds between partial response updates
+
+@worker_process_init.connect
+def warmup_models(**kwargs):
+    """
+    Load the configured Hugging Face models in each new worker process,
+    unless the host's inference server owns them.
+    """
+    if settings.HF_WARMUP_MODELS and not settings.HF_INFERENCE_SOCKET:
+        model_pool.warmup(settings.HF_WARMUP_MODELS)
+
+def _stream_with_progress(task, model_config, prompt: str) -> GenerationResult:
+    """
+    Run generate_stream on the provider loop and forward the partial text
+    through the task's PROGRESS state every PROGRESS_INTERVAL. The loop only
+    records the latest text; the (blocking) result backend writes happen
+    here, on the task's thread, so they never stall other provider calls.
+    """
+    latest = [None]
+
+    def on_chunk(text):
+        latest[0] = text
+
+    future = submit(generate_stream(model_config, prompt, on_chunk=on_chunk if task.request.id else None))
+    reported = None
+    while not future.done():
+        concurrent.futures.wait([future], timeout=PROGRESS_INTERVAL)
+        text = latest[0]
+        if not future.done() and text is not None and text is not reported:
+            reported = text
+            task.update_state(state='PROGRESS', meta={'partial_response': text})
+    return future.result()
+
+def _streaming_metrics(result) -> dict:
+    if result is None or not result.streamed:
+        return {}
+    return {'time_to_first_token': result.time_to_first_token, 'streamed': True}
+
+def _usage(result: GenerationResult, prompt: str) -> dict:
+    """
+    Token, throughput and cost fields for a generated response. Coalesced
+    responses are free like cache hits; the request whose call they shared
+    is billed for it.
+    """
+    return {
+        'coalesced': result.coalesced,
+        **usage_fields(
+            result.model_config, prompt, result.response, result.latency,
+            prompt_tokens=result.prompt_tokens,
+            completion_tokens=result.completion_tokens,
+            time_to_first_token=result.time_to_first_token,
+            cached=result.coalesced
+        )
+    }
+
+def _cached_usage(model_config, prompt: str, value: dict, latency: float) -> dict:
+    return usage_fields(
+        model_config, prompt, value['response'], latency,
+        prompt_tokens=value.get('prompt_tokens'),
+        completion_tokens=value.get('completion_tokens'),
+        cached=True
+    )
+
+def _cache_value(result: GenerationResult) -> dict:
+    return {
+        'response': result.response,
+        'prompt_tokens': result.prompt_tokens,
+        'completion_tokens': result.completion_tokens,
+    }
+
+@shared_task(bind=True)
+def run_ai_model_task(self, model_config_id: int, prompt: str, comparison_id: int, stream: bool = False, cache: str = 'use') -> str:
     model_config = AIModelConfig.objects.get(id=model_config_id)
     
     start_time = time()
+    result = None
     
-    if model_config.provider == 'OPENAI':
-        response = openai_utils.openai_text_completion(prompt, model_config.model_name)
-    elif model_config.provider == 'ANTHROPIC':
-        response = claude_utils.claude_text_completion(prompt, model_config.model_name)
-    elif model_config.provider == 'DEEPSEEK':
-        response = deepseek_utils.deepseek_text_completion(prompt, model_config.model_name)
-    elif model_config.provider == 'OLLAMA':
-        response = ollama_utils.ollama_text_completion(prompt, model_config.model_name, model_config.base_url)
-    elif model_config.provider == 'HUGGINGFACE':
-        response = huggingface_utils.huggingface_text_completion(prompt, model_config.model_name)
+    cached = response_cache.get(model_config, prompt) if cache == 'use' else None
+    if cached is not None:
+        response = cached['response']
     else:
-        response = f"Unsupported model provider: {model_config.provider}"
+        try:
+            if stream:
+                result = _stream_with_progress(self, model_config, prompt)
+            else:
+                usage = {}
+                response = run_sync(generate_coalesced(model_config, prompt, usage))
+                result = GenerationResult(
+                    model_config, response, time() - start_time,
+                    completion_tokens=usage.get('completion_tokens'),
+                    prompt_tokens=usage.get('prompt_tokens'),
+                    coalesced=usage.get('coalesced', False)
+                )
+            response = result.response
+            if cache != 'bypass':
+                response_cache.set(model_config, prompt, _cache_value(result))
+        except UnsupportedProviderError as e:
+            response = str(e)
+        except Exception as e:
+            logger.error(f"{model_config.get_provider_display()} error for model {model_config.model_name}: {e}")
+            response = None
     
     latency = time() - start_time
     
     if response is None:
         response = "Error occurred while generating response"
     
+    if cached is not None:
+        accounting = _cached_usage(model_config, prompt, cached, latency)
+    elif result is not None:
+        accounting = _usage(result, prompt)
+    else:
+        accounting = {}
+    
     # Save the response
     comparison = ModelComparison.objects.get(id=comparison_id)
     ModelResponse.objects.create(
         comparison=comparison,
         model_config=model_config,
         response=response,
-        latency=latency
+        latency=latency,
+        cached=cached is not None,
+        **_streaming_metrics(result),
+        **accounting
     )
     
-    return response
\ No newline at end of file
+    return response
+
+@shared_task
+def run_model_comparison_task(comparison_id: int, model_config_ids: List[int], timeout: Optional[float] = None,
+                              stream: bool = False, cache: str = 'use') -> dict:
+    """
+    Call all models of a comparison concurrently in a single task and store
+    every response with one bulk insert. Cached responses are looked up in
+    one round trip and only the misses are sent to providers.
+    """
+    comparison = ModelComparison.objects.get(id=comparison_id)
+    configs = AIModelConfig.objects.in_bulk(model_config_ids)
+    model_configs = [configs[model_id] for model_id in model_config_ids if model_id in configs]
+    timeout = timeout or settings.AI_COMPARISON_PROVIDER_TIMEOUT
+
+    start = time()
+    cached = response_cache.get_many(model_configs, comparison.prompt) if cache == 'use' else {}
+    lookup_latency = time() - start
+
+    misses = [model_config for model_config in model_configs if model_config.id not in cached]
+    generated = {}
+    for result in run_sync(generate_many(misses, comparison.prompt, timeout, stream=stream)):
+        generated[result.model_config.id] = result
+        if not result.error and cache != 'bypass':
+            response_cache.set(result.model_config, comparison.prompt, _cache_value(result))
+
+    responses = []
+    for model_config in model_configs:
+        if model_config.id in cached:
+            value = cached[model_config.id]
+            responses.append(ModelResponse(
+                comparison=comparison,
+                model_config=model_config,
+                response=value['response'],
+                latency=lookup_latency,
+                cached=True,
+                **_cached_usage(model_config, comparison.prompt, value, lookup_latency)
+            ))
+        else:
+            result = generated[model_config.id]
+            responses.append(ModelResponse(
+                comparison=comparison,
+                model_config=model_config,
+                response=result.response,
+                latency=result.latency,
+                **_streaming_metrics(result),
+                **({} if result.error else _usage(result, comparison.prompt))
+            ))
+    ModelResponse.objects.bulk_create(responses)
+
+    return {
+        'comparison_id': comparison_id,
+        'responses': {response.model_config_id: response.response for response in responses}
+    }
+
+@shared_task
+def run_hedged_model_task(comparison_id: int, model_config_ids: List[int], timeout: Optional[float] = None,
+                          hedge_delay: Optional[float] = None, cache: str = 'use') -> dict:
+    """
+    Get one answer for a comparison's prompt from the first model config
+    (primary), hedging to the following configs in order when it is slower
+    than its observed p95 latency or fails. Only the winning response is
+    stored.
+    """
+    comparison = ModelComparison.objects.get(id=comparison_id)
+    configs = AIModelConfig.objects.in_bulk(model_config_ids)
+    model_configs = [configs[model_id] for model_id in model_config_ids if model_id in configs]
+    if not model_configs:
+        # Deleted since the request was accepted; there's no config to record a response against
+        logger.error(f"No model configs left to route comparison {comparison_id} to")
+        errors = {model_id: "Unknown model config" for model_id in model_config_ids}
+        return {'comparison_id': comparison_id, 'model_config_id': None, 'response': None, 'errors': errors}
+    timeout = timeout or settings.AI_COMPARISON_PROVIDER_TIMEOUT
+
+    start = time()
+    cached = response_cache.get_many(model_configs, comparison.prompt) if cache == 'use' else {}
+    for model_config in model_configs:
+        if model_config.id in cached:
+            value = cached[model_config.id]
+            latency = time() - start
+            ModelResponse.objects.create(
+                comparison=comparison,
+                model_config=model_config,
+                response=value['response'],
+                latency=latency,
+                cached=True,
+                **_cached_usage(model_config, comparison.prompt, value, latency)
+            )
+            return {'comparison_id': comparison_id, 'model_config_id': model_config.id, 'response': value['response']}
+
+    try:
+        result = run_sync(generate_hedged(model_configs, comparison.prompt, hedge_delays(model_configs, hedge_delay), timeout))
+    except AllProvidersFailed as e:
+        logger.error(f"All routed providers failed for comparison {comparison_id}: {e}")
+        ModelResponse.objects.create(
+            comparison=comparison,
+            model_config=model_configs[0],
+            response="Error occurred while generating response",
+            latency=time() - start
+        )
+        return {'comparison_id': comparison_id, 'model_config_id': None, 'response': None, 'errors': e.errors}
+
+    if cache != 'bypass':
+        response_cache.set(result.model_config, comparison.prompt, _cache_value(result))
+    ModelResponse.objects.create(
+        comparison=comparison,
+        model_config=result.model_config,
+        response=result.response,
+        latency=result.latency,
+        **_usage(result, comparison.prompt)
+    )
+    return {'comparison_id': comparison_id, 'model_config_id': result.model_config.id, 'response': result.response}
+
+
+@shared_task
+def probe_circuit_breakers() -> dict:
+    """
+    Probe every active config whose circuit is open past its reset timeout,
+    so circuits close again without waiting for real traffic to risk it.
+    Runs on the beat schedule (CELERY_BEAT_SCHEDULE).
+    """
+    probed = {}
+    for model_config in AIModelConfig.objects.filter(is_active=True):
+        if not circuit_breaker.due_for_probe(model_config.id):
+            continue
+        try:
+            run_sync(asyncio.wait_for(generate(model_config, settings.AI_BREAKER_PROBE_PROMPT),
+                                      settings.AI_BREAKER_PROBE_TIMEOUT))
+            probed[model_config.id] = 'success'
+        except Exception as e:
+            logger.info(f"Circuit breaker probe for {model_config} failed: {e}")
+            probed[model_config.id] = 'failure'
+    return probed
+
+@shared_task
+def run_matrix_task(matrix_id: int, timeout: Optional[float] = None, cache: str = 'use') -> dict:
+    """
+    Run every prompt of a comparison matrix against every model config in
+    batches of AI_MATRIX_BATCH_SIZE prompts. Each batch is one round of
+    concurrent provider calls, capped per provider by
+    AI_PROVIDER_CONCURRENCY, followed by one bulk insert. Prompts that
+    already have responses are skipped, so a failed run can be resumed.
+    """
+    matrix = ComparisonMatrix.objects.get(id=matrix_id)
+    model_configs = list(matrix.model_configs.order_by('id'))
+    timeout = timeout or settings.AI_COMPARISON_PROVIDER_TIMEOUT
+    ComparisonMatrix.objects.filter(id=matrix_id).update(status='running')
+
+    pending = list(
+        matrix.comparisons.filter(responses__isnull=True).order_by('id').values_list('id', flat=True)
+    )
+    batch_size = settings.AI_MATRIX_BATCH_SIZE
+    try:
+        for offset in range(0, len(pending), batch_size):
+            comparisons = list(ModelComparison.objects.filter(id__in=pending[offset:offset + batch_size]).order_by('id'))
+
+            start = time()
+            cached = {
+                comparison.id: response_cache.get_many(model_configs, comparison.prompt) if cache == 'use' else {}
+                for comparison in comparisons
+            }
+            lookup_latency = (time() - start) / max(len(comparisons), 1)
+
+            calls = [
+                (comparison, model_config)
+                for comparison in comparisons
+                for model_config in model_configs
+                if model_config.id not in cached[comparison.id]
+            ]
+            results = run_sync(generate_batch(
+                [(model_config, comparison.prompt) for comparison, model_config in calls],
+                timeout, settings.AI_PROVIDER_CONCURRENCY
+            ))
+
+            responses = []
+            for comparison in comparisons:
+                for model_config in model_configs:
+                    value = cached[comparison.id].get(model_config.id)
+                    if value is None:
+                        continue
+                    responses.append(ModelResponse(
+                        comparison=comparison,
+                        model_config=model_config,
+                        response=value['response'],
+                        latency=lookup_latency,
+                        cached=True,
+                        **_cached_usage(model_config, comparison.prompt, value, lookup_latency)
+                    ))
+            for (comparison, model_config), result in zip(calls, results):
+                if not result.error and cache != 'bypass':
+                    response_cache.set(model_config, comparison.prompt, _cache_value(result))
+                responses.append(ModelResponse(
+                    comparison=comparison,
+                    model_config=model_config,
+                    response=result.response,
+                    latency=result.latency,
+                    **({} if result.error else _usage(result, comparison.prompt))
+                ))
+            ModelResponse.objects.bulk_create(responses)
+            ComparisonMatrix.objects.filter(id=matrix_id).update(
+                completed_prompts=F('completed_prompts') + len(comparisons)
+            )
+    except Exception:
+        ComparisonMatrix.objects.filter(id=matrix_id).update(status='failed')
+        raise
+
+    ComparisonMatrix.objects.filter(id=matrix_id).update(status='completed', completed_at=timezone.now())
+    return {'matrix_id': matrix_id, 'prompts': len(pending), 'models': len(model_configs)}
@@ -0,0 +1,102 @@
+import sys
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from users.models import UserProfile
+from ai_integration import accounting
+from ai_integration.accounting import count_tokens, estimate_cost, rollup, usage_fields
+from ai_integration.models import AIModelConfig, ModelComparison, ModelResponse
+
+@override_settings(AI_TOKENIZER_FALLBACK_MODEL='')
+class UsageFieldsTest(SimpleTestCase):
+    def setUp(self):
+        self.config = SimpleNamespace(
+            provider='OLLAMA', model_name='llama2',
+            prompt_cost_per_1k=Decimal('0.5'), completion_cost_per_1k=Decimal('1.5')
+        )
+
+    def test_count_tokens_estimate_without_tokenizer(self):
+        self.assertEqual(count_tokens("Hello, world!", self.config), 4)
+
+    def test_hugging_face_loads_only_the_tokenizer_once(self):
+        config = SimpleNamespace(provider='HUGGINGFACE', model_name='gpt2')
+        transformers = MagicMock()
+        transformers.AutoTokenizer.from_pretrained.return_value = lambda text: {'input_ids': text.split()}
+        with patch.dict(sys.modules, transformers=transformers), patch.dict(accounting._tokenizers, clear=True):
+            self.assertEqual(count_tokens("one two three", config), 3)
+            self.assertEqual(count_tokens("one two", config), 2)
+        transformers.AutoTokenizer.from_pretrained.assert_called_once_with('gpt2')
+
+    def test_estimate_cost(self):
+        self.assertEqual(estimate_cost(self.config, 1000, 2000), Decimal('3.500000'))
+        unpriced = SimpleNamespace(prompt_cost_per_1k=None, completion_cost_per_1k=None)
+        self.assertIsNone(estimate_cost(unpriced, 1000, 2000))
+
+    def test_tokens_per_second_excludes_time_to_first_token(self):
+        fields = usage_fields(self.config, "prompt", "response", 3.0, 10, 100, time_to_first_token=1.0)
+        self.assertEqual(fields['tokens_per_second'], 50)
+
+    def test_cached_responses_cost_nothing(self):
+        fields = usage_fields(self.config, "prompt", "response", 0.01, 10, 100, cached=True)
+        self.assertEqual(fields['cost'], Decimal(0))
+        self.assertIsNone(fields['tokens_per_second'])
+
+class RollupTest(TestCase):
+    def setUp(self):
+        self.user = UserProfile.objects.create_user(username='alice', email='alice@example.com', password='pw')
+        self.first = AIModelConfig.objects.create(name="First", provider="OLLAMA", model_name="first")
+        self.second = AIModelConfig.objects.create(name="Second", provider="OLLAMA", model_name="second")
+        comparison = ModelComparison.objects.create(prompt="Hello", user=self.user)
+        for config, tokens, latency in [(self.first, 100, 1.0), (self.first, 300, 3.0), (self.second, 50, 1.0)]:
+            ModelResponse.objects.create(
+                comparison=comparison, model_config=config, response="x", latency=latency,
+                prompt_tokens=10, completion_tokens=tokens, cost=Decimal('0.01')
+            )
+        ModelResponse.objects.create(
+            comparison=comparison, model_config=self.first, response="x", latency=0.001,
+            prompt_tokens=10, completion_tokens=100, cost=Decimal(0), cached=True
+        )
+        ModelResponse.objects.create(
+            comparison=comparison, model_config=self.first, response="x", latency=3.0,
+            prompt_tokens=10, completion_tokens=100, cost=Decimal(0), coalesced=True
+        )
+
+    def test_rollup_by_model_config(self):
+        rows = {row['config']: row for row in rollup(ModelResponse.objects.all(), 'model_config')}
+        first = rows[self.first.id]
+        self.assertEqual(first['responses'], 4)
+        self.assertEqual(first['cached_responses'], 1)
+        self.assertEqual(first['coalesced_responses'], 1)
+        self.assertEqual(first['total_completion_tokens'], 600)
+        self.assertEqual(first['total_cost'], Decimal('0.02'))
+        # Cache hits and coalesced responses don't count towards throughput
+        self.assertEqual(first['throughput'], 100)
+
+    def test_rollup_by_user_and_day(self):
+        [by_user] = rollup(ModelResponse.objects.all(), 'user')
+        self.assertEqual(by_user['username'], 'alice')
+        self.assertEqual(by_user['total_prompt_tokens'], 50)
+        [by_day] = rollup(ModelResponse.objects.all(), 'day')
+        self.assertEqual(by_day['responses'], 5)
+
+class UsageViewTest(APITestCase):
+    def test_usage_endpoint(self):
+        response = self.client.get(reverse('usage-list'), {'group_by': 'day'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+    def test_rejects_unknown_grouping(self):
+        response = self.client.get(reverse('usage-list'), {'group_by': 'planet'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rejects_bad_dates(self):
+        response = self.client.get(reverse('usage-list'), {'start': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rejects_non_integer_model_config(self):
+        response = self.client.get(reverse('usage-list'), {'model_config': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
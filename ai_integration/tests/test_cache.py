@@ -0,0 +1,83 @@
+import json
+from time import sleep
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from django.test import SimpleTestCase, override_settings
+from ai_integration.cache import LocalLRU, ResponseCache, make_key, normalize_prompt
+
+def model_config(id=1, provider='OPENAI', model_name='gpt-4', cache_ttl=None):
+    return SimpleNamespace(id=id, provider=provider, model_name=model_name, cache_ttl=cache_ttl)
+
+class CacheKeyTest(SimpleTestCase):
+    def test_normalized_prompts_share_key(self):
+        self.assertEqual(normalize_prompt("  Hello\n  world "), "Hello world")
+        self.assertEqual(make_key(model_config(), "Hello world"), make_key(model_config(), " Hello   world"))
+
+    def test_key_depends_on_model_and_params(self):
+        key = make_key(model_config(), "Hello")
+        self.assertNotEqual(key, make_key(model_config(model_name='gpt-3.5-turbo'), "Hello"))
+        self.assertNotEqual(key, make_key(model_config(), "Hello", {"temperature": 0.2}))
+
+class LocalLRUTest(SimpleTestCase):
+    def test_eviction_and_expiry(self):
+        lru = LocalLRU(max_entries=2)
+        lru.set('a', 1, ttl=60)
+        lru.set('b', 2, ttl=60)
+        lru.get('a')
+        lru.set('c', 3, ttl=60)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('a'), 1)
+
+        lru.set('d', 4, ttl=0.01)
+        sleep(0.02)
+        self.assertIsNone(lru.get('d'))
+
+class ResponseCacheTest(SimpleTestCase):
+    def setUp(self):
+        patcher = patch('ai_integration.cache._unavailable_until', 0.0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_redis_tier_and_counters(self):
+        redis = MagicMock()
+        config = model_config()
+        redis.mget.return_value = [json.dumps({'response': 'from redis'}).encode()]
+
+        with patch('ai_integration.cache.get_redis', return_value=redis):
+            cache = ResponseCache()
+            self.assertEqual(cache.get(config, "Hello"), {'response': 'from redis'})
+            # Second lookup is served by the local tier
+            self.assertEqual(cache.get(config, "Hello"), {'response': 'from redis'})
+
+        redis.mget.assert_called_once()
+        self.assertEqual(cache.counters['redis_hits'], 1)
+        self.assertEqual(cache.counters['local_hits'], 1)
+
+    def test_ttl_zero_disables_caching(self):
+        redis = MagicMock()
+        config = model_config(cache_ttl=0)
+        with patch('ai_integration.cache.get_redis', return_value=redis):
+            cache = ResponseCache()
+            cache.set(config, "Hello", {'response': 'x'})
+            self.assertIsNone(cache.get(config, "Hello"))
+        redis.set.assert_not_called()
+
+    @override_settings(AI_CACHE_DEFAULT_TTL=120)
+    def test_redis_unavailable_falls_back_to_local(self):
+        config = model_config()
+        with patch('ai_integration.cache.get_redis', side_effect=ConnectionError("down")):
+            cache = ResponseCache()
+            cache.set(config, "Hello", {'response': 'local only'})
+            self.assertEqual(cache.get(config, "Hello"), {'response': 'local only'})
+
+    @override_settings(AI_CACHE_RETRY_INTERVAL=60)
+    def test_redis_skipped_after_failure(self):
+        config = model_config()
+        with patch('ai_integration.cache.get_redis', side_effect=ConnectionError("down")) as get_redis:
+            cache = ResponseCache()
+            self.assertIsNone(cache.get(config, "Hello"))
+            cache.set(config, "Hello", {'response': 'local only'})
+            self.assertIsNone(cache.get(config, "Other"))
+        # Only the first lookup tried Redis
+        self.assertEqual(get_redis.call_count, 1)
+        self.assertEqual(cache.counters['writes'], 1)
@@ -0,0 +1,210 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from django.test import SimpleTestCase, TestCase, override_settings
+from ai_integration import circuit_breaker
+from ai_integration.circuit_breaker import SUPERSEDED, CircuitOpenError, call_with_breaker
+from ai_integration.models import AIModelConfig
+from ai_integration.tasks import probe_circuit_breakers
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self):
+        results = []
+        for name, args, kwargs in self.calls:
+            results.append(await getattr(self.redis, name)(*args, **kwargs))
+        return results
+
+class FakeAsyncRedis:
+    """In-memory stand-in for the redis.asyncio calls used by the breaker."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def hgetall(self, key):
+        return {k.encode(): str(v).encode() for k, v in self.data.get(key, {}).items()}
+
+    async def hset(self, key, field=None, value=None, mapping=None):
+        entry = self.data.setdefault(key, {})
+        if field is not None:
+            entry[field] = value
+        entry.update(mapping or {})
+
+    async def hincrby(self, key, field, amount):
+        entry = self.data.setdefault(key, {})
+        entry[field] = int(entry.get(field, 0)) + amount
+        return entry[field]
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def expire(self, key, seconds):
+        pass
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+class SyncRedis:
+    """Synchronous view over FakeAsyncRedis for status()."""
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    def hgetall(self, key):
+        return asyncio.run(self.redis.hgetall(key))
+
+    def pipeline(self, transaction=True):
+        redis = self.redis
+
+        class Pipeline(FakePipeline):
+            def execute(self):
+                return asyncio.run(FakePipeline.execute(self))
+
+        return Pipeline(redis)
+
+async def ok():
+    return "ok"
+
+async def boom():
+    raise RuntimeError("provider down")
+
+async def hang():
+    await asyncio.sleep(10)
+
+@override_settings(
+    AI_BREAKER_ENABLED=True, AI_BREAKER_FAILURE_THRESHOLD=3, AI_BREAKER_ERROR_RATE=0.5,
+    AI_BREAKER_MIN_REQUESTS=10, AI_BREAKER_WINDOW=300, AI_BREAKER_RESET_TIMEOUT=30
+)
+class CircuitBreakerTest(SimpleTestCase):
+    def setUp(self):
+        self.redis = FakeAsyncRedis()
+        patcher = patch('ai_integration.circuit_breaker.get_async_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.config = SimpleNamespace(id=1)
+
+    def fail(self, times):
+        for _ in range(times):
+            with self.assertRaises(RuntimeError):
+                asyncio.run(call_with_breaker(self.config, boom))
+
+    def test_opens_after_consecutive_failures_and_fails_fast(self):
+        self.fail(3)
+        calls = []
+
+        async def tracked():
+            calls.append(1)
+            return "ok"
+
+        with self.assertRaises(CircuitOpenError):
+            asyncio.run(call_with_breaker(self.config, tracked))
+        self.assertEqual(calls, [])
+
+    def test_success_resets_consecutive_failures(self):
+        self.fail(2)
+        asyncio.run(call_with_breaker(self.config, ok))
+        self.fail(2)
+        self.assertEqual(asyncio.run(call_with_breaker(self.config, ok)), "ok")
+
+    def test_opens_on_error_rate(self):
+        for _ in range(5):
+            asyncio.run(call_with_breaker(self.config, ok))
+            self.fail(1)
+        with self.assertRaises(CircuitOpenError):
+            asyncio.run(call_with_breaker(self.config, ok))
+
+    def test_half_open_probe_closes_on_success(self):
+        self.fail(3)
+        self.redis.data['ai:breaker:1']['opened_at'] = 0
+        self.assertEqual(asyncio.run(call_with_breaker(self.config, ok)), "ok")
+        self.assertEqual(self.redis.data['ai:breaker:1']['state'], circuit_breaker.CLOSED)
+        self.assertNotIn('ai:breaker:1:probe', self.redis.data)
+
+    def test_only_one_probe_at_a_time(self):
+        self.fail(3)
+        self.redis.data['ai:breaker:1']['opened_at'] = 0
+        self.redis.data['ai:breaker:1:probe'] = 1
+        with self.assertRaises(CircuitOpenError):
+            asyncio.run(call_with_breaker(self.config, ok))
+
+    def test_failed_probe_reopens(self):
+        self.fail(3)
+        self.redis.data['ai:breaker:1']['opened_at'] = 0
+        self.fail(1)
+        self.assertEqual(self.redis.data['ai:breaker:1']['state'], circuit_breaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            asyncio.run(call_with_breaker(self.config, ok))
+
+    def test_timeout_counts_as_failure(self):
+        for _ in range(3):
+            with self.assertRaises(asyncio.TimeoutError):
+                asyncio.run(asyncio.wait_for(call_with_breaker(self.config, hang), 0.01))
+        self.assertEqual(self.redis.data['ai:breaker:1']['state'], circuit_breaker.OPEN)
+
+    def test_superseded_call_is_not_a_failure(self):
+        async def race():
+            task = asyncio.create_task(call_with_breaker(self.config, hang))
+            await asyncio.sleep(0)
+            task.cancel(SUPERSEDED)
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(race())
+        self.assertNotIn('consecutive_failures', self.redis.data.get('ai:breaker:1', {}))
+
+    def test_status_reports_state_and_error_rate(self):
+        asyncio.run(call_with_breaker(self.config, ok))
+        self.fail(3)
+        with patch('ai_integration.circuit_breaker.get_redis', return_value=SyncRedis(self.redis)):
+            status = circuit_breaker.status(1)
+        self.assertEqual(status['state'], circuit_breaker.OPEN)
+        self.assertEqual(status['consecutive_failures'], 3)
+        self.assertEqual(status['requests'], 4)
+        self.assertEqual(status['failures'], 3)
+        self.assertEqual(status['error_rate'], 0.75)
+
+    def test_redis_unavailable_allows_calls(self):
+        with patch('ai_integration.circuit_breaker.get_async_redis', side_effect=ConnectionError):
+            self.assertEqual(asyncio.run(call_with_breaker(self.config, ok)), "ok")
+        with patch('ai_integration.circuit_breaker.get_redis', side_effect=ConnectionError):
+            self.assertIsNone(circuit_breaker.status(1))
+
+
+@override_settings(AI_BREAKER_ENABLED=True, AI_BREAKER_RESET_TIMEOUT=30, AI_BREAKER_PROBE_PROMPT='ping',
+                   AI_BREAKER_PROBE_TIMEOUT=5)
+class ProbeCircuitBreakersTest(TestCase):
+    def setUp(self):
+        self.redis = FakeAsyncRedis()
+        for target, value in (('get_async_redis', self.redis), ('get_redis', SyncRedis(self.redis))):
+            patcher = patch(f'ai_integration.circuit_breaker.{target}', return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.due = AIModelConfig.objects.create(name="Due", provider="OPENAI", model_name="gpt-3.5-turbo")
+        self.open = AIModelConfig.objects.create(name="Open", provider="OPENAI", model_name="gpt-3.5-turbo")
+        AIModelConfig.objects.create(name="Closed", provider="OPENAI", model_name="gpt-3.5-turbo")
+        self.redis.data[f'ai:breaker:{self.due.id}'] = {'state': circuit_breaker.OPEN, 'opened_at': 1}
+        self.redis.data[f'ai:breaker:{self.open.id}'] = {'state': circuit_breaker.OPEN, 'opened_at': 1e12}
+
+    def test_probes_only_circuits_past_reset_timeout(self):
+        with patch('ai_integration.tasks.generate', new_callable=AsyncMock, return_value="pong") as mock_generate:
+            self.assertEqual(probe_circuit_breakers(), {self.due.id: 'success'})
+        mock_generate.assert_called_once_with(self.due, 'ping')
+
+    def test_failed_probe_is_reported(self):
+        with patch('ai_integration.tasks.generate', new_callable=AsyncMock, side_effect=RuntimeError("down")):
+            self.assertEqual(probe_circuit_breakers(), {self.due.id: 'failure'})
@@ -0,0 +1,29 @@
+from django.test import SimpleTestCase, override_settings
+from ai_integration.clients import get_client, run_sync, resolve_base_url
+
+class ProviderClientPoolTest(SimpleTestCase):
+    def test_clients_are_reused_per_configuration(self):
+        async def clients():
+            return (
+                get_client('OLLAMA', 'http://ollama-a:11434'),
+                get_client('OLLAMA', 'http://ollama-a:11434'),
+                get_client('OLLAMA', 'http://ollama-b:11434'),
+            )
+
+        first, second, other = run_sync(clients())
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(str(other.base_url), 'http://ollama-b:11434')
+
+    @override_settings(ANTHROPIC_API_KEY='settings-key')
+    def test_headers_use_config_key_before_settings(self):
+        async def clients():
+            return get_client('ANTHROPIC'), get_client('ANTHROPIC', api_key='config-key')
+
+        default, configured = run_sync(clients())
+        self.assertEqual(default.headers['x-api-key'], 'settings-key')
+        self.assertEqual(configured.headers['x-api-key'], 'config-key')
+
+    def test_default_base_url(self):
+        self.assertEqual(resolve_base_url('DEEPSEEK'), 'https://api.deepseek.com/v1')
+        self.assertEqual(resolve_base_url('OLLAMA', 'http://gpu-host:11434/'), 'http://gpu-host:11434')
@@ -0,0 +1,152 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+from django.test import SimpleTestCase, override_settings
+from ai_integration.cache import request_fingerprint
+from ai_integration.coalescing import single_flight
+from ai_integration.providers import generate_coalesced
+
+class FakePubSub:
+    def __init__(self, redis):
+        self.redis = redis
+        self.queue = asyncio.Queue()
+        self.channels = []
+
+    async def subscribe(self, channel):
+        self.channels.append(channel)
+        self.redis.subscribers.setdefault(channel, []).append(self.queue)
+
+    async def get_message(self, ignore_subscribe_messages=True, timeout=None):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def unsubscribe(self):
+        for channel in self.channels:
+            self.redis.subscribers[channel].remove(self.queue)
+
+    async def aclose(self):
+        pass
+
+class FakeAsyncRedis:
+    """In-memory stand-in for the redis.asyncio calls used by single_flight."""
+
+    def __init__(self):
+        self.data = {}
+        self.subscribers = {}
+
+    async def set(self, key, value, nx=False, px=None, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value.encode() if isinstance(value, str) else value
+        return True
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def exists(self, key):
+        return int(key in self.data)
+
+    async def publish(self, channel, message):
+        for queue in self.subscribers.get(channel, []):
+            queue.put_nowait({'type': 'message', 'data': message.encode()})
+
+    async def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token.encode():
+            del self.data[key]
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+@override_settings(AI_COALESCE_ENABLED=True, AI_COALESCE_WAIT_TIMEOUT=5, AI_COALESCE_RETRY_INTERVAL=60)
+class SingleFlightTest(SimpleTestCase):
+    def setUp(self):
+        patcher = patch('ai_integration.coalescing._unavailable_until', 0.0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_concurrently(self, redis, calls, count=5, fail=False):
+        async def provider_call():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            if fail:
+                raise RuntimeError("provider down")
+            return "shared answer"
+
+        async def run():
+            return await asyncio.gather(
+                *(single_flight('prompt-key', provider_call) for _ in range(count)),
+                return_exceptions=True
+            )
+
+        with patch('ai_integration.coalescing.get_async_redis', return_value=redis):
+            return asyncio.run(run())
+
+    def test_followers_share_leader_result(self):
+        calls = []
+        results = self.run_concurrently(FakeAsyncRedis(), calls)
+        self.assertEqual(results, ["shared answer"] * 5)
+        self.assertEqual(len(calls), 1)
+
+    def test_followers_fall_back_when_leader_fails(self):
+        calls = []
+        results = self.run_concurrently(FakeAsyncRedis(), calls, count=3, fail=True)
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertEqual(len(calls), 3)
+
+    def test_redis_unavailable_calls_directly(self):
+        class BrokenRedis:
+            async def set(self, *args, **kwargs):
+                raise ConnectionError("no redis")
+
+        calls = []
+        results = self.run_concurrently(BrokenRedis(), calls, count=2)
+        self.assertEqual(results, ["shared answer"] * 2)
+        self.assertEqual(len(calls), 2)
+
+    def test_backs_off_after_redis_failure(self):
+        connects = []
+
+        def broken_redis():
+            connects.append(1)
+            raise ConnectionError("no redis")
+
+        calls = []
+        with patch('ai_integration.coalescing.get_async_redis', side_effect=broken_redis):
+            for _ in range(3):
+                asyncio.run(single_flight('prompt-key', lambda: self.answer(calls)))
+        self.assertEqual((len(calls), len(connects)), (3, 1))
+
+    async def answer(self, calls):
+        calls.append(1)
+        return "answer"
+
+    def test_key_covers_config_endpoint_and_api_key(self):
+        config = SimpleNamespace(id=1, provider='OLLAMA', model_name='llama2', base_url=None, api_key="secret")
+        key = request_fingerprint(config, "Hello")
+        self.assertEqual(request_fingerprint(config, "  Hello "), key)
+        for change in ({'id': 2}, {'base_url': "http://gpu-box:11434"}, {'api_key': "other"}):
+            self.assertNotEqual(request_fingerprint(SimpleNamespace(**{**vars(config), **change}), "Hello"), key)
+
+    def test_only_the_leader_is_billed(self):
+        calls = []
+
+        async def generate(model_config, prompt, usage):
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            usage.update(prompt_tokens=5, completion_tokens=10)
+            return "shared answer"
+
+        async def run():
+            usages = [{} for _ in range(3)]
+            await asyncio.gather(*(generate_coalesced(config, "Hello", usage) for usage in usages))
+            return usages
+
+        config = SimpleNamespace(id=1, provider='OLLAMA', model_name='llama2', base_url=None, api_key=None)
+        with patch('ai_integration.coalescing.get_async_redis', return_value=FakeAsyncRedis()), \
+                patch('ai_integration.providers.generate', side_effect=generate):
+            usages = asyncio.run(run())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(usage['coalesced'] for usage in usages), [False, True, True])
+        self.assertTrue(all(usage['completion_tokens'] == 10 for usage in usages))
@@ -0,0 +1,87 @@
+import asyncio
+import random
+import threading
+import httpx
+from django.test import SimpleTestCase
+from ai_integration.fake_provider import FakeProfile, FakeProviderConfig, FakeProviderServer, parse_distribution
+from ai_integration.utils.claude_utils import claude_messages_completion, claude_messages_stream
+from ai_integration.utils.ollama_utils import ollama_generate, ollama_generate_stream
+from ai_integration.utils.openai_utils import openai_chat_completion, openai_chat_stream
+
+class ParseDistributionTest(SimpleTestCase):
+    def test_distributions(self):
+        rng = random.Random(1)
+        self.assertEqual(parse_distribution('fixed:5')(rng), 5)
+        self.assertTrue(10 <= parse_distribution('uniform:10:20')(rng) <= 20)
+        self.assertGreaterEqual(parse_distribution('normal:0:1')(rng), 0)
+        self.assertGreater(parse_distribution('lognormal:100:0.5')(rng), 0)
+
+    def test_invalid(self):
+        for spec in ['fixed', 'uniform:1', 'gamma:1:2', 'fixed:x']:
+            with self.assertRaises(ValueError):
+                parse_distribution(spec)
+
+class FakeProviderServerTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        fast = {'first_token_ms': 'fixed:0', 'tokens_per_second': 10000, 'completion_tokens': 'fixed:5'}
+        config = FakeProviderConfig.from_dict({
+            'default': fast,
+            'models': {'broken': {**fast, 'error_rate': 1.0, 'error_status': 429}},
+        }, seed=0)
+        cls.server = FakeProviderServer(('127.0.0.1', 0), config)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def call(self, base_path, func):
+        async def run():
+            async with httpx.AsyncClient(base_url=self.server.url + base_path) as client:
+                return await func(client)
+        return asyncio.run(run())
+
+    async def collect(self, stream):
+        return "".join([chunk async for chunk in stream])
+
+    def test_openai_chat(self):
+        usage = {}
+        text = self.call('/v1', lambda client: openai_chat_completion(client, "Hello there", "gpt", usage=usage))
+        self.assertEqual(len(text.split()), 5)
+        self.assertEqual(usage['prompt_tokens'], 2)
+        self.assertEqual(usage['completion_tokens'], 5)
+
+    def test_openai_chat_stream(self):
+        usage = {}
+        text = self.call('/v1', lambda client: self.collect(openai_chat_stream(client, "Hi", "gpt", usage=usage)))
+        self.assertEqual(len(text.split()), 5)
+        self.assertEqual(usage['completion_tokens'], 5)
+
+    def test_anthropic_messages(self):
+        usage = {}
+        text = self.call('/v1', lambda client: claude_messages_completion(client, "Hi", "claude", usage=usage))
+        self.assertEqual(len(text.split()), 5)
+        streamed = self.call('/v1', lambda client: self.collect(claude_messages_stream(client, "Hi", "claude", usage=usage)))
+        self.assertEqual(streamed, text)
+        self.assertEqual(usage, {'prompt_tokens': 1, 'completion_tokens': 5})
+
+    def test_ollama_generate(self):
+        usage = {}
+        text = self.call('', lambda client: ollama_generate(client, "Hi", "llama2"))
+        streamed = self.call('', lambda client: self.collect(ollama_generate_stream(client, "Hi", "llama2", usage=usage)))
+        self.assertEqual(streamed, text)
+        self.assertEqual(usage['completion_tokens'], 5)
+
+    def test_error_injection(self):
+        with self.assertRaises(httpx.HTTPStatusError) as raised:
+            self.call('/v1', lambda client: openai_chat_completion(client, "Hi", "broken"))
+        self.assertEqual(raised.exception.response.status_code, 429)
+
+    def test_profile_rejects_unknown_settings(self):
+        with self.assertRaises(ValueError):
+            FakeProfile.from_dict({'latency': 'fixed:1'})
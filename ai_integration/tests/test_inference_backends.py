@@ -0,0 +1,96 @@
+import os
+import sys
+import tempfile
+import types
+from io import StringIO
+from unittest.mock import MagicMock, patch
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from ai_integration import inference_backends
+from ai_integration.inference_backends import generated_text, output_drift, validate_backend
+from ai_integration.model_pool import load_pipeline
+
+class InferenceBackendsTest(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        settings_override = override_settings(HF_MODEL_CACHE_DIR=self.tmp.name, HF_ONNX_CACHE_DIR=self.tmp.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_validate_backend(self):
+        self.assertEqual(validate_backend('int8'), 'int8')
+        with self.assertRaises(ValueError):
+            validate_backend('tensorrt')
+
+    def test_output_drift(self):
+        self.assertEqual(output_drift("the cat sat", "the cat sat"), 0.0)
+        self.assertEqual(output_drift("the cat sat", "a dog ran"), 1.0)
+        self.assertAlmostEqual(output_drift("the cat sat down", "the cat sat up"), 0.25)
+
+    def test_generated_text(self):
+        self.assertEqual(generated_text([{'summary_text': 'short'}]), 'short')
+        self.assertEqual(generated_text({'generated_text': 'long'}), 'long')
+
+    def test_int8_quantizes_eager_pipeline(self):
+        transformers = types.ModuleType('transformers')
+        transformers.pipeline = MagicMock(return_value='fp32 pipeline')
+        with patch.dict(sys.modules, {'transformers': transformers}), \
+                patch('ai_integration.model_pool.quantize_int8', return_value='int8 pipeline') as quantize:
+            self.assertEqual(load_pipeline('summarization', 'org/model', 'int8'), 'int8 pipeline')
+            self.assertEqual(load_pipeline('summarization', 'org/model'), 'fp32 pipeline')
+        quantize.assert_called_once_with('fp32 pipeline')
+
+    def test_onnx_export_happens_once(self):
+        exports = []
+
+        class FakeORTModel:
+            def __init__(self, path):
+                self.path = path
+
+            @classmethod
+            def from_pretrained(cls, path, export=False):
+                if export:
+                    exports.append(path)
+                return cls(path)
+
+            def save_pretrained(self, path):
+                with open(os.path.join(path, 'config.json'), 'w') as f:
+                    f.write('{}')
+
+        onnxruntime = types.ModuleType('optimum.onnxruntime')
+        onnxruntime.ORTModelForSeq2SeqLM = FakeORTModel
+        transformers = types.ModuleType('transformers')
+        transformers.pipeline = lambda task, model, tokenizer: (task, model, tokenizer)
+        transformers.AutoTokenizer = MagicMock()
+        modules = {'optimum': types.ModuleType('optimum'), 'optimum.onnxruntime': onnxruntime, 'transformers': transformers}
+        modules['optimum'].onnxruntime = onnxruntime
+
+        with patch.dict(sys.modules, modules):
+            first = load_pipeline('summarization', 'org/model', 'onnx')
+            second = load_pipeline('summarization', 'org/model', 'onnx')
+            with self.assertRaises(ValueError):
+                inference_backends.load_onnx_pipeline('fill-mask', 'org/model')
+
+        self.assertEqual(exports, ['org/model'])
+        export_dir = str(inference_backends.onnx_export_dir('org/model'))
+        self.assertEqual(str(first[1].path), export_dir)
+        self.assertEqual(str(second[1].path), export_dir)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ['innoflow-load-times.json', 'org--model'])
+
+class BenchmarkBackendsCommandTest(SimpleTestCase):
+    @patch('ai_integration.management.commands.benchmark_backends.load_pipeline')
+    def test_reports_speedup_and_drift(self, mock_load):
+        def load(task, model_name, backend):
+            suffix = ' quickly' if backend == 'int8' else ''
+            return lambda text, **kwargs: [{'summary_text': f"summary of {text[:10]}{suffix}"}]
+
+        mock_load.side_effect = load
+        out = StringIO()
+        call_command('benchmark_backends', '--backends', 'int8', '--runs', '1', stdout=out)
+
+        self.assertEqual([call.args[2] for call in mock_load.call_args_list], ['eager', 'int8'])
+        lines = {line.split()[0]: line for line in out.getvalue().splitlines() if line.startswith(('eager', 'int8'))}
+        self.assertIn(' 0.000', lines['eager'])
+        self.assertIn('3/3', lines['eager'])
+        self.assertIn('0/3', lines['int8'])
@@ -0,0 +1,156 @@
+import os
+import tempfile
+import threading
+from unittest.mock import patch
+from django.test import SimpleTestCase, override_settings
+from ai_integration import inference_server
+from ai_integration.inference_server import (
+    Batcher, InferenceClient, InferenceError, InferenceServer, InferenceUnavailable, infer_remote
+)
+from ai_integration.model_pool import ModelPool
+from ai_integration.utils.huggingface_utils import huggingface_text_completion
+
+class FakeTokenizer:
+    pad_token = '<pad>'
+
+    def __call__(self, text):
+        return {'input_ids': text.split()}
+
+class FakePipe:
+    def __init__(self):
+        self.tokenizer = FakeTokenizer()
+        self.calls = []
+        self.options = []
+
+    def __call__(self, inputs, **kwargs):
+        self.calls.append(inputs)
+        self.options.append(kwargs)
+        texts = inputs if isinstance(inputs, list) else [inputs]
+        if any('explode' in text for text in texts):
+            raise ValueError("input too long")
+        outputs = [[{'generated_text': f"{text} and more"}] for text in texts]
+        return outputs if isinstance(inputs, list) else outputs[0]
+
+class InferenceServerTest(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'inference.sock')
+        self.pipe = FakePipe()
+        self.loads = []
+
+        def loader(task, model_name, backend):
+            self.loads.append((task, model_name))
+            return self.pipe
+
+        self.server = InferenceServer(self.path, ModelPool(2**30, loader=loader, sizer=lambda pipe: 1),
+                                      max_batch_size=8, max_wait=0.1)
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.client = InferenceClient(self.path, timeout=5)
+
+    def test_single_request_with_usage(self):
+        [result] = self.client.infer('text-generation', 'gpt2', ['Hello there'], usage=True)
+        self.assertEqual(result['output'], [{'generated_text': 'Hello there and more'}])
+        self.assertEqual(result['usage'], {'prompt_tokens': 2, 'completion_tokens': 2})
+        self.assertEqual(self.loads, [('text-generation', 'gpt2')])
+
+    def test_concurrent_requests_are_batched(self):
+        results = {}
+
+        def call(index):
+            [item] = self.client.infer('text-generation', 'gpt2', [f"prompt {index}"])
+            results[index] = item['output'][0]['generated_text']
+
+        threads = [threading.Thread(target=call, args=(index,)) for index in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, {index: f"prompt {index} and more" for index in range(6)})
+        self.assertLess(len(self.pipe.calls), 6)
+        self.assertEqual(self.loads, [('text-generation', 'gpt2')])
+
+    def test_failed_input_does_not_fail_its_batch(self):
+        outcomes = {}
+
+        def call(text):
+            try:
+                outcomes[text] = self.client.infer('text-generation', 'gpt2', [text])[0]['output']
+            except InferenceError as e:
+                outcomes[text] = e
+
+        threads = [threading.Thread(target=call, args=(text,)) for text in ('fine', 'explode', 'also fine')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertIsInstance(outcomes['explode'], InferenceError)
+        self.assertIn('input too long', str(outcomes['explode']))
+        self.assertEqual(outcomes['fine'], [{'generated_text': 'fine and more'}])
+        self.assertEqual(outcomes['also fine'], [{'generated_text': 'also fine and more'}])
+
+    def test_ping_reports_models(self):
+        self.client.infer('text-generation', 'gpt2', ['Hello'])
+        stats = self.client.ping()
+        self.assertEqual(stats['models'][0]['model'], 'gpt2')
+        self.assertEqual(stats['batchers'][0]['inputs'], 1)
+
+    def test_text_completion_uses_server(self):
+        usage = {}
+        with override_settings(HF_INFERENCE_SOCKET=self.path), \
+                patch('ai_integration.utils.huggingface_utils.model_pool') as local_pool:
+            self.assertEqual(huggingface_text_completion("Hello", "gpt2", usage=usage), "Hello and more")
+        local_pool.get.assert_not_called()
+        self.assertEqual(usage, {'prompt_tokens': 1, 'completion_tokens': 2})
+
+class BatchOptionsTest(SimpleTestCase):
+    def test_max_length_becomes_per_input_max_new_tokens(self):
+        pipe = FakePipe()
+        batcher = Batcher(ModelPool(2**30, loader=lambda *args: pipe), 'text-generation', 'gpt2', 'eager',
+                          {'max_length': 6, 'do_sample': False}, max_batch_size=8, max_wait=0)
+        outputs = batcher._run_batched(pipe, ["one two", "three four", "five six seven"])
+
+        self.assertEqual([output[0]['generated_text'] for output in outputs],
+                         ["one two and more", "three four and more", "five six seven and more"])
+        # Same-length prompts still share a batch; none depends on its batch mates' length
+        self.assertEqual(pipe.calls, [["one two", "three four"], ["five six seven"]])
+        self.assertEqual([options['max_new_tokens'] for options in pipe.options], [4, 3])
+        self.assertTrue(all('max_length' not in options and options['do_sample'] is False for options in pipe.options))
+
+    def test_other_options_batch_together(self):
+        pipe = FakePipe()
+        batcher = Batcher(ModelPool(2**30, loader=lambda *args: pipe), 'text-generation', 'gpt2', 'eager',
+                          {'max_new_tokens': 10}, max_batch_size=8, max_wait=0)
+        batcher._run_batched(pipe, ["one", "two three"])
+        self.assertEqual(pipe.calls, [["one", "two three"]])
+        self.assertEqual(pipe.options, [{'batch_size': 2, 'max_new_tokens': 10}])
+
+class InferenceFallbackTest(SimpleTestCase):
+    def setUp(self):
+        inference_server._unavailable_until = 0.0
+        self.addCleanup(setattr, inference_server, '_unavailable_until', 0.0)
+
+    def test_unconfigured_is_unavailable(self):
+        with override_settings(HF_INFERENCE_SOCKET=''):
+            with self.assertRaises(InferenceUnavailable):
+                infer_remote('summarization', 'bart', ['text'])
+
+    @override_settings(HF_INFERENCE_SOCKET='/nonexistent/inference.sock', HF_INFERENCE_RETRY_INTERVAL=60)
+    def test_unreachable_server_backs_off(self):
+        with patch.object(InferenceClient, '_connect', wraps=InferenceClient('/nonexistent/inference.sock')._connect) as connect:
+            for _ in range(3):
+                with self.assertRaises(InferenceUnavailable):
+                    infer_remote('summarization', 'bart', ['text'])
+        self.assertEqual(connect.call_count, 1)
+
+    @override_settings(HF_INFERENCE_SOCKET='/nonexistent/inference.sock')
+    @patch('ai_integration.utils.huggingface_utils.model_pool')
+    def test_text_completion_falls_back_in_process(self, mock_pool):
+        mock_pool.get.return_value.pipe.return_value = [{"generated_text": "Hello world"}]
+        self.assertEqual(huggingface_text_completion("Hello", "gpt2"), "Hello world")
+        mock_pool.get.assert_called_with("text-generation", "gpt2", "eager")
@@ -0,0 +1,120 @@
+import os
+import sys
+import tempfile
+import types
+from io import StringIO
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from ai_integration import model_artifacts
+from ai_integration.models import AIModelConfig
+from workflows.models import Node, Workflow
+
+class FakeHub:
+    """Stand-in huggingface_hub that 'downloads' files matching allow_patterns."""
+
+    def __init__(self, root, files):
+        self.root = root
+        self.files = files
+        self.downloads = []
+
+    def module(self):
+        module = types.ModuleType('huggingface_hub')
+        module.snapshot_download = self.snapshot_download
+        return module
+
+    def snapshot_download(self, repo_id, cache_dir=None, allow_patterns=None, local_files_only=False):
+        from fnmatch import fnmatch
+
+        path = os.path.join(self.root, repo_id.replace('/', '--'))
+        if local_files_only:
+            if not os.path.isdir(path):
+                raise FileNotFoundError(repo_id)
+            return path
+        self.downloads.append((repo_id, allow_patterns))
+        os.makedirs(path, exist_ok=True)
+        for name in self.files:
+            if any(fnmatch(name, pattern) for pattern in allow_patterns):
+                with open(os.path.join(path, name), 'wb') as f:
+                    f.write(b'x' * 10)
+        return path
+
+class ModelArtifactsTest(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        settings_override = override_settings(HF_MODEL_CACHE_DIR=self.tmp.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def fake_hub(self, files):
+        hub = FakeHub(self.tmp.name, files)
+        modules = patch.dict(sys.modules, {'huggingface_hub': hub.module()})
+        modules.start()
+        self.addCleanup(modules.stop)
+        return hub
+
+    def test_prefetch_prefers_safetensors(self):
+        hub = self.fake_hub(['config.json', 'model.safetensors', 'pytorch_model.bin', 'tokenizer.json'])
+        staged = model_artifacts.prefetch('org/model')
+        self.assertTrue(staged['safetensors'])
+        self.assertEqual(sorted(os.listdir(staged['path'])), ['config.json', 'model.safetensors', 'tokenizer.json'])
+        self.assertEqual(staged['size'], 30)
+        self.assertEqual(len(hub.downloads), 1)
+
+    def test_prefetch_falls_back_to_pickled_weights(self):
+        self.fake_hub(['config.json', 'pytorch_model.bin'])
+        staged = model_artifacts.prefetch('org/legacy')
+        self.assertFalse(staged['safetensors'])
+        self.assertIn('pytorch_model.bin', os.listdir(staged['path']))
+
+    def test_resolve_uses_staged_snapshot(self):
+        self.fake_hub(['config.json', 'model.safetensors'])
+        self.assertEqual(model_artifacts.resolve('org/model'), 'org/model')
+        path = model_artifacts.prefetch('org/model')['path']
+        self.assertEqual(model_artifacts.resolve('org/model'), path)
+
+    def test_resolve_without_huggingface_hub(self):
+        with patch.dict(sys.modules, {'huggingface_hub': None}):
+            self.assertEqual(model_artifacts.resolve('gpt2'), 'gpt2')
+
+    def test_load_times_are_recorded(self):
+        model_artifacts.record_load_time('text-generation', 'gpt2', 1.23456)
+        model_artifacts.record_load_time('summarization', 'bart', 4.5)
+        model_artifacts.record_load_time('text-generation', 'gpt2', 0.5)
+        self.assertEqual(model_artifacts.read_load_times(), {
+            ('summarization', 'bart'): 4.5,
+            ('text-generation', 'gpt2'): 0.5,
+        })
+
+class ReferencedModelsTest(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='modeluser', password='modelpass123')
+        workflow = Workflow.objects.create(name="Models", user=user)
+        Node.objects.create(workflow=workflow, type='huggingface_summarization', config={}, order=1)
+        Node.objects.create(workflow=workflow, type='embedding', config={'model': 'org/embedder'}, order=2)
+        Node.objects.create(workflow=workflow, type='embedding', config={'backend': 'ollama', 'model': 'nomic'}, order=3)
+        AIModelConfig.objects.create(name="GPT2", provider="HUGGINGFACE", model_name="gpt2")
+        AIModelConfig.objects.create(name="Old", provider="HUGGINGFACE", model_name="old", is_active=False)
+        AIModelConfig.objects.create(name="Remote", provider="OLLAMA", model_name="llama2")
+
+    def test_referenced_models(self):
+        self.assertEqual(model_artifacts.referenced_models(), [
+            ('sentence-transformers', 'org/embedder'),
+            ('summarization', 'facebook/bart-large-cnn'),
+            ('text-generation', 'gpt2'),
+        ])
+
+    @patch('ai_integration.model_artifacts.prefetch')
+    def test_prefetch_command_stages_referenced_models(self, mock_prefetch):
+        mock_prefetch.side_effect = lambda model_name: {
+            'model': model_name, 'path': '/cache', 'size': 2**20, 'safetensors': True, 'seconds': 0.1
+        }
+        out = StringIO()
+        call_command('models', 'prefetch', stdout=out)
+        self.assertEqual(
+            [call.args[0] for call in mock_prefetch.call_args_list],
+            ['org/embedder', 'facebook/bart-large-cnn', 'gpt2']
+        )
+        self.assertIn('gpt2 (text-generation): 1 MiB safetensors staged', out.getvalue())
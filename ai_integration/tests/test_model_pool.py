@@ -0,0 +1,52 @@
+import threading
+from time import sleep
+from django.test import SimpleTestCase
+from ai_integration.model_pool import ModelPool
+
+class ModelPoolTest(SimpleTestCase):
+    def make_pool(self, budget=100, sizes=None):
+        self.loads = []
+        sizes = sizes or {}
+
+        def loader(task, model_name, backend):
+            self.loads.append(model_name)
+            sleep(0.01)
+            return f"pipeline:{model_name}"
+
+        return ModelPool(budget, loader=loader, sizer=lambda pipe: sizes.get(pipe.split(':')[1], 10))
+
+    def test_models_are_reused(self):
+        pool = self.make_pool()
+        first = pool.get('text-generation', 'gpt2')
+        second = pool.get('text-generation', 'gpt2')
+        self.assertIs(first, second)
+        self.assertEqual(self.loads, ['gpt2'])
+
+    def test_lru_eviction_under_budget(self):
+        pool = self.make_pool(budget=100, sizes={'a': 40, 'b': 40, 'c': 40})
+        pool.get('text-generation', 'a')
+        pool.get('text-generation', 'b')
+        pool.get('text-generation', 'a')  # a is now most recently used
+        pool.get('text-generation', 'c')
+        loaded = [entry['model'] for entry in pool.loaded()]
+        self.assertEqual(loaded, ['a', 'c'])
+        self.assertLessEqual(pool.used_bytes, 100)
+
+    def test_concurrent_requests_load_once(self):
+        pool = self.make_pool()
+        threads = [threading.Thread(target=pool.get, args=('text-generation', 'gpt2')) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.loads, ['gpt2'])
+
+    def test_backends_are_pooled_separately(self):
+        pool = self.make_pool()
+        eager = pool.get('summarization', 'bart')
+        int8 = pool.get('summarization', 'bart', 'int8')
+        self.assertIsNot(eager, int8)
+        self.assertIs(pool.get('summarization', 'bart', 'int8'), int8)
+        self.assertEqual([entry['backend'] for entry in pool.loaded()], ['eager', 'int8'])
+        self.assertTrue(pool.evict('summarization', 'bart', 'int8'))
+        self.assertEqual(self.loads, ['bart', 'bart'])
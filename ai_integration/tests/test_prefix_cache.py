@@ -0,0 +1,170 @@
+import contextlib
+import sys
+import types
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from django.test import SimpleTestCase, override_settings
+from ai_integration.prefix_cache import PrefixCache, generate_with_prefix_cache
+
+class Row(list):
+    def tolist(self):
+        return list(self)
+
+class FakeTensor:
+    """Just enough of a 2-D token id tensor for generate_with_prefix_cache."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.shape = (len(rows), len(rows[0]))
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple):
+            rows, columns = index
+            return FakeTensor([row[columns] for row in self.rows[rows]])
+        return Row(self.rows[index])
+
+    def tolist(self):
+        return self.rows
+
+class FakeModel:
+    def __init__(self):
+        self.prefills = []
+        self.generate_calls = []
+        self.generation_config = SimpleNamespace(pad_token_id=None)
+
+    def __call__(self, input_ids, past_key_values=None, use_cache=False):
+        self.prefills.append(input_ids.shape[1])
+        return SimpleNamespace(past_key_values=('kv', input_ids.shape[1]))
+
+    def generate(self, input_ids, attention_mask=None, past_key_values=None, generation_config=None, **options):
+        self.generate_calls.append((past_key_values, options))
+        config = generation_config or self.generation_config
+        new_tokens = options.get('max_new_tokens', getattr(config, 'max_new_tokens', 2))
+        return FakeTensor([input_ids.rows[0] + list(range(new_tokens))])
+
+class FakeTokenizer:
+    eos_token_id = 50256
+
+    def __call__(self, text, return_tensors=None):
+        return {'input_ids': FakeTensor([[len(word) for word in text.split()]])}
+
+    def decode(self, ids, skip_special_tokens=False):
+        return "".join(f" t{token}" for token in ids)
+
+class FakePipeline:
+    """Text generation the way the transformers pipeline does it, with its own generation defaults."""
+
+    def __init__(self, model, tokenizer, generation_config):
+        self.model, self.tokenizer, self.generation_config = model, tokenizer, generation_config
+
+    def __call__(self, prompt, **options):
+        input_ids = self.tokenizer(prompt)['input_ids']
+        options = {key: value for key, value in options.items() if key != 'num_return_sequences'}
+        output = self.model.generate(input_ids, generation_config=self.generation_config, **options)
+        return [{'generated_text': prompt + self.tokenizer.decode(output[0][input_ids.shape[1]:])}]
+
+def fake_modules():
+    torch = types.ModuleType('torch')
+    torch.no_grad = contextlib.nullcontext
+    torch.ones_like = lambda tensor: tensor
+    transformers = types.ModuleType('transformers')
+    transformers.DynamicCache = lambda: None
+    return {'torch': torch, 'transformers': transformers}
+
+def kv_size(past_key_values):
+    return past_key_values[1] * 10
+
+def words(count, tail=""):
+    return " ".join(["word"] * count) + tail
+
+class PrefixCacheTest(SimpleTestCase):
+    def setUp(self):
+        patcher = patch('ai_integration.prefix_cache.get_redis', return_value=MagicMock())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('ai_integration.prefix_cache._unavailable_until', 0.0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_prefix_admitted_after_min_uses(self):
+        cache = PrefixCache(memory_budget=10**6, block_size=4, min_uses=2, sizer=kv_size)
+        ids = list(range(10))
+        self.assertEqual(cache.admit('gpt2:eager', ids), 0)
+        # Boundaries leave the last token to prefill: 8 of 9 tokens, not 9
+        self.assertEqual(cache.admit('gpt2:eager', ids[:9]), 8)
+        self.assertEqual(cache.lookup('gpt2:eager', ids), (0, None))
+
+        cache.store('gpt2:eager', ids, 8, ('kv', 8))
+        self.assertEqual(cache.lookup('gpt2:eager', ids + [99]), (8, ('kv', 8)))
+        self.assertEqual(cache.lookup('gpt2:int8', ids), (0, None))
+        self.assertEqual(cache.lookup('gpt2:eager', [99] + ids), (0, None))
+
+    def test_lru_bounded_by_memory(self):
+        cache = PrefixCache(memory_budget=100, block_size=4, min_uses=1, sizer=kv_size)
+        first, second = [1] * 10, [2] * 10
+        cache.store('m', first, 4, ('kv', 4))
+        cache.store('m', second, 4, ('kv', 4))
+        cache.lookup('m', first)
+        cache.store('m', [3] * 10, 4, ('kv', 4))
+
+        self.assertEqual(cache.lookup('m', second), (0, None))
+        self.assertEqual(cache.lookup('m', first)[0], 4)
+        self.assertEqual(cache.used_bytes, 80)
+        self.assertEqual(cache.counters['evicted'], 1)
+        # Larger than the whole budget: never cached
+        cache.store('m', [4] * 20, 16, ('kv', 16))
+        self.assertEqual(cache.lookup('m', [4] * 20), (0, None))
+
+    def test_stats_report_hit_rates(self):
+        cache = PrefixCache(memory_budget=100, block_size=4, min_uses=1)
+        cache.count('gpt2:eager', hits=1, prompt_tokens=20, reused_tokens=16)
+        cache.count('gpt2:eager', misses=3, prompt_tokens=20)
+        with patch('ai_integration.prefix_cache.get_redis') as get_redis:
+            get_redis.return_value.hgetall.return_value = {b'gpt2:eager|hits': b'2', b'gpt2:eager|misses': b'2'}
+            stats = cache.stats()
+        self.assertEqual(stats['process']['hit_rate'], 0.25)
+        self.assertEqual(stats['process']['token_reuse_rate'], 0.4)
+        self.assertEqual(stats['shared']['gpt2:eager']['hit_rate'], 0.5)
+
+    @override_settings(HF_PREFIX_CACHE_RETRY_INTERVAL=60)
+    def test_shared_stats_skipped_after_redis_failure(self):
+        cache = PrefixCache(memory_budget=100, block_size=4, min_uses=1)
+        with patch('ai_integration.prefix_cache.get_redis', side_effect=ConnectionError("down")) as get_redis:
+            cache.count('gpt2:eager', misses=1)
+            cache.count('gpt2:eager', hits=1)
+        get_redis.assert_called_once()
+        self.assertEqual((cache.counters['misses'], cache.counters['hits']), (1, 1))
+
+    def test_generation_reuses_cached_prefix(self):
+        cache = PrefixCache(memory_budget=10**6, block_size=4, min_uses=2, sizer=kv_size)
+        model = FakeModel()
+        pipe = SimpleNamespace(model=model, tokenizer=FakeTokenizer())
+        options = {'max_length': 100, 'num_return_sequences': 1}
+
+        with patch.dict(sys.modules, fake_modules()):
+            first = generate_with_prefix_cache(pipe, 'gpt2:eager', words(9, " first"), options, cache)
+            generate_with_prefix_cache(pipe, 'gpt2:eager', words(9, " second"), options, cache)
+            generate_with_prefix_cache(pipe, 'gpt2:eager', words(9, " third"), options, cache)
+
+        self.assertEqual(first, [{'generated_text': words(9, " first") + " t0 t1"}])
+        # Second prompt admits the shared 8-token prefix; the third reuses it
+        self.assertEqual(model.prefills, [8])
+        self.assertEqual([call[0] for call in model.generate_calls], [None, ('kv', 8), ('kv', 8)])
+        self.assertEqual(model.generate_calls[0][1], {'max_length': 100, 'pad_token_id': 50256})
+        self.assertEqual(cache.counters['hits'], 1)
+        self.assertEqual(cache.counters['misses'], 2)
+        self.assertEqual(cache.counters['reused_tokens'], 8)
+        self.assertEqual(cache.counters['prompt_tokens'], 30)
+
+    def test_matches_pipeline_output(self):
+        model = FakeModel()
+        pipe = FakePipeline(model, FakeTokenizer(), SimpleNamespace(pad_token_id=50256, max_new_tokens=5))
+        cache = PrefixCache(memory_budget=10**6, block_size=4, min_uses=1, sizer=kv_size)
+        prompt = words(9, " tail")
+
+        with patch.dict(sys.modules, fake_modules()):
+            cached = [generate_with_prefix_cache(pipe, 'gpt2:eager', prompt, {'num_return_sequences': 1}, cache)
+                      for _ in range(2)]
+        expected = pipe(prompt, num_return_sequences=1)
+        self.assertEqual(cached, [expected, expected])
+        self.assertEqual(expected, [{'generated_text': prompt + " t0 t1 t2 t3 t4"}])
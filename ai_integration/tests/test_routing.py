@@ -0,0 +1,95 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+from django.test import SimpleTestCase, TestCase, override_settings
+from ai_integration.circuit_breaker import SUPERSEDED
+from ai_integration.models import AIModelConfig, ModelComparison, ModelResponse
+from ai_integration.routing import AllProvidersFailed, generate_hedged, hedge_delays
+from ai_integration.tasks import run_hedged_model_task
+
+def config(id):
+    return SimpleNamespace(id=id, provider='OLLAMA', model_name=f'model-{id}')
+
+class GenerateHedgedTest(SimpleTestCase):
+    def run_hedged(self, behaviours, delays, timeout=2):
+        """behaviours maps config id -> (seconds, answer or exception)"""
+        started, cancelled = [], []
+        self.cancel_args = {}
+
+        async def fake_generate(model_config, prompt, usage=None):
+            started.append(model_config.id)
+            seconds, outcome = behaviours[model_config.id]
+            try:
+                await asyncio.sleep(seconds)
+            except asyncio.CancelledError as e:
+                cancelled.append(model_config.id)
+                self.cancel_args[model_config.id] = e.args
+                raise
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        async def run():
+            return await generate_hedged([config(i) for i in behaviours], "prompt", delays, timeout)
+
+        with patch('ai_integration.routing.generate_coalesced', fake_generate):
+            try:
+                result = asyncio.run(run())
+            except AllProvidersFailed as e:
+                result = e
+        return result, started, cancelled
+
+    def test_fast_primary_is_not_hedged(self):
+        result, started, _ = self.run_hedged({1: (0.01, "primary"), 2: (0.01, "fallback")}, {1: 0.5, 2: 0.5})
+        self.assertEqual(result.response, "primary")
+        self.assertEqual(started, [1])
+
+    def test_slow_primary_is_hedged_and_cancelled(self):
+        result, started, cancelled = self.run_hedged({1: (1.0, "primary"), 2: (0.01, "fallback")}, {1: 0.05, 2: 0.05})
+        self.assertEqual(result.model_config.id, 2)
+        self.assertEqual(started, [1, 2])
+        self.assertEqual(cancelled, [1])
+        self.assertLess(result.latency, 0.5)
+        self.assertEqual(self.cancel_args, {1: (SUPERSEDED,)})
+
+    def test_attempts_cut_off_by_timeout_are_not_superseded(self):
+        result, started, cancelled = self.run_hedged({1: (1.0, "primary"), 2: (1.0, "fallback")}, {1: 0.05, 2: 0.05}, timeout=0.2)
+        self.assertIsInstance(result, AllProvidersFailed)
+        self.assertEqual(sorted(cancelled), [1, 2])
+        self.assertFalse(any(SUPERSEDED in args for args in self.cancel_args.values()))
+
+    def test_error_triggers_immediate_fallback(self):
+        result, started, _ = self.run_hedged(
+            {1: (0.01, RuntimeError("down")), 2: (0.01, "fallback")}, {1: 10, 2: 10}
+        )
+        self.assertEqual(result.response, "fallback")
+        self.assertLess(result.latency, 1)
+
+    def test_all_failures_raise(self):
+        result, _, _ = self.run_hedged({1: (0.01, RuntimeError("down")), 2: (0.01, RuntimeError("also down"))}, {})
+        self.assertIsInstance(result, AllProvidersFailed)
+        self.assertEqual(set(result.errors), {1, 2})
+
+@override_settings(AI_HEDGE_MIN_SAMPLES=5, AI_HEDGE_DEFAULT_DELAY=3)
+class HedgeDelaysTest(TestCase):
+    def test_uses_observed_p95_with_enough_samples(self):
+        comparison = ModelComparison.objects.create(prompt="p")
+        observed = AIModelConfig.objects.create(name="Observed", provider="OLLAMA", model_name="a")
+        new = AIModelConfig.objects.create(name="New", provider="OLLAMA", model_name="b")
+        ModelResponse.objects.bulk_create([
+            ModelResponse(comparison=comparison, model_config=observed, response="r", latency=latency)
+            for latency in [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 5.0]
+        ])
+
+        delays = hedge_delays([observed, new])
+        self.assertEqual(delays[observed.id], 5.0)
+        self.assertEqual(delays[new.id], 3)
+        self.assertEqual(hedge_delays([observed], override=0.25), {observed.id: 0.25})
+
+class HedgedModelTaskTest(TestCase):
+    def test_no_remaining_configs(self):
+        comparison = ModelComparison.objects.create(prompt="p")
+        result = run_hedged_model_task(comparison.id, [9999])
+        self.assertEqual(result['errors'], {9999: "Unknown model config"})
+        self.assertIsNone(result['model_config_id'])
+        self.assertFalse(ModelResponse.objects.filter(comparison=comparison).exists())
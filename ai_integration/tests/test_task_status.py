@@ -0,0 +1,115 @@
+import asyncio
+import uuid
+from unittest.mock import patch
+from celery import Celery
+from celery.backends.cache import CacheBackend
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from ai_integration.models import ModelComparison
+from ai_integration.task_status import aggregate_status, fetch_statuses, status_version, wait_for_change
+
+class FakeApp:
+    def __init__(self):
+        self.backend = CacheBackend(app=Celery(set_as_current=False), url='memory://')
+
+class TaskStatusTest(SimpleTestCase):
+    def setUp(self):
+        self.app = FakeApp()
+        patcher = patch('ai_integration.task_status.current_app', self.app)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_fetch_statuses_uses_one_mget(self):
+        self.app.backend.store_result('done', 'answer', 'SUCCESS')
+        self.app.backend.store_result('running', {'partial_response': 'ans'}, 'PROGRESS')
+        self.app.backend.store_result('broken', ValueError('boom'), 'FAILURE')
+        with patch.object(self.app.backend, 'mget', wraps=self.app.backend.mget) as mget:
+            statuses = fetch_statuses(['done', 'running', 'broken', 'unknown'])
+        mget.assert_called_once()
+        self.assertEqual([entry['status'] for entry in statuses], ['SUCCESS', 'PROGRESS', 'FAILURE', 'PENDING'])
+        self.assertEqual(statuses[0]['result'], 'answer')
+        self.assertEqual(statuses[1]['progress'], {'partial_response': 'ans'})
+        self.assertEqual(statuses[2]['error'], 'boom')
+
+    def test_aggregate_status(self):
+        def entries(*names):
+            return [{'status': name} for name in names]
+        self.assertEqual(aggregate_status(entries('SUCCESS', 'SUCCESS')), 'SUCCESS')
+        self.assertEqual(aggregate_status(entries('SUCCESS', 'FAILURE')), 'FAILURE')
+        self.assertEqual(aggregate_status(entries('PENDING', 'PENDING')), 'PENDING')
+        self.assertEqual(aggregate_status(entries('SUCCESS', 'PENDING')), 'PROGRESS')
+
+    @override_settings(AI_TASK_POLL_INTERVAL=0.01)
+    def test_wait_for_change_returns_when_status_changes(self):
+        task_id = uuid.uuid4().hex
+        version = status_version(fetch_statuses([task_id]))
+
+        async def finish_later():
+            await asyncio.sleep(0.05)
+            self.app.backend.store_result(task_id, 'answer', 'SUCCESS')
+
+        async def main():
+            waiter = asyncio.ensure_future(wait_for_change([task_id], version, 5))
+            await finish_later()
+            return await waiter
+
+        statuses, changed = asyncio.run(main())
+        self.assertTrue(changed)
+        self.assertEqual(statuses[0]['status'], 'SUCCESS')
+
+    @override_settings(AI_TASK_POLL_INTERVAL=0.01)
+    def test_wait_for_change_times_out(self):
+        task_id = uuid.uuid4().hex
+        version = status_version(fetch_statuses([task_id]))
+        statuses, changed = asyncio.run(wait_for_change([task_id], version, 0.05))
+        self.assertFalse(changed)
+        self.assertEqual(statuses[0]['status'], 'PENDING')
+
+class TaskStatusViewTest(APITestCase):
+    @patch('ai_integration.views.fetch_statuses')
+    def test_bulk_status(self, mock_fetch):
+        mock_fetch.return_value = [
+            {'task_id': 'a', 'status': 'SUCCESS', 'result': 'x', 'progress': None},
+            {'task_id': 'b', 'status': 'PENDING', 'result': None, 'progress': None},
+        ]
+        response = self.client.get(reverse('taskstatus-bulk'), {'ids': 'a,b'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_fetch.assert_called_once_with(['a', 'b'])
+        self.assertEqual(response.data['status'], 'PROGRESS')
+        self.assertEqual(response.data['counts'], {'SUCCESS': 1, 'PENDING': 1})
+
+    def test_bulk_status_requires_ids(self):
+        response = self.client.post(reverse('taskstatus-bulk'), {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch('ai_integration.views.fetch_statuses')
+    def test_comparison_status_uses_stored_task_ids(self, mock_fetch):
+        comparison = ModelComparison.objects.create(prompt="Hello", task_ids=['a'])
+        mock_fetch.return_value = [{'task_id': 'a', 'status': 'SUCCESS', 'result': 'x', 'progress': None}]
+        response = self.client.get(reverse('modelcomparison-task-status', args=[comparison.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_fetch.assert_called_once_with(['a'])
+        self.assertEqual(response.data['status'], 'SUCCESS')
+
+    @patch('ai_integration.views.wait_for_change')
+    def test_poll(self, mock_wait):
+        async def fake_wait(task_ids, version, timeout):
+            return [{'task_id': 'a', 'status': 'SUCCESS', 'result': 'x', 'progress': None}], True
+        mock_wait.side_effect = fake_wait
+        response = self.client.get(reverse('taskstatus-poll'), {'ids': 'a', 'version': 'old', 'timeout': 100})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json()['changed'])
+        mock_wait.assert_called_once_with(['a'], 'old', 30.0)
+
+    def test_poll_rejects_non_integer_comparison(self):
+        response = self.client.get(reverse('taskstatus-poll'), {'comparison': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch('ai_integration.views.wait_for_change')
+    def test_poll_rejects_non_finite_timeout(self, mock_wait):
+        for timeout in ('nan', 'inf', '-inf', 'soon'):
+            response = self.client.get(reverse('taskstatus-poll'), {'ids': 'a', 'timeout': timeout})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        mock_wait.assert_not_called()
@@ -0,0 +1,222 @@
+import asyncio
+import threading
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from ai_integration.models import AIModelConfig, ComparisonMatrix, ModelComparison, ModelResponse
+from ai_integration.tasks import _stream_with_progress, run_ai_model_task, run_model_comparison_task, run_matrix_task
+from ai_integration.cache import response_cache
+
+def without_redis(test):
+    """Run coalescing and circuit breakers as if Redis were down, instead of reaching for a real one."""
+    for target in ('ai_integration.coalescing.get_async_redis', 'ai_integration.circuit_breaker.get_async_redis'):
+        patcher = patch(target, side_effect=ConnectionError("no redis"))
+        patcher.start()
+        test.addCleanup(patcher.stop)
+    for target in ('ai_integration.coalescing._unavailable_until', 'ai_integration.cache._unavailable_until'):
+        patcher = patch(target, 0.0)
+        patcher.start()
+        test.addCleanup(patcher.stop)
+
+@override_settings(AI_CACHE_ENABLED=False)
+class ModelComparisonTaskTest(TestCase):
+    def setUp(self):
+        without_redis(self)
+        self.fast = AIModelConfig.objects.create(name="Fast", provider="OLLAMA", model_name="fast")
+        self.slow = AIModelConfig.objects.create(name="Slow", provider="OLLAMA", model_name="slow")
+        self.comparison = ModelComparison.objects.create(prompt="Compare me")
+
+    def test_concurrent_comparison_with_timeout(self):
+        async def fake_generate(model_config, prompt, usage=None):
+            if model_config.model_name == "slow":
+                await asyncio.sleep(5)
+            return f"{model_config.model_name}: {prompt}"
+
+        with patch('ai_integration.providers.generate', fake_generate):
+            result = run_model_comparison_task(self.comparison.id, [self.fast.id, self.slow.id], 0.2)
+
+        self.assertEqual(result['responses'][self.fast.id], "fast: Compare me")
+        self.assertIn("Timed out", result['responses'][self.slow.id])
+
+        responses = ModelResponse.objects.filter(comparison=self.comparison)
+        self.assertEqual(responses.count(), 2)
+        self.assertLess(responses.get(model_config=self.slow).latency, 1)
+
+@override_settings(AI_CACHE_ENABLED=False)
+class StreamingModelTaskTest(TestCase):
+    def setUp(self):
+        without_redis(self)
+        self.config = AIModelConfig.objects.create(name="Ollama", provider="OLLAMA", model_name="llama2")
+        self.comparison = ModelComparison.objects.create(prompt="Stream me")
+
+    def test_streaming_records_time_to_first_token(self):
+        def fake_stream(config, prompt, usage):
+            async def chunks():
+                await asyncio.sleep(0.05)
+                yield "Hello"
+                yield " world"
+                usage["completion_tokens"] = 2
+            return chunks()
+
+        with patch.dict('ai_integration.providers.STREAMING_PROVIDERS', {'OLLAMA': fake_stream}):
+            response = run_ai_model_task(self.config.id, "Stream me", self.comparison.id, stream=True)
+
+        self.assertEqual(response, "Hello world")
+        model_response = ModelResponse.objects.get(comparison=self.comparison)
+        self.assertTrue(model_response.streamed)
+        self.assertEqual(model_response.completion_tokens, 2)
+        self.assertGreaterEqual(model_response.time_to_first_token, 0.05)
+        self.assertLessEqual(model_response.time_to_first_token, model_response.latency)
+        self.assertIsNotNone(model_response.tokens_per_second)
+
+    @patch('ai_integration.tasks.PROGRESS_INTERVAL', 0.02)
+    def test_progress_is_reported_from_the_task_thread(self):
+        def fake_stream(config, prompt, usage):
+            async def chunks():
+                for word in ["one", " two", " three"]:
+                    yield word
+                    await asyncio.sleep(0.1)
+            return chunks()
+
+        updates = []
+        task = SimpleNamespace(
+            request=SimpleNamespace(id='task-1'),
+            update_state=lambda state, meta: updates.append((threading.current_thread(), meta['partial_response']))
+        )
+        with patch.dict('ai_integration.providers.STREAMING_PROVIDERS', {'OLLAMA': fake_stream}):
+            result = _stream_with_progress(task, self.config, "Stream me")
+
+        self.assertEqual(result.response, "one two three")
+        self.assertEqual([text for _, text in updates], ["one", "one two", "one two three"])
+        self.assertTrue(all(thread is threading.current_thread() for thread, _ in updates))
+
+
+class CachedModelTaskTest(TestCase):
+    def setUp(self):
+        without_redis(self)
+        self.config = AIModelConfig.objects.create(name="Ollama", provider="OLLAMA", model_name="cached-llama")
+        self.comparison = ModelComparison.objects.create(prompt="Cache me")
+        response_cache.local.clear()
+        redis_patcher = patch('ai_integration.cache.get_redis', side_effect=ConnectionError("no redis"))
+        redis_patcher.start()
+        self.addCleanup(redis_patcher.stop)
+
+    def test_second_call_served_from_cache(self):
+        calls = []
+
+        async def fake_generate(model_config, prompt, usage=None):
+            calls.append(prompt)
+            return "fresh response"
+
+        with patch('ai_integration.providers.generate', fake_generate):
+            run_ai_model_task(self.config.id, "Cache me", self.comparison.id)
+            run_ai_model_task(self.config.id, "  Cache   me ", self.comparison.id)
+            run_model_comparison_task(self.comparison.id, [self.config.id])
+
+        self.assertEqual(len(calls), 1)
+        responses = ModelResponse.objects.filter(comparison=self.comparison).order_by('id')
+        self.assertEqual([r.cached for r in responses], [False, True, True])
+        self.assertTrue(all(r.response == "fresh response" for r in responses))
+
+    def test_bypass_skips_cache(self):
+        calls = []
+
+        async def fake_generate(model_config, prompt, usage=None):
+            calls.append(prompt)
+            return "fresh response"
+
+        with patch('ai_integration.providers.generate', fake_generate):
+            run_ai_model_task(self.config.id, "Cache me", self.comparison.id, cache='bypass')
+            run_ai_model_task(self.config.id, "Cache me", self.comparison.id, cache='bypass')
+
+        self.assertEqual(len(calls), 2)
+        self.assertFalse(ModelResponse.objects.filter(cached=True).exists())
+
+@override_settings(AI_CACHE_ENABLED=False, AI_MATRIX_BATCH_SIZE=2, AI_PROVIDER_CONCURRENCY={'OLLAMA': 1})
+class MatrixTaskTest(TestCase):
+    def setUp(self):
+        without_redis(self)
+        self.first = AIModelConfig.objects.create(name="First", provider="OLLAMA", model_name="first")
+        self.second = AIModelConfig.objects.create(name="Second", provider="OLLAMA", model_name="second")
+        self.matrix = ComparisonMatrix.objects.create(total_prompts=3)
+        self.matrix.model_configs.set([self.first, self.second])
+        ModelComparison.objects.bulk_create(
+            [ModelComparison(prompt=f"Prompt {i}", matrix=self.matrix) for i in range(3)]
+        )
+
+    def test_runs_every_prompt_against_every_model_within_concurrency(self):
+        active = []
+        peak = [0]
+
+        async def fake_generate(model_config, prompt, usage=None):
+            active.append(1)
+            peak[0] = max(peak[0], len(active))
+            await asyncio.sleep(0.01)
+            active.pop()
+            return f"{model_config.model_name}: {prompt}"
+
+        with patch('ai_integration.providers.generate', fake_generate):
+            result = run_matrix_task(self.matrix.id)
+
+        self.assertEqual(result['prompts'], 3)
+        self.assertEqual(peak[0], 1)
+        responses = ModelResponse.objects.filter(comparison__matrix=self.matrix)
+        self.assertEqual(responses.count(), 6)
+        self.assertTrue(responses.filter(model_config=self.second, response="second: Prompt 2").exists())
+
+        self.matrix.refresh_from_db()
+        self.assertEqual(self.matrix.status, 'completed')
+        self.assertEqual(self.matrix.completed_prompts, 3)
+        self.assertIsNotNone(self.matrix.completed_at)
+
+    def test_resume_skips_answered_prompts(self):
+        answered = self.matrix.comparisons.order_by('id').first()
+        ModelResponse.objects.create(comparison=answered, model_config=self.first, response="done", latency=1)
+        prompts = []
+
+        async def fake_generate(model_config, prompt, usage=None):
+            prompts.append(prompt)
+            return "ok"
+
+        with patch('ai_integration.providers.generate', fake_generate):
+            result = run_matrix_task(self.matrix.id)
+
+        self.assertEqual(result['prompts'], 2)
+        self.assertNotIn(answered.prompt, prompts)
+
+@override_settings(AI_CACHE_ENABLED=False, AI_TOKENIZER_FALLBACK_MODEL='')
+class UsageAccountingTaskTest(TestCase):
+    def setUp(self):
+        without_redis(self)
+        self.config = AIModelConfig.objects.create(
+            name="Priced", provider="OLLAMA", model_name="priced",
+            prompt_cost_per_1k=Decimal('1.0'), completion_cost_per_1k=Decimal('2.0')
+        )
+        self.comparison = ModelComparison.objects.create(prompt="Count my tokens")
+
+    def test_records_reported_usage_and_cost(self):
+        async def fake_generate(model_config, prompt, usage=None):
+            usage.update({'prompt_tokens': 100, 'completion_tokens': 500})
+            await asyncio.sleep(0.01)
+            return "answer"
+
+        with patch('ai_integration.providers.generate', fake_generate):
+            run_ai_model_task(self.config.id, self.comparison.prompt, self.comparison.id)
+
+        response = ModelResponse.objects.get(comparison=self.comparison)
+        self.assertEqual(response.prompt_tokens, 100)
+        self.assertEqual(response.completion_tokens, 500)
+        self.assertEqual(response.cost, Decimal('1.100000'))
+        self.assertGreater(response.tokens_per_second, 0)
+
+    def test_counts_tokens_locally_when_not_reported(self):
+        async def fake_generate(model_config, prompt, usage=None):
+            return "three word answer"
+
+        with patch('ai_integration.providers.generate', fake_generate):
+            run_model_comparison_task(self.comparison.id, [self.config.id])
+
+        response = ModelResponse.objects.get(comparison=self.comparison)
+        self.assertEqual(response.prompt_tokens, 3)
+        self.assertEqual(response.completion_tokens, 3)
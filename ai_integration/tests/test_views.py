@@ -0,0 +1,115 @@
+import json
+from unittest.mock import patch
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from ai_integration.models import AIModelConfig, ComparisonMatrix, ModelComparison, ModelResponse
+
+class CompareModelsViewTest(APITestCase):
+    def setUp(self):
+        self.config1 = AIModelConfig.objects.create(
+            name="Model 1", provider="OPENAI", model_name="gpt-4", api_key="key1"
+        )
+        self.config2 = AIModelConfig.objects.create(
+            name="Model 2", provider="OLLAMA", model_name="llama2"
+        )
+        self.url = reverse('modelcomparison-compare-models')
+
+    @patch('ai_integration.views.run_ai_model_task.delay')
+    def test_per_model_mode_dispatches_task_per_model(self, mock_task):
+        mock_task.return_value.id = 'task-id'
+        data = {"prompt": "Hello", "model_ids": [self.config1.id, self.config2.id]}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(mock_task.call_count, 2)
+        self.assertEqual(len(response.data['task_ids']), 2)
+
+    @patch('ai_integration.views.run_model_comparison_task.delay')
+    def test_concurrent_mode_dispatches_single_task(self, mock_task):
+        mock_task.return_value.id = 'fanout-task-id'
+        data = {
+            "prompt": "Hello",
+            "model_ids": [self.config1.id, self.config2.id],
+            "mode": "concurrent",
+            "timeout": 5
+        }
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        comparison_id = response.data['comparison_id']
+        mock_task.assert_called_once_with(
+            comparison_id, [self.config1.id, self.config2.id], 5.0, stream=False, cache='use'
+        )
+        self.assertEqual(response.data['task_ids'], ['fanout-task-id'])
+
+    @patch('ai_integration.views.run_ai_model_task.delay')
+    def test_unknown_model_ids_rejected_before_dispatch(self, mock_task):
+        data = {"prompt": "Hello", "model_ids": [self.config1.id, 9999]}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        mock_task.assert_not_called()
+        self.assertEqual(ModelComparison.objects.count(), 0)
+
+class ModelHealthViewTest(APITestCase):
+    def setUp(self):
+        self.config = AIModelConfig.objects.create(
+            name="Model 1", provider="OPENAI", model_name="gpt-4", api_key="key1"
+        )
+
+    @patch('ai_integration.views.circuit_breaker.status')
+    def test_health_reports_breaker_state(self, mock_status):
+        mock_status.return_value = {'state': 'open', 'error_rate': 0.8}
+        response = self.client.get(reverse('aimodelconfig-health', args=[self.config.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['breaker']['state'], 'open')
+        mock_status.assert_called_once_with(self.config.id)
+
+    @patch('ai_integration.views.circuit_breaker.status', return_value={'state': 'closed'})
+    def test_health_lists_active_configs(self, mock_status):
+        response = self.client.get(reverse('aimodelconfig-health-all'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([entry['id'] for entry in response.data], [self.config.id])
+
+class ComparisonMatrixViewTest(APITestCase):
+    def setUp(self):
+        self.config = AIModelConfig.objects.create(name="Model", provider="OLLAMA", model_name="llama2")
+        self.url = reverse('comparisonmatrix-list')
+
+    @patch('ai_integration.views.run_matrix_task.delay')
+    def test_create_from_json_prompts(self, mock_task):
+        mock_task.return_value.id = 'matrix-task-id'
+        data = {"prompts": ["One", "Two"], "model_ids": [self.config.id]}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        matrix = ComparisonMatrix.objects.get(id=response.data['id'])
+        self.assertEqual(matrix.total_prompts, 2)
+        self.assertEqual(response.data['task_id'], 'matrix-task-id')
+        self.assertEqual(sorted(matrix.comparisons.values_list('prompt', flat=True)), ["One", "Two"])
+        mock_task.assert_called_once_with(matrix.id, None, cache='use')
+
+    @patch('ai_integration.views.run_matrix_task.delay')
+    def test_create_from_ndjson_upload(self, mock_task):
+        mock_task.return_value.id = 'matrix-task-id'
+        upload = SimpleUploadedFile(
+            "prompts.ndjson", b'"One"\n{"prompt": "Two"}\n\n', content_type='application/x-ndjson'
+        )
+        response = self.client.post(self.url, {"file": upload, "model_ids": [self.config.id]}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['total_prompts'], 2)
+
+    def test_rejects_bad_ndjson_line(self):
+        upload = SimpleUploadedFile("prompts.ndjson", b'"One"\nnot json\n')
+        response = self.client.post(self.url, {"file": upload, "model_ids": [self.config.id]}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(ComparisonMatrix.objects.count(), 0)
+
+    def test_export_streams_ndjson(self):
+        matrix = ComparisonMatrix.objects.create(total_prompts=1)
+        comparison = ModelComparison.objects.create(prompt="One", matrix=matrix)
+        ModelResponse.objects.create(comparison=comparison, model_config=self.config, response="Answer", latency=0.5)
+        response = self.client.get(reverse('comparisonmatrix-export', args=[matrix.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['response'], "Answer")
+        self.assertEqual(json.loads(lines[0])['prompt'], "One")
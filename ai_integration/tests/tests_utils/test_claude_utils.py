@@ -0,0 +1,43 @@
+import asyncio
+import json
+import httpx
+from django.test import SimpleTestCase
+from ai_integration.utils.claude_utils import claude_messages_completion, claude_messages_stream
+
+def sse(*events):
+    return "".join(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n" for event in events)
+
+class ClaudeMessagesTest(SimpleTestCase):
+    def test_messages_completion(self):
+        def handler(request):
+            self.assertEqual(request.url.path, "/v1/messages")
+            return httpx.Response(200, json={"content": [{"type": "text", "text": "Hello human"}]})
+
+        async def run():
+            async with httpx.AsyncClient(base_url="https://api.anthropic.com/v1", transport=httpx.MockTransport(handler)) as client:
+                return await claude_messages_completion(client, "Hi")
+
+        self.assertEqual(asyncio.run(run()), "Hello human")
+
+    def test_messages_stream(self):
+        body = sse(
+            {"type": "message_start", "message": {"usage": {"input_tokens": 7}}},
+            {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "Hello"}},
+            {"type": "content_block_delta", "delta": {"type": "text_delta", "text": " human"}},
+            {"type": "message_delta", "usage": {"output_tokens": 2}},
+            {"type": "message_stop"},
+        )
+
+        def handler(request):
+            self.assertTrue(json.loads(request.content)["stream"])
+            return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+
+        async def run():
+            usage = {}
+            async with httpx.AsyncClient(base_url="https://api.anthropic.com/v1", transport=httpx.MockTransport(handler)) as client:
+                chunks = [chunk async for chunk in claude_messages_stream(client, "Hi", usage=usage)]
+            return chunks, usage
+
+        chunks, usage = asyncio.run(run())
+        self.assertEqual(chunks, ["Hello", " human"])
+        self.assertEqual(usage, {"prompt_tokens": 7, "completion_tokens": 2})
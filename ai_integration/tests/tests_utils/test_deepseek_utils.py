@@ -0,0 +1,26 @@
+import asyncio
+import json
+import httpx
+from django.test import SimpleTestCase
+from ai_integration.utils.deepseek__utils import deepseek_chat_stream
+
+class DeepSeekChatStreamTest(SimpleTestCase):
+    def test_chat_stream(self):
+        events = [
+            {"choices": [{"delta": {"role": "assistant"}}]},
+            {"choices": [{"delta": {"content": "Deep"}}]},
+            {"choices": [{"delta": {"content": "Seek"}}]},
+            {"choices": [], "usage": {"prompt_tokens": 3, "completion_tokens": 2}},
+        ]
+        body = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+
+        async def run():
+            usage = {}
+            transport = httpx.MockTransport(lambda request: httpx.Response(200, text=body))
+            async with httpx.AsyncClient(base_url="https://api.deepseek.com/v1", transport=transport) as client:
+                chunks = [chunk async for chunk in deepseek_chat_stream(client, "Hi", usage=usage)]
+            return chunks, usage
+
+        chunks, usage = asyncio.run(run())
+        self.assertEqual(chunks, ["Deep", "Seek"])
+        self.assertEqual(usage["completion_tokens"], 2)
@@ -0,0 +1,21 @@
+from unittest.mock import MagicMock, patch
+from django.test import SimpleTestCase
+from ai_integration.utils.huggingface_utils import huggingface_text_completion
+
+class HuggingFaceTextCompletionTest(SimpleTestCase):
+    @patch('ai_integration.utils.huggingface_utils.model_pool')
+    def test_uses_pooled_pipeline(self, mock_pool):
+        entry = MagicMock()
+        entry.pipe.return_value = [{"generated_text": "Hello world"}]
+        mock_pool.get.return_value = entry
+
+        self.assertEqual(huggingface_text_completion("Hello", "gpt2"), "Hello world")
+        self.assertEqual(huggingface_text_completion("Hello", "gpt2"), "Hello world")
+
+        mock_pool.get.assert_called_with("text-generation", "gpt2", "eager")
+        self.assertEqual(entry.pipe.call_count, 2)
+
+    @patch('ai_integration.utils.huggingface_utils.model_pool')
+    def test_errors_return_none(self, mock_pool):
+        mock_pool.get.side_effect = OSError("model not found")
+        self.assertIsNone(huggingface_text_completion("Hello", "missing-model"))
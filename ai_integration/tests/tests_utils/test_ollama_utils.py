@@ -0,0 +1,39 @@
+import asyncio
+import json
+import httpx
+from django.test import SimpleTestCase
+from ai_integration.utils.ollama_utils import ollama_generate, ollama_generate_stream
+
+class OllamaGenerateTest(SimpleTestCase):
+    def test_generate(self):
+        def handler(request):
+            self.assertEqual(request.url.path, "/api/generate")
+            body = json.loads(request.content)
+            self.assertEqual(body["model"], "llama2")
+            self.assertFalse(body["stream"])
+            return httpx.Response(200, json={"response": "Generated text"})
+
+        async def run():
+            async with httpx.AsyncClient(base_url="http://localhost:11434", transport=httpx.MockTransport(handler)) as client:
+                return await ollama_generate(client, "Hello", "llama2")
+
+        self.assertEqual(asyncio.run(run()), "Generated text")
+
+    def test_generate_stream(self):
+        lines = [
+            {"response": "Gen", "done": False},
+            {"response": "erated", "done": False},
+            {"response": "", "done": True, "prompt_eval_count": 4, "eval_count": 2},
+        ]
+        body = "\n".join(json.dumps(line) for line in lines) + "\n"
+
+        async def run():
+            usage = {}
+            transport = httpx.MockTransport(lambda request: httpx.Response(200, text=body))
+            async with httpx.AsyncClient(base_url="http://localhost:11434", transport=transport) as client:
+                chunks = [chunk async for chunk in ollama_generate_stream(client, "Hello", usage=usage)]
+            return chunks, usage
+
+        chunks, usage = asyncio.run(run())
+        self.assertEqual(chunks, ["Gen", "erated"])
+        self.assertEqual(usage, {"prompt_tokens": 4, "completion_tokens": 2})
@@ -0,0 +1,45 @@
+import asyncio
+import json
+import httpx
+from django.test import SimpleTestCase
+from ai_integration.utils.openai_utils import openai_chat_completion
+
+class OpenAIChatCompletionTest(SimpleTestCase):
+    def test_chat_completion(self):
+        def handler(request):
+            self.assertEqual(request.url.path, "/v1/chat/completions")
+            body = json.loads(request.content)
+            self.assertEqual(body["model"], "gpt-4")
+            self.assertEqual(body["messages"], [{"role": "user", "content": "Hello"}])
+            return httpx.Response(200, json={"choices": [{"message": {"content": "Hi there"}}]})
+
+        async def run():
+            async with httpx.AsyncClient(base_url="https://api.openai.com/v1", transport=httpx.MockTransport(handler)) as client:
+                return await openai_chat_completion(client, "Hello", "gpt-4")
+
+        self.assertEqual(asyncio.run(run()), "Hi there")
+
+    def test_chat_completion_reports_usage(self):
+        def handler(request):
+            return httpx.Response(200, json={
+                "choices": [{"message": {"content": "Hi there"}}],
+                "usage": {"prompt_tokens": 5, "completion_tokens": 2}
+            })
+
+        usage = {}
+
+        async def run():
+            async with httpx.AsyncClient(base_url="https://api.openai.com/v1", transport=httpx.MockTransport(handler)) as client:
+                return await openai_chat_completion(client, "Hello", usage=usage)
+
+        asyncio.run(run())
+        self.assertEqual(usage, {"prompt_tokens": 5, "completion_tokens": 2})
+
+    def test_chat_completion_http_error(self):
+        async def run():
+            transport = httpx.MockTransport(lambda request: httpx.Response(401, json={"error": "bad key"}))
+            async with httpx.AsyncClient(base_url="https://api.openai.com/v1", transport=transport) as client:
+                return await openai_chat_completion(client, "Hello")
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            asyncio.run(run())
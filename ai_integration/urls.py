@@ -3,14 +3,21 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     AIModelConfigViewSet,
     ModelComparisonViewSet,
-    TaskStatusViewSet
+    ComparisonMatrixViewSet,
+    UsageViewSet,
+    TaskStatusViewSet,
+    poll_task_statuses
 )
 
 router = DefaultRouter()
 router.register(r'models', AIModelConfigViewSet, basename='aimodelconfig')
 router.register(r'comparisons', ModelComparisonViewSet, basename='modelcomparison')
+router.register(r'matrices', ComparisonMatrixViewSet, basename='comparisonmatrix')
+router.register(r'usage', UsageViewSet, basename='usage')
 router.register(r'tasks', TaskStatusViewSet, basename='taskstatus')
 
 urlpatterns = [
+    # Before the router so 'poll' isn't taken for a task id
+    path('tasks/poll/', poll_task_statuses, name='taskstatus-poll'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,16 +1,63 @@
-import anthropic
-from django.conf import settings
+import logging
 from typing import Optional
+from ..clients import get_client, run_sync, iter_sse_json
+
+logger = logging.getLogger(__name__)
+
+async def claude_messages_completion(client, prompt: str, model: str = "claude-2", max_tokens: int = 1000, usage: Optional[dict] = None) -> str:
+    response = await client.post(
+        "/messages",
+        json={
+            "model": model,
+            "max_tokens": max_tokens,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+    )
+    response.raise_for_status()
+    data = response.json()
+    if usage is not None and data.get("usage"):
+        usage["prompt_tokens"] = data["usage"].get("input_tokens")
+        usage["completion_tokens"] = data["usage"].get("output_tokens")
+    return "".join(
+        block.get("text", "") for block in data["content"] if block.get("type") == "text"
+    )
+
+async def claude_messages_stream(client, prompt: str, model: str = "claude-2", max_tokens: int = 1000, usage: Optional[dict] = None):
+    """
+    Stream a Messages API response, yielding text deltas. When a usage dict
+    is given it is filled with prompt_tokens/completion_tokens.
+    """
+    async with client.stream(
+        "POST",
+        "/messages",
+        json={
+            "model": model,
+            "max_tokens": max_tokens,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": True
+        }
+    ) as response:
+        response.raise_for_status()
+        async for event in iter_sse_json(response):
+            event_type = event.get("type")
+            if event_type == "content_block_delta":
+                text = event.get("delta", {}).get("text")
+                if text:
+                    yield text
+            elif usage is not None and event_type == "message_start":
+                input_tokens = event.get("message", {}).get("usage", {}).get("input_tokens")
+                if input_tokens is not None:
+                    usage["prompt_tokens"] = input_tokens
+            elif usage is not None and event_type == "message_delta":
+                output_tokens = event.get("usage", {}).get("output_tokens")
+                if output_tokens is not None:
+                    usage["completion_tokens"] = output_tokens
 
 def claude_text_completion(prompt: str, model: str = "claude-2") -> Optional[str]:
     try:
-        client = anthropic.Client(settings.ANTHROPIC_API_KEY)
-        response = client.completions.create(
-            prompt=f"{anthropic.HUMAN_PROMPT} {prompt}{anthropic.AI_PROMPT}",
-            model=model,
-            max_tokens_to_sample=1000
-        )
-        return response.completion
+        async def call():
+            return await claude_messages_completion(get_client('ANTHROPIC'), prompt, model)
+        return run_sync(call())
     except Exception as e:
-        print(f"Claude API Error: {e}")
-        return None
\ No newline at end of file
+        logger.error(f"Claude API Error: {e}")
+        return None
@@ -1,25 +1,54 @@
-import requests
-from django.conf import settings
+import logging
 from typing import Optional
+from ..clients import get_client, run_sync, iter_sse_json
 
-def deepseek_text_completion(prompt: str, model: str = "deepseek-chat") -> Optional[str]:
-    try:
-        headers = {
-            "Authorization": f"Bearer {settings.DEEPSEEK_API_KEY}",
-            "Content-Type": "application/json"
+logger = logging.getLogger(__name__)
+
+async def deepseek_chat_completion(client, prompt: str, model: str = "deepseek-chat", temperature: float = 0.7, usage: Optional[dict] = None) -> str:
+    response = await client.post(
+        "/chat/completions",
+        json={
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature
         }
-        payload = {
+    )
+    response.raise_for_status()
+    data = response.json()
+    if usage is not None and data.get("usage"):
+        usage.update(data["usage"])
+    return data["choices"][0]["message"]["content"]
+
+async def deepseek_chat_stream(client, prompt: str, model: str = "deepseek-chat", temperature: float = 0.7, usage: Optional[dict] = None):
+    """
+    Stream a chat completion (OpenAI-compatible SSE), yielding text deltas.
+    When a usage dict is given it is filled with the reported token counts.
+    """
+    async with client.stream(
+        "POST",
+        "/chat/completions",
+        json={
             "model": model,
             "messages": [{"role": "user", "content": prompt}],
-            "temperature": 0.7
+            "temperature": temperature,
+            "stream": True,
+            "stream_options": {"include_usage": True}
         }
-        response = requests.post(
-            "https://api.deepseek.com/v1/chat/completions",
-            headers=headers,
-            json=payload
-        )
+    ) as response:
         response.raise_for_status()
-        return response.json()["choices"][0]["message"]["content"]
+        async for event in iter_sse_json(response):
+            if event.get("usage") and usage is not None:
+                usage.update(event["usage"])
+            for choice in event.get("choices") or []:
+                content = (choice.get("delta") or {}).get("content")
+                if content:
+                    yield content
+
+def deepseek_text_completion(prompt: str, model: str = "deepseek-chat") -> Optional[str]:
+    try:
+        async def call():
+            return await deepseek_chat_completion(get_client('DEEPSEEK'), prompt, model)
+        return run_sync(call())
     except Exception as e:
-        print(f"DeepSeek API Error: {e}")
-        return None
\ No newline at end of file
+        logger.error(f"DeepSeek API Error: {e}")
+        return None
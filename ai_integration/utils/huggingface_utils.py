@@ -1,11 +1,33 @@
-from transformers import pipeline
+import logging
 from typing import Optional
+from ..model_pool import model_pool
+from ..inference_backends import DEFAULT_BACKEND
+from ..inference_server import InferenceUnavailable, infer_remote, pipeline_usage
+from ..prefix_cache import run_text_generation
 
-def huggingface_text_completion(prompt: str, model: str = "gpt2") -> Optional[str]:
+logger = logging.getLogger(__name__)
+
+# max_new_tokens rather than max_length: the latter counts the prompt, which
+# the inference server left-pads to the longest prompt in a batch
+GENERATION_OPTIONS = {"max_new_tokens": 100, "num_return_sequences": 1}
+
+def huggingface_text_completion(prompt: str, model: str = "gpt2", usage: Optional[dict] = None,
+                                backend: str = DEFAULT_BACKEND) -> Optional[str]:
     try:
-        generator = pipeline("text-generation", model=model)
-        result = generator(prompt, max_length=100, num_return_sequences=1)
+        try:
+            # The host's inference server, when running, owns the models
+            [item] = infer_remote("text-generation", model, [prompt], GENERATION_OPTIONS,
+                                  usage=usage is not None, backend=backend)
+            result, counts = item["output"], item["usage"]
+        except InferenceUnavailable:
+            # Pipelines are loaded once per worker and reused across calls
+            entry = model_pool.get("text-generation", model, backend)
+            with entry.lock:
+                result = run_text_generation(entry.pipe, model, backend, prompt, GENERATION_OPTIONS)
+            counts = pipeline_usage(entry.pipe, "text-generation", prompt, result) if usage is not None else None
+        if usage is not None and counts:
+            usage.update(counts)
         return result[0]["generated_text"]
     except Exception as e:
-        print(f"HuggingFace Error: {e}")
-        return None
\ No newline at end of file
+        logger.error(f"HuggingFace Error: {e}")
+        return None
@@ -1,18 +1,56 @@
-import requests
+import logging
 from typing import Optional
+from ..clients import get_client, run_sync, iter_ndjson
+
+logger = logging.getLogger(__name__)
+
+async def ollama_generate(client, prompt: str, model: str = "llama2", usage: Optional[dict] = None) -> str:
+    response = await client.post(
+        "/api/generate",
+        json={
+            "model": model,
+            "prompt": prompt,
+            "stream": False
+        }
+    )
+    response.raise_for_status()
+    data = response.json()
+    if usage is not None:
+        if "prompt_eval_count" in data:
+            usage["prompt_tokens"] = data["prompt_eval_count"]
+        if "eval_count" in data:
+            usage["completion_tokens"] = data["eval_count"]
+    return data["response"]
+
+async def ollama_generate_stream(client, prompt: str, model: str = "llama2", usage: Optional[dict] = None):
+    """
+    Stream /api/generate (newline-delimited JSON), yielding text chunks.
+    When a usage dict is given it is filled from the final eval counts.
+    """
+    async with client.stream(
+        "POST",
+        "/api/generate",
+        json={
+            "model": model,
+            "prompt": prompt,
+            "stream": True
+        }
+    ) as response:
+        response.raise_for_status()
+        async for event in iter_ndjson(response):
+            if event.get("response"):
+                yield event["response"]
+            if event.get("done") and usage is not None:
+                if "prompt_eval_count" in event:
+                    usage["prompt_tokens"] = event["prompt_eval_count"]
+                if "eval_count" in event:
+                    usage["completion_tokens"] = event["eval_count"]
 
 def ollama_text_completion(prompt: str, model: str = "llama2", base_url: str = "http://localhost:11434") -> Optional[str]:
     try:
-        response = requests.post(
-            f"{base_url}/api/generate",
-            json={
-                "model": model,
-                "prompt": prompt,
-                "stream": False
-            }
-        )
-        response.raise_for_status()
-        return response.json()["response"]
+        async def call():
+            return await ollama_generate(get_client('OLLAMA', base_url), prompt, model)
+        return run_sync(call())
     except Exception as e:
-        print(f"Ollama API Error: {e}")
-        return None
\ No newline at end of file
+        logger.error(f"Ollama API Error: {e}")
+        return None
@@ -1,15 +1,55 @@
-import openai
-from django.conf import settings
+import logging
 from typing import Optional
+from ..clients import get_client, run_sync, iter_sse_json
+
+logger = logging.getLogger(__name__)
+
+async def openai_chat_completion(client, prompt: str, model: str = "gpt-3.5-turbo", max_tokens: int = 1000, usage: Optional[dict] = None) -> str:
+    response = await client.post(
+        "/chat/completions",
+        json={
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens
+        }
+    )
+    response.raise_for_status()
+    data = response.json()
+    if usage is not None and data.get("usage"):
+        usage.update(data["usage"])
+    return data["choices"][0]["message"]["content"]
+
+async def openai_chat_stream(client, prompt: str, model: str = "gpt-3.5-turbo", max_tokens: int = 1000, usage: Optional[dict] = None):
+    """
+    Stream a chat completion, yielding text deltas as they arrive. When a
+    usage dict is given it is filled with the token counts reported at the
+    end of the stream.
+    """
+    async with client.stream(
+        "POST",
+        "/chat/completions",
+        json={
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "stream": True,
+            "stream_options": {"include_usage": True}
+        }
+    ) as response:
+        response.raise_for_status()
+        async for event in iter_sse_json(response):
+            if event.get("usage") and usage is not None:
+                usage.update(event["usage"])
+            for choice in event.get("choices") or []:
+                content = (choice.get("delta") or {}).get("content")
+                if content:
+                    yield content
 
 def openai_text_completion(prompt: str, model: str = "gpt-3.5-turbo") -> Optional[str]:
     try:
-        response = openai.ChatCompletion.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=1000
-        )
-        return response.choices[0].message.content
+        async def call():
+            return await openai_chat_completion(get_client('OPENAI'), prompt, model)
+        return run_sync(call())
     except Exception as e:
-        print(f"OpenAI API Error: {e}")
-        return None
\ No newline at end of file
+        logger.error(f"OpenAI API Error: {e}")
+        return None
@@ -1,20 +1,59 @@
+import json
+import math
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import AIModelConfig, ModelComparison, ModelResponse
+from .models import AIModelConfig, ComparisonMatrix, ModelComparison, ModelResponse
 from .serializers import (
     AIModelConfigSerializer,
     ModelComparisonSerializer,
-    CompareModelsSerializer
+    CompareModelsSerializer,
+    ComparisonMatrixSerializer,
+    CreateMatrixSerializer
 )
-from .tasks import run_ai_model_task
+from .tasks import run_ai_model_task, run_model_comparison_task, run_hedged_model_task, run_matrix_task
+from .cache import response_cache
+from .prefix_cache import prefix_cache
+from . import circuit_breaker
+from .accounting import ROLLUP_GROUPS, rollup
+from .task_status import fetch_statuses, summarize, wait_for_change
 from celery.result import AsyncResult
-from django.shortcuts import get_object_or_404
+
+def _request_user(request):
+    return request.user if request.user.is_authenticated else None
 
 class AIModelConfigViewSet(viewsets.ModelViewSet):
     queryset = AIModelConfig.objects.filter(is_active=True)
     serializer_class = AIModelConfigSerializer
 
+    @action(detail=False, methods=['get'])
+    def cache_stats(self, request):
+        """Response cache hit/miss counters."""
+        return Response(response_cache.stats())
+
+    @action(detail=False, methods=['get'])
+    def prefix_cache_stats(self, request):
+        """Prompt prefix (KV) cache hit rates for Hugging Face text generation."""
+        return Response(prefix_cache.stats())
+
+    @action(detail=True, methods=['get'], url_path='health', url_name='health')
+    def health(self, request, pk=None):
+        """Circuit breaker state and recent error rate for one config."""
+        model_config = self.get_object()
+        return Response({'id': model_config.id, 'breaker': circuit_breaker.status(model_config.id)})
+
+    @action(detail=False, methods=['get'], url_path='health-all', url_name='health-all')
+    def health_all(self, request):
+        """Circuit breaker state for every active config."""
+        return Response([
+            {'id': model_config.id, 'name': model_config.name, 'breaker': circuit_breaker.status(model_config.id)}
+            for model_config in self.get_queryset()
+        ])
+
 class ModelComparisonViewSet(viewsets.ModelViewSet):
     queryset = ModelComparison.objects.all()
     serializer_class = ModelComparisonSerializer
@@ -26,17 +65,44 @@ class ModelComparisonViewSet(viewsets.ModelViewSet):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
         prompt = serializer.validated_data['prompt']
+        stream = serializer.validated_data['stream']
+        cache = serializer.validated_data['cache']
         model_ids = serializer.validated_data['model_ids']
         
+        # Validate all models with a single query before creating anything
+        model_configs = AIModelConfig.objects.filter(is_active=True).in_bulk(model_ids)
+        missing = [model_id for model_id in model_ids if model_id not in model_configs]
+        if missing:
+            return Response(
+                {"error": f"Unknown or inactive model ids: {missing}"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
         # Create comparison record
-        comparison = ModelComparison.objects.create(prompt=prompt)
+        comparison = ModelComparison.objects.create(prompt=prompt, user=_request_user(request))
+        
+        if serializer.validated_data['mode'] == 'concurrent':
+            # One task calls every provider concurrently
+            task = run_model_comparison_task.delay(
+                comparison.id, model_ids, serializer.validated_data.get('timeout'),
+                stream=stream, cache=cache
+            )
+            task_ids = [task.id]
+        elif serializer.validated_data['mode'] == 'hedged':
+            # Primary first, then fallbacks; the first good answer wins
+            task = run_hedged_model_task.delay(
+                comparison.id, model_ids, serializer.validated_data.get('timeout'),
+                hedge_delay=serializer.validated_data.get('hedge_delay'), cache=cache
+            )
+            task_ids = [task.id]
+        else:
+            # Start tasks for each model
+            task_ids = []
+            for model_id in model_ids:
+                task = run_ai_model_task.delay(model_id, prompt, comparison.id, stream=stream, cache=cache)
+                task_ids.append(task.id)
         
-        # Start tasks for each model
-        task_ids = []
-        for model_id in model_ids:
-            model_config = get_object_or_404(AIModelConfig, id=model_id, is_active=True)
-            task = run_ai_model_task.delay(model_config.id, prompt, comparison.id)
-            task_ids.append(task.id)
+        ModelComparison.objects.filter(id=comparison.id).update(task_ids=task_ids)
         
         return Response({
             "comparison_id": comparison.id,
@@ -48,6 +114,103 @@ class ModelComparisonViewSet(viewsets.ModelViewSet):
         comparison = self.get_object()
         serializer = self.get_serializer(comparison)
         return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'], url_path='status')
+    def task_status(self, request, pk=None):
+        """Aggregated status of all tasks working on this comparison."""
+        comparison = self.get_object()
+        return Response({
+            'comparison_id': comparison.id,
+            **summarize(fetch_statuses(comparison.task_ids))
+        })
+
+class ComparisonMatrixViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = ComparisonMatrix.objects.prefetch_related('model_configs').order_by('-created_at')
+    serializer_class = ComparisonMatrixSerializer
+
+    def create(self, request):
+        serializer = CreateMatrixSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        prompts = serializer.validated_data['prompts']
+        model_ids = serializer.validated_data['model_ids']
+        model_configs = AIModelConfig.objects.filter(is_active=True).in_bulk(model_ids)
+        missing = [model_id for model_id in model_ids if model_id not in model_configs]
+        if missing:
+            return Response(
+                {"error": f"Unknown or inactive model ids: {missing}"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        matrix = ComparisonMatrix.objects.create(total_prompts=len(prompts))
+        matrix.model_configs.set(model_configs.values())
+        ModelComparison.objects.bulk_create(
+            [ModelComparison(prompt=prompt, matrix=matrix, user=_request_user(request)) for prompt in prompts],
+            batch_size=1000
+        )
+
+        task = run_matrix_task.delay(
+            matrix.id, serializer.validated_data.get('timeout'), cache=serializer.validated_data['cache']
+        )
+        ComparisonMatrix.objects.filter(id=matrix.id).update(task_id=task.id)
+        matrix.refresh_from_db()
+        return Response(self.get_serializer(matrix).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'])
+    def export(self, request, pk=None):
+        """Stream the matrix's responses as NDJSON, one line per response."""
+        matrix = self.get_object()
+        responses = (
+            ModelResponse.objects.filter(comparison__matrix=matrix)
+            .select_related('comparison', 'model_config')
+            .order_by('comparison_id', 'model_config_id')
+        )
+
+        def lines():
+            for response in responses.iterator(chunk_size=1000):
+                yield json.dumps({
+                    'comparison_id': response.comparison_id,
+                    'prompt': response.comparison.prompt,
+                    'model_id': response.model_config_id,
+                    'model_name': response.model_config.model_name,
+                    'response': response.response,
+                    'latency': response.latency,
+                    'cached': response.cached,
+                }) + '\n'
+
+        streaming = StreamingHttpResponse(lines(), content_type='application/x-ndjson')
+        streaming['Content-Disposition'] = f'attachment; filename="matrix-{matrix.id}.ndjson"'
+        return streaming
+
+class UsageViewSet(viewsets.ViewSet):
+    def list(self, request):
+        """
+        Token, cost and throughput rollups of model responses, grouped by
+        ?group_by=model_config|user|day and optionally limited to
+        ?start=/?end= dates (inclusive) and ?model_config=<id>.
+        """
+        group_by = request.query_params.get('group_by', 'model_config')
+        if group_by not in ROLLUP_GROUPS:
+            return Response(
+                {'error': f"group_by must be one of {sorted(ROLLUP_GROUPS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        responses = ModelResponse.objects.all()
+        try:
+            if request.query_params.get('start'):
+                responses = responses.filter(created_at__date__gte=request.query_params['start'])
+            if request.query_params.get('end'):
+                responses = responses.filter(created_at__date__lte=request.query_params['end'])
+        except ValidationError:
+            return Response({'error': "start and end must be YYYY-MM-DD dates"}, status=status.HTTP_400_BAD_REQUEST)
+        if request.query_params.get('model_config'):
+            try:
+                model_config_id = int(request.query_params['model_config'])
+            except ValueError:
+                return Response({'error': "model_config must be an integer id"}, status=status.HTTP_400_BAD_REQUEST)
+            responses = responses.filter(model_config_id=model_config_id)
+        return Response(rollup(responses, group_by))
 
 class TaskStatusViewSet(viewsets.ViewSet):
     def retrieve(self, request, pk=None):
@@ -55,5 +218,62 @@ class TaskStatusViewSet(viewsets.ViewSet):
         return Response({
             'task_id': pk,
             'status': task.status,
-            'result': task.result if task.ready() else None
-        })
\ No newline at end of file
+            'result': task.result if task.ready() else None,
+            # Partial text of streaming tasks
+            'progress': task.info if task.status == 'PROGRESS' else None
+        })
+
+    @action(detail=False, methods=['get', 'post'])
+    def bulk(self, request):
+        """
+        Status of many tasks in one result backend round trip. Task ids come
+        from ?ids=a,b,c or a JSON body {"task_ids": [...]}.
+        """
+        if request.method == 'POST':
+            task_ids, error = _requested_task_ids(request.data.get('task_ids'))
+        else:
+            task_ids, error = _requested_task_ids(request.query_params.get('ids'))
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(summarize(fetch_statuses(task_ids)))
+
+def _requested_task_ids(raw):
+    if isinstance(raw, str):
+        raw = [task_id for task_id in raw.split(',') if task_id.strip()]
+    if not raw or not isinstance(raw, list) or not all(isinstance(task_id, str) for task_id in raw):
+        return None, "Provide a list of task ids"
+    if len(raw) > settings.AI_TASK_STATUS_MAX_IDS:
+        return None, f"At most {settings.AI_TASK_STATUS_MAX_IDS} task ids per request"
+    return [task_id.strip() for task_id in raw], None
+
+@require_GET
+async def poll_task_statuses(request):
+    """
+    Long-poll task statuses: GET ?ids=a,b (or ?comparison=<id>) responds as
+    soon as the statuses differ from ?version=<token from a previous
+    response>, or after ?timeout seconds with changed=false. Waiting is
+    asynchronous, so under ASGI it doesn't tie up a worker thread.
+    """
+    if request.GET.get('comparison'):
+        try:
+            comparison_id = int(request.GET['comparison'])
+        except ValueError:
+            return JsonResponse({'error': "comparison must be an integer id"}, status=400)
+        comparison = await ModelComparison.objects.filter(id=comparison_id).afirst()
+        if comparison is None:
+            return JsonResponse({'error': "Comparison not found"}, status=404)
+        task_ids = comparison.task_ids
+    else:
+        task_ids, error = _requested_task_ids(request.GET.get('ids'))
+        if error:
+            return JsonResponse({'error': error}, status=400)
+    try:
+        timeout = float(request.GET.get('timeout', settings.AI_TASK_POLL_MAX_WAIT))
+    except ValueError:
+        timeout = math.nan
+    if not math.isfinite(timeout):
+        return JsonResponse({'error': "timeout must be a number"}, status=400)
+    timeout = min(timeout, settings.AI_TASK_POLL_MAX_WAIT)
+
+    statuses, changed = await wait_for_change(task_ids, request.GET.get('version'), max(timeout, 0))
+    return JsonResponse({'changed': changed, **summarize(statuses)})
\ No newline at end of file
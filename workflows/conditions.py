@@ -0,0 +1,128 @@
+# workflows/conditions.py
+"""
+Condition nodes and branch skipping. A condition node evaluates its
+"cases" in order against its input and picks the branch of the first case
+whose "when" matches, or its "default" branch:
+
+    {"cases": [{"when": {"type": "length", "max_tokens": 200}, "branch": "short"}],
+     "default": "long"}
+
+Nodes after it with a "branch" (a name or list of names) in their config
+only run if that branch was picked; they are marked skipped otherwise.
+Nodes without one always run, so they are where branches join. Each
+condition node governs the branched nodes up to the next condition node.
+
+Conditions are cheap checks on the input:
+    length     min_tokens/max_tokens (estimated) and min_chars/max_chars
+    regex      "pattern" found in the text; "ignore_case": true
+    json_path  value at "path" (e.g. "$.items[0].lang") equals "equals",
+               or is present and truthy without it
+    language   detected language code is in "in" (e.g. ["en", "de"])
+"""
+import json
+import re
+from typing import Any, Optional, Tuple
+
+from .routing import estimate_tokens
+
+CONDITION_TYPES = ('length', 'regex', 'json_path', 'language')
+
+_path_part = re.compile(r"\.?([^.\[\]]+)|\[(\d+)\]")
+_words = re.compile(r"[^\W\d_]+")
+
+# Frequent function words; enough to tell these languages apart on a sentence or two
+STOPWORDS = {
+    'en': {'the', 'and', 'of', 'to', 'is', 'in', 'that', 'it', 'for', 'with', 'was', 'on', 'are', 'this', 'be'},
+    'es': {'el', 'la', 'de', 'que', 'y', 'en', 'los', 'las', 'del', 'se', 'por', 'un', 'una', 'es', 'con'},
+    'fr': {'le', 'la', 'les', 'de', 'et', 'des', 'est', 'un', 'une', 'du', 'que', 'en', 'dans', 'pour', 'pas'},
+    'de': {'der', 'die', 'das', 'und', 'ist', 'nicht', 'ein', 'eine', 'zu', 'den', 'mit', 'von', 'sich', 'auf', 'dem'},
+    'it': {'il', 'di', 'che', 'e', 'la', 'per', 'un', 'non', 'sono', 'una', 'del', 'della', 'gli', 'con', 'le'},
+    'pt': {'o', 'a', 'de', 'que', 'e', 'do', 'da', 'em', 'um', 'uma', 'os', 'não', 'para', 'com', 'no'},
+    'nl': {'de', 'het', 'een', 'en', 'van', 'is', 'niet', 'dat', 'op', 'te', 'zijn', 'met', 'voor', 'ook', 'er'},
+}
+# Languages recognised by script alone, checked in order
+SCRIPTS = (
+    ('ja', re.compile(r"[\u3040-\u30ff]")),
+    ('zh', re.compile(r"[\u4e00-\u9fff]")),
+    ('ko', re.compile(r"[\uac00-\ud7af]")),
+    ('ru', re.compile(r"[\u0400-\u04ff]")),
+    ('ar', re.compile(r"[\u0600-\u06ff]")),
+)
+
+
+def detect_language(text: str) -> Optional[str]:
+    """Best-guess ISO 639-1 code from script or stop words, None if unclear."""
+    for code, script in SCRIPTS:
+        if script.search(text):
+            return code
+    words = [word.lower() for word in _words.findall(text)[:500]]
+    scores = {code: sum(word in stopwords for word in words) for code, stopwords in STOPWORDS.items()}
+    code, score = max(scores.items(), key=lambda item: item[1])
+    return code if score else None
+
+
+def json_path(data: Any, path: str) -> Tuple[bool, Any]:
+    """(found, value) at a dotted/indexed path such as "$.items[0].lang"."""
+    if isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except ValueError:
+            return False, None
+    path = path[1:] if path.startswith('$') else path
+    for key, index in _path_part.findall(path):
+        try:
+            if index:
+                data = data[int(index)]
+            elif isinstance(data, list) and key.isdigit():
+                data = data[int(key)]
+            else:
+                data = data[key]
+        except (KeyError, IndexError, TypeError):
+            return False, None
+    return True, data
+
+
+def _text(input_data: Any) -> str:
+    return input_data if isinstance(input_data, str) else json.dumps(input_data, default=str)
+
+
+def evaluate(when: dict, input_data: Any) -> bool:
+    kind = when.get('type')
+    if kind == 'length':
+        text = _text(input_data)
+        tokens, chars = estimate_tokens(text), len(text)
+        return (tokens >= when.get('min_tokens', 0) and chars >= when.get('min_chars', 0)
+                and tokens <= when.get('max_tokens', tokens) and chars <= when.get('max_chars', chars))
+    if kind == 'regex':
+        flags = re.IGNORECASE if when.get('ignore_case') else 0
+        return re.search(when['pattern'], _text(input_data), flags) is not None
+    if kind == 'json_path':
+        found, value = json_path(input_data, when['path'])
+        if 'equals' in when:
+            return found and value == when['equals']
+        return found and bool(value)
+    if kind == 'language':
+        return detect_language(_text(input_data)) in when.get('in', [])
+    raise ValueError(f"Unknown condition type: {kind}")
+
+
+def choose_branch(config: dict, input_data: Any) -> dict:
+    """The branch picked by a condition node's config, with the matching case index."""
+    for index, case in enumerate(config.get('cases', [])):
+        if evaluate(case.get('when', {}), input_data):
+            return {'branch': case.get('branch'), 'case': index}
+    return {'branch': config.get('default'), 'case': None}
+
+
+def node_branches(node) -> Optional[set]:
+    """Branches a node runs on, or None if it always runs."""
+    branch = node.config.get('branch')
+    if branch is None or node.type == 'condition':
+        return None
+    return {branch} if isinstance(branch, str) else set(branch)
+
+
+def is_skipped(node, chosen: Optional[str]) -> bool:
+    """Whether node is on a branch other than the one the governing condition picked."""
+    branches = node_branches(node)
+    return branches is not None and chosen not in branches
@@ -0,0 +1,76 @@
+# workflows/embeddings.py
+import logging
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('sentence_transformers', 'ollama')
+
+# Sentence-transformer models are loaded on first use and shared per process
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_sentence_transformer(model_name):
+    model = _models.get(model_name)
+    if model is None:
+        with _models_lock:
+            model = _models.get(model_name)
+            if model is None:
+                from sentence_transformers import SentenceTransformer
+                from ai_integration.model_artifacts import (
+                    SENTENCE_TRANSFORMERS, load_kwargs, record_load_time, resolve
+                )
+
+                start = time.perf_counter()
+                model = SentenceTransformer(resolve(model_name), model_kwargs=load_kwargs())
+                load_time = time.perf_counter() - start
+                logger.info(f"Loaded embedding model {model_name} in {load_time:.2f}s")
+                record_load_time(SENTENCE_TRANSFORMERS, model_name, load_time)
+                _models[model_name] = model
+    return model
+
+
+def _embed_sentence_transformers(texts, model_name, batch_size):
+    model = get_sentence_transformer(model_name)
+    return model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+
+
+def _embed_ollama(texts, model_name, batch_size, base_url=None):
+    from ai_integration.clients import get_client, run_sync
+
+    async def embed(batch):
+        response = await get_client('OLLAMA', base_url).post(
+            "/api/embed", json={"model": model_name, "input": batch}
+        )
+        response.raise_for_status()
+        return response.json()["embeddings"]
+
+    vectors = []
+    for start in range(0, len(texts), batch_size):
+        vectors.extend(run_sync(embed(texts[start:start + batch_size])))
+    return vectors
+
+
+def embed_texts(texts, backend=None, model=None, batch_size=None, base_url=None) -> np.ndarray:
+    """
+    Embed texts in batches with a local sentence-transformer or an Ollama
+    server and return a float32 matrix with one row per text.
+    """
+    backend = backend or settings.WORKFLOW_EMBEDDING_BACKEND
+    model = model or settings.WORKFLOW_EMBEDDING_MODEL
+    batch_size = batch_size or settings.WORKFLOW_EMBEDDING_BATCH_SIZE
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend}")
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    if backend == 'ollama':
+        vectors = _embed_ollama(texts, model, batch_size, base_url)
+    else:
+        vectors = _embed_sentence_transformers(texts, model, batch_size)
+    return np.asarray(vectors, dtype=np.float32)
@@ -0,0 +1,202 @@
+# workflows/management/commands/loadtest.py
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from workflows.models import Workflow, Node
+
+User = get_user_model()
+
+USERNAME_PREFIX = 'loadtest_user_'
+
+# name -> (method, path template, default weight)
+ENDPOINTS = {
+    'workflows': ('GET', '/api/workflows/workflows/', 4),
+    'execute': ('POST', '/api/workflows/workflows/{workflow_id}/execute/', 1),
+    'executions': ('GET', '/api/workflows/workflow_executions/', 3),
+    'me': ('GET', '/api/users/me/', 2),
+}
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not values:
+        return 0.0
+    rank = max(math.ceil(pct / 100.0 * len(values)), 1)
+    return values[min(rank, len(values)) - 1]
+
+
+def parse_mix(mix):
+    """
+    Parse a "name=weight,name=weight" traffic mix into a weights dict.
+    """
+    weights = {name: spec[2] for name, spec in ENDPOINTS.items()}
+    if not mix:
+        return weights
+    weights = dict.fromkeys(ENDPOINTS, 0)
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise CommandError(f"Unknown endpoint in mix: {name}")
+        try:
+            weights[name] = int(weight or 1)
+        except ValueError:
+            raise CommandError(f"Invalid weight for {name}: {weight}")
+    if not any(weights.values()):
+        raise CommandError("Traffic mix has no positive weights")
+    return weights
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive mixed authenticated traffic against a running InnoFlow server and "
+        "report throughput and p50/p95/p99 latency per endpoint. Start the server "
+        "with CELERY_TASK_ALWAYS_EAGER=True WORKFLOW_MOCK_HANDLERS=True so no "
+        "broker or external AI service is needed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--users', type=int, default=5, help="Number of load test users to provision")
+        parser.add_argument('--concurrency', type=int, default=10, help="Number of concurrent client threads")
+        parser.add_argument('--duration', type=float, default=30.0, help="Run time in seconds")
+        parser.add_argument('--requests', type=int, default=0, help="Stop after this many requests (0 = no limit)")
+        parser.add_argument('--mix', default='', help="Traffic mix, e.g. workflows=4,execute=1,executions=3,me=2")
+        parser.add_argument('--timeout', type=float, default=30.0, help="Per-request timeout in seconds")
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--cleanup', action='store_true', help="Delete provisioned users and their workflows afterwards")
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['concurrency'] < 1:
+            raise CommandError("--users and --concurrency must be at least 1")
+
+        weights = parse_mix(options['mix'])
+        rng = random.Random(options['seed'])
+        clients = self.provision_users(options['users'])
+
+        self.stdout.write(
+            f"Running load test against {options['base_url']} with {options['concurrency']} "
+            f"threads, {len(clients)} users, mix {weights}"
+        )
+        result = self.run(clients, weights, rng, options)
+        self.report(result)
+
+        if options['cleanup']:
+            User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+            self.stdout.write("Removed load test users")
+
+    def provision_users(self, count):
+        """
+        Create (or reuse) load test users, each owning one cheap workflow,
+        and mint an access token for each of them.
+        """
+        clients = []
+        for i in range(count):
+            user, created = User.objects.get_or_create(username=f"{USERNAME_PREFIX}{i}")
+            if created:
+                user.set_unusable_password()
+                user.save()
+
+            # Users may own several workflows with this name (e.g. made by hand)
+            workflow = Workflow.objects.filter(user=user, name='Load test workflow').order_by('id').first()
+            if workflow is None:
+                workflow = Workflow.objects.create(
+                    user=user, name='Load test workflow', config={'continue_on_error': True}
+                )
+                Node.objects.create(workflow=workflow, type='text_input', config={'text': 'load test'}, order=1)
+
+            clients.append({
+                'token': str(RefreshToken.for_user(user).access_token),
+                'workflow_id': workflow.id,
+            })
+        return clients
+
+    def run(self, clients, weights, rng, options):
+        names = [name for name, weight in weights.items() if weight > 0]
+        name_weights = [weights[name] for name in names]
+        base_url = options['base_url'].rstrip('/')
+        deadline = time.monotonic() + options['duration']
+        budget = options['requests']
+
+        samples = defaultdict(list)
+        errors = defaultdict(int)
+        lock = threading.Lock()
+        issued = [0]
+        local = threading.local()
+
+        def next_request():
+            with lock:
+                if budget and issued[0] >= budget:
+                    return None
+                issued[0] += 1
+                return rng.choices(names, name_weights)[0], rng.choice(clients)
+
+        def worker():
+            local.session = requests.Session()
+            while time.monotonic() < deadline:
+                picked = next_request()
+                if picked is None:
+                    break
+                name, client = picked
+                method, path, _ = ENDPOINTS[name]
+                url = base_url + path.format(workflow_id=client['workflow_id'])
+                start = time.perf_counter()
+                try:
+                    response = local.session.request(
+                        method, url,
+                        headers={'Authorization': f"Bearer {client['token']}"},
+                        timeout=options['timeout']
+                    )
+                    ok = response.status_code < 400
+                except requests.RequestException:
+                    ok = False
+                latency = time.perf_counter() - start
+                with lock:
+                    samples[name].append(latency)
+                    if not ok:
+                        errors[name] += 1
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            futures = [pool.submit(worker) for _ in range(options['concurrency'])]
+        elapsed = time.perf_counter() - started
+        for future in futures:
+            if future.exception() is not None:
+                raise CommandError(f"Load test worker failed: {future.exception()}") from future.exception()
+
+        return {'samples': samples, 'errors': errors, 'elapsed': elapsed}
+
+    def report(self, result):
+        elapsed = result['elapsed'] or 1e-9
+        header = f"{'endpoint':<12}{'count':>8}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+
+        total = 0
+        for name in ENDPOINTS:
+            latencies = sorted(result['samples'].get(name, []))
+            if not latencies:
+                continue
+            total += len(latencies)
+            self.stdout.write(
+                f"{name:<12}{len(latencies):>8}{result['errors'].get(name, 0):>8}"
+                f"{len(latencies) / elapsed:>10.1f}"
+                f"{percentile(latencies, 50) * 1000:>10.1f}"
+                f"{percentile(latencies, 95) * 1000:>10.1f}"
+                f"{percentile(latencies, 99) * 1000:>10.1f}"
+                f"{latencies[-1] * 1000:>10.1f}"
+            )
+
+        self.stdout.write('-' * len(header))
+        self.stdout.write(f"Total: {total} requests in {elapsed:.2f}s ({total / elapsed:.1f} req/s)")
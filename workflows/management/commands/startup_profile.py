@@ -0,0 +1,120 @@
+# workflows/management/commands/startup_profile.py
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_MODULES = [
+    'InnoFlow.wsgi',
+    'InnoFlow.urls',
+    'workflows.tasks',
+    'ai_integration.tasks',
+]
+
+# Written to stderr before each requested import, to tell whose entries follow
+STAGE_MARKER = 'startup_profile: importing '
+
+
+def parse_importtime(output):
+    """
+    Parse `python -X importtime` output into a list of
+    (module, self_us, cumulative_us, depth) tuples.
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0])
+            cumulative_us = int(parts[1])
+        except ValueError:
+            continue  # header line
+        name = parts[2][1:] if parts[2].startswith(' ') else parts[2]
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        entries.append((name.strip(), self_us, cumulative_us, depth))
+    return entries
+
+
+def requested_import_times(output, modules):
+    """
+    Cumulative import time in microseconds of each requested module, or None
+    for one that django.setup() or an earlier requested module had already
+    imported (importtime only reports a module's first import).
+    """
+    times, stage = {module: None for module in modules}, None
+    for line in output.splitlines():
+        if line.startswith(STAGE_MARKER):
+            stage = line[len(STAGE_MARKER):]
+            continue
+        for name, _, cumulative, depth in parse_importtime(line):
+            if name == stage and depth == 0:
+                times[name] = cumulative
+    return times
+
+
+class Command(BaseCommand):
+    help = (
+        "Report per-module import time (as with python -X importtime) for the "
+        "modules loaded at startup, and optionally fail when the total exceeds "
+        "a budget."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--module', action='append', dest='modules',
+            help=f"Module to import (repeatable). Defaults to {', '.join(DEFAULT_MODULES)}"
+        )
+        parser.add_argument('--top', type=int, default=25, help="Number of slowest modules to list")
+        parser.add_argument('--budget-ms', type=float, default=None, help="Fail if total import time exceeds this")
+        parser.add_argument('--sort', choices=['self', 'cumulative'], default='cumulative')
+
+    def handle(self, *args, **options):
+        modules = options['modules'] or DEFAULT_MODULES
+        script = "import sys, django; django.setup()\n" + "".join(
+            f"print({STAGE_MARKER + module!r}, file=sys.stderr); import {module}\n" for module in modules
+        )
+
+        env = os.environ.copy()
+        env['DJANGO_SETTINGS_MODULE'] = settings.SETTINGS_MODULE
+        started = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', script],
+            capture_output=True, text=True, env=env, cwd=str(settings.BASE_DIR)
+        )
+        wall_ms = (time.perf_counter() - started) * 1000
+
+        entries = parse_importtime(proc.stderr)
+        if proc.returncode != 0:
+            errors = [line for line in proc.stderr.splitlines() if not line.startswith('import time:')]
+            raise CommandError("Import failed:\n" + "\n".join(errors[-20:]))
+
+        total_ms = sum(cumulative for _, _, cumulative, depth in entries if depth == 0) / 1000
+        requested = requested_import_times(proc.stderr, modules)
+
+        self.stdout.write("Requested modules:")
+        for module in modules:
+            cumulative = requested[module]
+            if cumulative is None:
+                self.stdout.write(f"  {module:<40}  already imported")
+            else:
+                self.stdout.write(f"  {module:<40}{cumulative / 1000:>10.1f} ms")
+
+        key = 1 if options['sort'] == 'self' else 2
+        self.stdout.write(f"\nSlowest {options['top']} modules by {options['sort']} time:")
+        self.stdout.write(f"  {'module':<50}{'self ms':>10}{'cumul ms':>10}")
+        for name, self_us, cumulative, _ in sorted(entries, key=lambda e: e[key], reverse=True)[:options['top']]:
+            self.stdout.write(f"  {name:<50}{self_us / 1000:>10.1f}{cumulative / 1000:>10.1f}")
+
+        self.stdout.write(f"\nTotal import time: {total_ms:.1f} ms ({len(entries)} modules, process wall time {wall_ms:.1f} ms)")
+
+        budget = options['budget_ms']
+        if budget is not None:
+            if total_ms > budget:
+                raise CommandError(f"Startup import budget exceeded: {total_ms:.1f} ms > {budget:.1f} ms")
+            self.stdout.write(self.style.SUCCESS(f"Within startup budget of {budget:.1f} ms"))
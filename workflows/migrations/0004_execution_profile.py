@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-19 11:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0003_workflowexecution'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflowexecution',
+            name='profile_enabled',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='ExecutionProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cpu_stats', models.BinaryField()),
+                ('cpu_summary', models.TextField(blank=True)),
+                ('memory_stats', models.JSONField(default=dict)),
+                ('node_stats', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('execution', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='profile', to='workflows.workflowexecution')),
+            ],
+        ),
+    ]
@@ -10,9 +10,19 @@ class MockSummarizationHandler:
     def execute(self, node, input_data):
         return f"Summary of: {input_data[:50]}..."
 
+class MockEmbeddingHandler:
+    def execute(self, node, input_data):
+        return {'count': 1, 'added': 1, 'rows': [0, 1], 'duplicates': [], 'dim': 384, 'index_size': 1}
+
+class MockSimilaritySearchHandler:
+    def execute(self, node, input_data):
+        return [{'row': 0, 'score': 1.0, 'text': f"Match for: {str(input_data)[:50]}"}]
+
 # Register mock handlers
 HANDLERS = {
     'text_input': MockTextInputHandler,
     'openai_tts': MockTTSHandler,
-    'huggingface_summarization': MockSummarizationHandler
+    'huggingface_summarization': MockSummarizationHandler,
+    'embedding': MockEmbeddingHandler,
+    'similarity_search': MockSimilaritySearchHandler
 } 
\ No newline at end of file
@@ -50,6 +50,32 @@ class WorkflowExecution(models.Model):
     )
     results = models.JSONField(null=True, blank=True)
     error_logs = models.TextField(null=True, blank=True)
+    profile_enabled = models.BooleanField(default=False)  # Collect cProfile/tracemalloc data for this run
+    rerun_of = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='reruns'
+    )  # Execution whose results for unchanged nodes this run reuses
 
     def __str__(self):
-        return f"Execution {self.id} of {self.workflow.name}"
\ No newline at end of file
+        return f"Execution {self.id} of {self.workflow.name}"
+
+class ExecutionProfile(models.Model):
+    """
+    Profiling artifact for a workflow execution run with profiling enabled.
+    """
+    execution = models.OneToOneField(
+        WorkflowExecution,
+        on_delete=models.CASCADE,
+        related_name='profile'
+    )
+    cpu_stats = models.BinaryField()  # Marshalled pstats data (.prof)
+    cpu_summary = models.TextField(blank=True)  # Top functions by cumulative time
+    memory_stats = models.JSONField(default=dict)  # tracemalloc peak and top allocations
+    node_stats = models.JSONField(default=list)  # Per-node duration and memory usage
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Profile for execution {self.execution_id}"
\ No newline at end of file
@@ -0,0 +1,95 @@
+# workflows/profiling.py
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+TOP_ALLOCATIONS = 25
+TOP_FUNCTIONS = 40
+
+
+class ExecutionProfiler:
+    """
+    Collects cProfile stats and tracemalloc snapshots for a single workflow
+    execution. Only instantiated when profiling is enabled for the execution,
+    so disabled runs never touch cProfile or tracemalloc.
+    """
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.node_stats = []
+        self._started_tracemalloc = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self.profiler.enable()
+
+    @contextmanager
+    def node(self, node):
+        """Record wall time and peak traced memory for one node."""
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            self.node_stats.append({
+                'node_id': node.id,
+                'type': node.type,
+                'duration': time.perf_counter() - start,
+                'memory_delta': current - before,
+                'memory_peak': peak,
+            })
+
+    def stop(self, execution):
+        """
+        Stop collecting and store the results as an ExecutionProfile linked
+        to the execution. Failures here never affect the workflow itself.
+        """
+        from .models import ExecutionProfile
+
+        self.profiler.disable()
+        try:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+
+        try:
+            self.profiler.create_stats()
+            summary = io.StringIO()
+            pstats.Stats(self.profiler, stream=summary).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+
+            ExecutionProfile.objects.update_or_create(
+                execution=execution,
+                defaults={
+                    # Same format as pstats.Stats.dump_stats, so the download can be
+                    # opened with pstats, snakeviz or converted with flameprof
+                    'cpu_stats': marshal.dumps(self.profiler.stats),
+                    'cpu_summary': summary.getvalue(),
+                    'memory_stats': {
+                        'peak': peak,
+                        'top_allocations': [
+                            {
+                                'location': str(stat.traceback),
+                                'size': stat.size,
+                                'count': stat.count,
+                            }
+                            for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]
+                        ],
+                    },
+                    'node_stats': self.node_stats,
+                }
+            )
+        except Exception as e:
+            logger.error(f"Failed to store profile for execution {execution.id}: {str(e)}", exc_info=True)
@@ -0,0 +1,145 @@
+# workflows/routing.py
+"""
+Length-aware routing of summarization nodes across the models listed in
+WORKFLOW_SUMMARIZATION_MODELS (smallest/fastest first). Short inputs go to
+the smallest model; otherwise the largest model whose estimated latency
+fits the workflow's latency budget is used, where estimates come from
+observed per-token latency and grow with the Celery queue depth.
+"""
+import logging
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_pieces = re.compile(r"\w+|[^\w\s]")
+
+# Weight of each new latency observation in the per-model moving average
+EWMA_ALPHA = 0.2
+
+
+@dataclass
+class SummarizationModel:
+    model: str
+    max_input_tokens: int = 1024  # Longer inputs are truncated by the model
+    ms_per_token: float = 2.0  # Prior until latencies have been observed
+    base_ms: float = 200.0  # Fixed cost per call (generation of the summary)
+
+
+@dataclass
+class RouteDecision:
+    model: str
+    reason: str
+    input_tokens: int
+    latency_budget_ms: Optional[float] = None
+    queue_depth: Optional[int] = None
+    estimated_ms: Dict[str, float] = field(default_factory=dict)
+
+    def as_trace(self) -> dict:
+        return asdict(self)
+
+
+def configured_models() -> List[SummarizationModel]:
+    return [SummarizationModel(**entry) for entry in settings.WORKFLOW_SUMMARIZATION_MODELS]
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (words and punctuation) without loading a tokenizer."""
+    return len(_pieces.findall(text))
+
+
+class LatencyTracker:
+    """Per-process moving average of each model's milliseconds per input token."""
+
+    def __init__(self):
+        self._rates = {}
+        self._lock = threading.Lock()
+
+    def ms_per_token(self, model: SummarizationModel) -> float:
+        with self._lock:
+            return self._rates.get(model.model, model.ms_per_token)
+
+    def observe(self, model: SummarizationModel, tokens: int, elapsed_ms: float):
+        rate = max(elapsed_ms - model.base_ms, 0.0) / max(min(tokens, model.max_input_tokens), 1)
+        with self._lock:
+            previous = self._rates.get(model.model)
+            self._rates[model.model] = rate if previous is None else previous + EWMA_ALPHA * (rate - previous)
+
+    def estimate(self, model: SummarizationModel, tokens: int) -> float:
+        return model.base_ms + self.ms_per_token(model) * min(tokens, model.max_input_tokens)
+
+
+latency_tracker = LatencyTracker()
+
+_queue_depth = {'value': None, 'valid_until': 0.0}
+
+
+def queue_depth() -> Optional[int]:
+    """
+    Messages waiting in the default Celery queue, cached for
+    WORKFLOW_ROUTING_QUEUE_DEPTH_TTL seconds; None if the broker can't say.
+    The broker gets one connection attempt bounded by
+    WORKFLOW_ROUTING_BROKER_TIMEOUT, and after it fails None is cached for
+    WORKFLOW_ROUTING_QUEUE_DEPTH_RETRY_INTERVAL seconds instead.
+    """
+    now = time.monotonic()
+    if now < _queue_depth['valid_until']:
+        return _queue_depth['value']
+    depth, ttl = None, settings.WORKFLOW_ROUTING_QUEUE_DEPTH_TTL
+    try:
+        from celery import current_app
+
+        timeout = settings.WORKFLOW_ROUTING_BROKER_TIMEOUT
+        with current_app.connection_for_read(connect_timeout=timeout) as connection:
+            connection.ensure_connection(max_retries=0, timeout=timeout)
+            depth = connection.default_channel.queue_declare(
+                queue=current_app.conf.task_default_queue, passive=True
+            ).message_count
+    except Exception as e:
+        logger.debug(f"Queue depth unavailable: {e}")
+        ttl = settings.WORKFLOW_ROUTING_QUEUE_DEPTH_RETRY_INTERVAL
+    _queue_depth.update(value=depth, valid_until=now + ttl)
+    return depth
+
+
+def choose_summarization_model(text: str, latency_budget_ms: Optional[float] = None,
+                               pinned: Optional[str] = None) -> RouteDecision:
+    tokens = estimate_tokens(text)
+    if pinned:
+        return RouteDecision(pinned, 'pinned', tokens, latency_budget_ms)
+
+    models = configured_models()
+    if len(models) == 1:
+        return RouteDecision(models[0].model, 'only_model', tokens, latency_budget_ms)
+
+    depth = queue_depth()
+    slowdown = 1 + (depth or 0) * settings.WORKFLOW_ROUTING_QUEUE_PENALTY
+    estimates = {model.model: round(latency_tracker.estimate(model, tokens) * slowdown, 1) for model in models}
+    # Models that can read the whole input, or failing that the one that reads most of it
+    fitting = [model for model in models if tokens <= model.max_input_tokens] or \
+        [max(models, key=lambda model: model.max_input_tokens)]
+
+    if tokens <= settings.WORKFLOW_SUMMARIZATION_SHORT_INPUT_TOKENS:
+        choice, reason = fitting[0], 'short_input'
+    elif latency_budget_ms is not None:
+        within = [model for model in fitting if estimates[model.model] <= latency_budget_ms]
+        if within:
+            choice, reason = within[-1], 'latency_budget'
+        else:
+            choice, reason = min(fitting, key=lambda model: estimates[model.model]), 'over_budget'
+    else:
+        choice, reason = fitting[-1], 'largest'
+    return RouteDecision(choice.model, reason, tokens, latency_budget_ms, depth, estimates)
+
+
+def record_latency(model_name: str, tokens: int, elapsed_ms: float):
+    """Feed an observed summarization latency back into the estimates."""
+    for model in configured_models():
+        if model.model == model_name:
+            latency_tracker.observe(model, tokens, elapsed_ms)
+            return
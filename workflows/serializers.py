@@ -1,5 +1,8 @@
+import re
 from rest_framework import serializers
 from .models import Workflow, Node, WorkflowExecution
+from .conditions import CONDITION_TYPES
+from ai_integration.inference_backends import BACKENDS as INFERENCE_BACKENDS
 
 class NodeSerializer(serializers.ModelSerializer):
     workflow = serializers.PrimaryKeyRelatedField(
@@ -16,7 +19,10 @@ class NodeSerializer(serializers.ModelSerializer):
         return value
 
     def validate_type(self, value):
-        valid_types = ["text_input", "openai_tts", "huggingface_summarization"]
+        valid_types = [
+            "text_input", "openai_tts", "huggingface_summarization", "embedding", "similarity_search", "map",
+            "condition"
+        ]
         if value not in valid_types:
             raise serializers.ValidationError(f"Invalid node type: {value}")
         return value
@@ -25,6 +31,59 @@ class NodeSerializer(serializers.ModelSerializer):
         if self.initial_data.get('type') == "openai_tts":
             if 'voice' not in value:
                 raise serializers.ValidationError("Missing 'voice' in config")
+        if self.initial_data.get('type') == "huggingface_summarization":
+            if value.get('backend') not in (None, *INFERENCE_BACKENDS):
+                raise serializers.ValidationError(f"Unknown inference backend: {value['backend']}")
+            budget = value.get('latency_budget_ms')
+            if budget is not None and not (isinstance(budget, (int, float)) and budget > 0):
+                raise serializers.ValidationError("'latency_budget_ms' must be a positive number")
+            segment = value.get('stream_segment_tokens')
+            if segment is not None and not (isinstance(segment, int) and segment > 0):
+                raise serializers.ValidationError("'stream_segment_tokens' must be a positive integer")
+        if self.initial_data.get('type') in ("embedding", "similarity_search"):
+            # Deferred: embeddings imports numpy
+            from .embeddings import BACKENDS as EMBEDDING_BACKENDS
+
+            if value.get('backend') not in (None, *EMBEDDING_BACKENDS):
+                raise serializers.ValidationError(f"Unknown embedding backend: {value['backend']}")
+            threshold = value.get('dedupe_threshold')
+            if threshold is not None and not (isinstance(threshold, (int, float)) and -1 <= threshold <= 1):
+                raise serializers.ValidationError("'dedupe_threshold' must be a cosine similarity between -1 and 1")
+            k = value.get('k')
+            if k is not None and not (isinstance(k, int) and not isinstance(k, bool) and k >= 1):
+                raise serializers.ValidationError("'k' must be a positive integer")
+        branch = value.get('branch')
+        if branch is not None and not (isinstance(branch, str) or
+                                       (isinstance(branch, list) and all(isinstance(name, str) for name in branch))):
+            raise serializers.ValidationError("'branch' must be a branch name or a list of them")
+        if self.initial_data.get('type') == "condition":
+            cases = value.get('cases', [])
+            if not isinstance(cases, list) or not all(isinstance(case, dict) for case in cases):
+                raise serializers.ValidationError("'cases' must be a list of {'when': ..., 'branch': ...}")
+            for case in cases:
+                when = case.get('when')
+                if not isinstance(when, dict) or when.get('type') not in CONDITION_TYPES:
+                    raise serializers.ValidationError(f"Each case needs a 'when' of type {', '.join(CONDITION_TYPES)}")
+                if when['type'] == 'regex':
+                    try:
+                        re.compile(when.get('pattern', ''))
+                    except re.error as e:
+                        raise serializers.ValidationError(f"Invalid regex pattern: {e}")
+                if when['type'] == 'json_path' and not isinstance(when.get('path'), str):
+                    raise serializers.ValidationError("json_path conditions need a 'path'")
+                if not isinstance(case.get('branch'), str):
+                    raise serializers.ValidationError("Each case needs a 'branch' name")
+        if self.initial_data.get('type') == "map":
+            workflow_id = value.get('workflow_id')
+            if not Workflow.objects.filter(id=workflow_id, user=self.context['request'].user).exists():
+                raise serializers.ValidationError("'workflow_id' must be one of your workflows")
+            if str(workflow_id) == str(self.initial_data.get('workflow')):
+                raise serializers.ValidationError("A map node can't run its own workflow")
+            concurrency = value.get('concurrency')
+            if concurrency is not None and not (isinstance(concurrency, int) and concurrency > 0):
+                raise serializers.ValidationError("'concurrency' must be a positive integer")
+            if value.get('split') not in (None, "lines", "sentences"):
+                raise serializers.ValidationError("'split' must be 'lines' or 'sentences'")
         return value
 
 class WorkflowSerializer(serializers.ModelSerializer):
@@ -39,10 +98,16 @@ class WorkflowSerializer(serializers.ModelSerializer):
         model = Workflow
         fields = ['id', 'name', 'user', 'created_at', 'updated_at', 'nodes','config']
 
+class ExecutionOptionsSerializer(serializers.Serializer):
+    """Request body options for starting an execution."""
+    profile = serializers.BooleanField(required=False)
+
 class WorkflowExecutionSerializer(serializers.ModelSerializer):
     class Meta:
         model = WorkflowExecution
         fields = [
             'id', 'workflow', 'started_at',
-            'completed_at', 'status', 'results', 'error_logs'
-        ]
\ No newline at end of file
+            'completed_at', 'status', 'results', 'error_logs',
+            'profile_enabled', 'rerun_of'
+        ]
+        read_only_fields = ['profile_enabled', 'rerun_of']
\ No newline at end of file
@@ -0,0 +1,233 @@
+# workflows/streaming.py
+"""
+Streaming execution for workflows with "streaming": true in their config.
+Each node runs as its own asyncio task and hands text chunks (sentences,
+summary segments) to the next node through a bounded queue, so TTS starts
+on the first summary segment while later ones are still being produced. A
+producer that gets WORKFLOW_STREAM_BUFFER chunks ahead of its consumer
+waits for it (backpressure).
+
+Stream handlers are async generators registered in STREAM_HANDLERS that
+take (node, chunks, trace) and yield output chunks. Node types without
+one receive their whole input and pass on their result as a single chunk.
+Blocking work (model inference, gTTS) runs in worker threads. Nodes on a
+branch their condition node didn't pick pass their input through unchanged.
+"""
+import asyncio
+import io
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+from . import utils
+from .mock_handlers import HANDLERS as MOCK_HANDLERS
+from .conditions import is_skipped, node_branches
+from .routing import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+
+class ChunkStream:
+    """Queue of chunks between two nodes; maxsize 0 is unbounded."""
+
+    def __init__(self, maxsize: int = 0):
+        self.queue = asyncio.Queue(maxsize)
+
+    async def put(self, chunk):
+        await self.queue.put(chunk)
+
+    async def close(self):
+        await self.queue.put(_END)
+
+    async def __aiter__(self):
+        while True:
+            chunk = await self.queue.get()
+            if chunk is _END:
+                return
+            yield chunk
+
+
+async def stream_text_input(node, chunks, trace):
+    async for chunk in chunks:
+        yield chunk
+
+
+async def stream_summarization(node, chunks, trace):
+    """
+    Summarize the input in segments of about stream_segment_tokens tokens,
+    split at sentence boundaries, yielding each summary as soon as its
+    segment is complete. Inputs shorter than one segment are summarized
+    in a single call, as without streaming.
+    """
+    segment_tokens = node.config.get('stream_segment_tokens', settings.WORKFLOW_STREAM_SEGMENT_TOKENS)
+    segment, tokens, segments = [], 0, 0
+    async for chunk in chunks:
+        for sentence in utils.split_sentences(str(chunk)):
+            segment.append(sentence)
+            tokens += estimate_tokens(sentence)
+            if tokens >= segment_tokens:
+                yield await asyncio.to_thread(utils.summarize_for_node, node, " ".join(segment), trace)
+                segment, tokens, segments = [], 0, segments + 1
+    if segment or not segments:
+        yield await asyncio.to_thread(utils.summarize_for_node, node, " ".join(segment), trace)
+        segments += 1
+    trace['segments'] = segments
+
+
+async def stream_tts(node, chunks, trace):
+    """Synthesize each incoming chunk as it arrives into one audio file."""
+    if "simulate_failure" in node.config:
+        raise ConnectionError("Simulated API connection failure")
+    audio_file = io.BytesIO()
+    spoken = 0
+    async for chunk in chunks:
+        if isinstance(chunk, str) and chunk.strip():
+            await asyncio.to_thread(utils.synthesize_speech, chunk, audio_file)
+            spoken += 1
+    if not spoken:
+        raise ValueError("Invalid input for TTS: Expected a non-empty string.")
+    audio_file.seek(0)
+    yield "TTS audio generated successfully"
+
+
+async def stream_whole_input(node, chunks, trace):
+    """Adapter for node types that need their complete input."""
+    parts = [chunk async for chunk in chunks]
+    input_data = join_chunks(parts) if parts else None
+    yield await asyncio.to_thread(utils.execute_node, node, input_data, trace=trace)
+
+
+STREAM_HANDLERS = {
+    'text_input': stream_text_input,
+    'huggingface_summarization': stream_summarization,
+    'openai_tts': stream_tts,
+}
+
+
+def stream_handler(node):
+    if getattr(settings, 'WORKFLOW_MOCK_HANDLERS', False) and node.type in MOCK_HANDLERS:
+        return stream_whole_input
+    return STREAM_HANDLERS.get(node.type, stream_whole_input)
+
+
+def join_chunks(chunks: list) -> Any:
+    """A node's result: its only chunk, or its text chunks joined."""
+    if len(chunks) == 1:
+        return chunks[0]
+    return " ".join(str(chunk) for chunk in chunks)
+
+
+@dataclass
+class NodeOutcome:
+    node: Any
+    status: str = 'pending'  # 'completed', 'failed' or 'skipped' once the node has finished
+    result: Any = None
+    error: Optional[Exception] = None
+    trace: dict = field(default_factory=dict)
+    condition: Optional['NodeOutcome'] = None  # Governs whether a branched node runs
+    reused: bool = False  # Result taken from an earlier execution
+    finished: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+async def _chosen_branch(outcome: NodeOutcome) -> Optional[str]:
+    condition = outcome.condition
+    if condition is None:
+        return None
+    await condition.finished.wait()
+    return condition.trace['condition']['branch'] if condition.status == 'completed' else None
+
+
+async def _run_stage(outcome: NodeOutcome, source: ChunkStream, sink: ChunkStream, continue_on_error: bool):
+    node = outcome.node
+    if node_branches(node) is not None and is_skipped(node, await _chosen_branch(outcome)):
+        # Downstream nodes get the output of the last node that ran
+        outcome.status = 'skipped'
+        outcome.finished.set()
+        async for chunk in source:
+            await sink.put(chunk)
+        await sink.close()
+        return
+    start = time.perf_counter()
+    chunks = []
+    try:
+        async for chunk in stream_handler(node)(node, source, outcome.trace):
+            if not chunks:
+                outcome.trace['first_output_ms'] = round((time.perf_counter() - start) * 1000, 1)
+            chunks.append(chunk)
+            await sink.put(chunk)
+    except Exception as e:
+        logger.error(f"Error in streamed Node {node.id}: {str(e)}", exc_info=True)
+        outcome.status, outcome.error = 'failed', e
+        outcome.finished.set()
+        if not continue_on_error:
+            raise
+        # Let upstream nodes run to completion
+        async for _ in source:
+            pass
+    else:
+        outcome.status, outcome.result = 'completed', join_chunks(chunks)
+        outcome.trace['chunks'] = len(chunks)
+        outcome.finished.set()
+    await sink.close()
+
+
+async def _run_pipeline(nodes, continue_on_error: bool, reused: Dict[int, dict]) -> List[NodeOutcome]:
+    outcomes, condition = [], None
+    for node in nodes:
+        outcomes.append(NodeOutcome(node, condition=condition))
+        if node.type == 'condition':
+            condition = outcomes[-1]
+
+    # Reused results of the leading unchanged nodes stand in for running them
+    start, previous = 0, []
+    while start < len(outcomes) and outcomes[start].node.id in reused:
+        outcome, entry = outcomes[start], reused[outcomes[start].node.id]
+        outcome.status = 'skipped' if entry.get('skipped') else 'completed'
+        outcome.result, outcome.trace, outcome.reused = entry.get('result'), entry.get('trace', {}), True
+        outcome.finished.set()
+        if not entry.get('skipped'):
+            previous = [entry.get('result')]
+        start += 1
+
+    # Only the last reused result flows into the first node run, fed before it starts (so that
+    # stream is unbounded); nothing downstream drains the last
+    streams = [ChunkStream()] + [ChunkStream(settings.WORKFLOW_STREAM_BUFFER) for _ in nodes[start + 1:]] + [ChunkStream()]
+    for chunk in previous:
+        await streams[0].put(chunk)
+    await streams[0].close()
+    tasks = [
+        asyncio.create_task(_run_stage(outcome, streams[i], streams[i + 1], continue_on_error))
+        for i, outcome in enumerate(outcomes[start:])
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    except Exception:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return [outcome for outcome in outcomes if outcome.status != 'pending']
+
+
+def run_streaming(workflow, nodes, continue_on_error: bool = False,
+                  reused: Optional[Dict[int, dict]] = None) -> List[NodeOutcome]:
+    """
+    Run nodes (in order) as a streaming pipeline. Returns the outcome of
+    every node that finished, in order; without continue_on_error the
+    first failure cancels the nodes still running. Leading nodes with a
+    result entry in reused (by node id) aren't run again.
+    """
+    nodes = list(nodes)
+    for node in nodes:
+        # Handlers run in worker threads, which shouldn't need the database
+        node.workflow = workflow
+        if node.type == 'map':
+            try:
+                utils.resolve_map_nodes(node)
+            except Exception:
+                pass  # Fails the node when it runs
+    return asyncio.run(_run_pipeline(nodes, continue_on_error, reused or {}))
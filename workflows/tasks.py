@@ -2,6 +2,10 @@
 from celery import shared_task
 from .models import Workflow, WorkflowExecution
 from .utils import execute_node
+from .profiling import ExecutionProfiler
+from .streaming import run_streaming
+from .conditions import is_skipped
+from .incremental import node_fingerprints, reusable_results
 import logging
 import json
 from django.utils import timezone
@@ -20,32 +24,103 @@ def run_workflow(self, workflow_id, execution_id):
         nodes = workflow.nodes.all().order_by('order')
         results = []
         errors = []
+        fingerprints = node_fingerprints(nodes, workflow.config)
+        # A rerun reuses the results of nodes unchanged since the execution it reruns
+        reused = reusable_results(execution.rerun_of, fingerprints) if execution.rerun_of else {}
 
-        logger.info(f"Starting workflow {workflow_id} (execution {execution_id}) with {len(nodes)} nodes")
+        logger.info(f"Starting workflow {workflow_id} (execution {execution_id}) with {len(nodes)} nodes"
+                    f" ({len(reused)} reused)")
 
-        for node in nodes:
-            try:
-                previous_output = results[-1] if results else None
-                result = execute_node(node, previous_output)
-                results.append({
-                    'node_id': node.id,
-                    'success': True,
-                    'result': result
-                })
-            except Exception as e:
-                logger.error(f"Execution {execution_id} failed at node {node.id}")
-                errors.append({
-                    'node_id': node.id,
-                    'error': str(e),
-                    'traceback': self.request.chain.traceback if self.request.chain else None
-                })
-                if not workflow.config.get('continue_on_error', False):
-                    raise
-                results.append({
-                    'node_id': node.id,
-                    'success': False,
-                    'error': str(e)
-                })
+        profiler = ExecutionProfiler() if execution.profile_enabled else None
+        if profiler:
+            profiler.start()
+
+        try:
+            if workflow.config.get('streaming', False):
+                # Nodes run concurrently, so only whole-run profiles are collected
+                for outcome in run_streaming(workflow, nodes, workflow.config.get('continue_on_error', False), reused):
+                    if outcome.reused:
+                        results.append(reused[outcome.node.id])
+                        continue
+                    if outcome.status == 'skipped':
+                        results.append({'node_id': outcome.node.id, 'success': True, 'skipped': True,
+                                        'fingerprint': fingerprints[outcome.node.id]})
+                        continue
+                    if outcome.status == 'completed':
+                        results.append({
+                            'node_id': outcome.node.id,
+                            'success': True,
+                            'result': outcome.result,
+                            'trace': outcome.trace,
+                            'fingerprint': fingerprints[outcome.node.id]
+                        })
+                        continue
+                    logger.error(f"Execution {execution_id} failed at node {outcome.node.id}")
+                    errors.append({
+                        'node_id': outcome.node.id,
+                        'error': str(outcome.error),
+                        'traceback': self.request.chain.traceback if self.request.chain else None
+                    })
+                    if not workflow.config.get('continue_on_error', False):
+                        raise outcome.error
+                    results.append({
+                        'node_id': outcome.node.id,
+                        'success': False,
+                        'error': str(outcome.error),
+                        'fingerprint': fingerprints[outcome.node.id]
+                    })
+            else:
+                branch = None  # Picked by the latest condition node
+                for node in nodes:
+                    if node.id in reused:
+                        entry = reused[node.id]
+                        results.append(entry)
+                        if node.type == 'condition':
+                            branch = entry['trace']['condition']['branch']
+                        continue
+                    if is_skipped(node, branch):
+                        results.append({'node_id': node.id, 'success': True, 'skipped': True,
+                                        'fingerprint': fingerprints[node.id]})
+                        continue
+                    try:
+                        previous_output = next((entry for entry in reversed(results) if not entry.get('skipped')), None)
+                        trace = {}
+                        if profiler:
+                            with profiler.node(node):
+                                result = execute_node(node, previous_output, trace=trace)
+                        else:
+                            result = execute_node(node, previous_output, trace=trace)
+                        entry = {
+                            'node_id': node.id,
+                            'success': True,
+                            'result': result,
+                            'fingerprint': fingerprints[node.id]
+                        }
+                        if trace:
+                            entry['trace'] = trace
+                        results.append(entry)
+                        if node.type == 'condition':
+                            branch = trace['condition']['branch']
+                    except Exception as e:
+                        logger.error(f"Execution {execution_id} failed at node {node.id}")
+                        errors.append({
+                            'node_id': node.id,
+                            'error': str(e),
+                            'traceback': self.request.chain.traceback if self.request.chain else None
+                        })
+                        if node.type == 'condition':
+                            branch = None
+                        if not workflow.config.get('continue_on_error', False):
+                            raise
+                        results.append({
+                            'node_id': node.id,
+                            'success': False,
+                            'error': str(e),
+                            'fingerprint': fingerprints[node.id]
+                        })
+        finally:
+            if profiler:
+                profiler.stop(execution)
 
         execution.status = 'completed' if len(errors) == 0 else 'failed'
         execution.completed_at = timezone.now()
@@ -0,0 +1,96 @@
+# workflows/tests/test_conditions.py
+from unittest.mock import patch
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.contrib.auth import get_user_model
+from workflows.conditions import choose_branch, detect_language, evaluate, json_path
+from workflows.models import Workflow, Node, WorkflowExecution
+from workflows.tasks import run_workflow
+
+User = get_user_model()
+
+LONG_TEXT = "This article is long enough that it is worth summarizing before it is read aloud. " * 5
+
+class EvaluateConditionTest(SimpleTestCase):
+    def test_length(self):
+        self.assertTrue(evaluate({'type': 'length', 'max_tokens': 5}, "one two three"))
+        self.assertFalse(evaluate({'type': 'length', 'max_tokens': 5}, LONG_TEXT))
+        self.assertTrue(evaluate({'type': 'length', 'min_chars': 100}, LONG_TEXT))
+
+    def test_regex(self):
+        self.assertTrue(evaluate({'type': 'regex', 'pattern': r'^this article', 'ignore_case': True}, LONG_TEXT))
+        self.assertFalse(evaluate({'type': 'regex', 'pattern': r'^this article'}, LONG_TEXT))
+
+    def test_json_path(self):
+        data = '{"items": [{"lang": "de"}], "empty": []}'
+        self.assertEqual(json_path(data, "$.items[0].lang"), (True, "de"))
+        self.assertEqual(json_path(data, "items.1.lang"), (False, None))
+        self.assertTrue(evaluate({'type': 'json_path', 'path': '$.items[0].lang', 'equals': 'de'}, data))
+        self.assertFalse(evaluate({'type': 'json_path', 'path': '$.empty'}, data))
+        self.assertFalse(evaluate({'type': 'json_path', 'path': '$.items'}, "not json"))
+
+    def test_language(self):
+        self.assertEqual(detect_language(LONG_TEXT), 'en')
+        self.assertEqual(detect_language("Der Hund ist nicht in dem Haus und die Katze auch nicht."), 'de')
+        self.assertEqual(detect_language("Привет, как дела?"), 'ru')
+        self.assertIsNone(detect_language("12345"))
+        self.assertTrue(evaluate({'type': 'language', 'in': ['en', 'fr']}, LONG_TEXT))
+
+    def test_choose_branch(self):
+        config = {'cases': [{'when': {'type': 'regex', 'pattern': 'urgent'}, 'branch': 'alert'},
+                            {'when': {'type': 'length', 'max_tokens': 10}, 'branch': 'short'}],
+                  'default': 'long'}
+        self.assertEqual(choose_branch(config, "urgent: short"), {'branch': 'alert', 'case': 0})
+        self.assertEqual(choose_branch(config, "short"), {'branch': 'short', 'case': 1})
+        self.assertEqual(choose_branch(config, LONG_TEXT), {'branch': 'long', 'case': None})
+
+@override_settings(WORKFLOW_MOCK_HANDLERS=True)
+class ConditionalWorkflowTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='branchuser', password='branchpass123')
+        self.workflow = Workflow.objects.create(name="Branching", user=self.user, config={})
+        self.text_input = Node.objects.create(workflow=self.workflow, type="text_input", config={'text': "Short note."}, order=1)
+        Node.objects.create(workflow=self.workflow, type="condition", order=2, config={
+            'cases': [{'when': {'type': 'length', 'max_tokens': 50}, 'branch': 'short'}], 'default': 'long'})
+        Node.objects.create(workflow=self.workflow, type="huggingface_summarization", config={'branch': 'long'}, order=3)
+        Node.objects.create(workflow=self.workflow, type="openai_tts", config={'voice': 'echo'}, order=4)
+
+    def run_execution(self):
+        execution = WorkflowExecution.objects.create(workflow=self.workflow)
+        run_workflow(self.workflow.id, execution.id)
+        execution.refresh_from_db()
+        self.assertEqual(execution.status, 'completed')
+        return execution.results
+
+    @patch('workflows.mock_handlers.MockSummarizationHandler.execute', return_value="Summary.")
+    def test_untaken_branch_is_skipped(self, mock_summarize):
+        text_input, condition, summarization, tts = self.run_execution()
+
+        self.assertEqual(condition['trace']['condition'], {'branch': 'short', 'case': 0})
+        self.assertEqual(condition['result'], "Short note.")
+        self.assertTrue(summarization['success'])
+        self.assertTrue(summarization['skipped'])
+        self.assertNotIn('result', summarization)
+        mock_summarize.assert_not_called()
+        # The join node gets the output of the last node that ran
+        self.assertIn(f"'node_id': {condition['node_id']}", tts['result'])
+
+    @patch('workflows.mock_handlers.MockSummarizationHandler.execute', return_value="Summary.")
+    def test_taken_branch_runs(self, mock_summarize):
+        self.text_input.config = {'text': LONG_TEXT}
+        self.text_input.save()
+        _, condition, summarization, tts = self.run_execution()
+
+        self.assertEqual(condition['trace']['condition']['branch'], 'long')
+        self.assertEqual(summarization['result'], "Summary.")
+        self.assertNotIn('skipped', summarization)
+        mock_summarize.assert_called_once()
+
+    @patch('workflows.mock_handlers.MockSummarizationHandler.execute', return_value="Summary.")
+    def test_streaming_skips_untaken_branch(self, mock_summarize):
+        self.workflow.config = {'streaming': True}
+        self.workflow.save()
+        text_input, condition, summarization, tts = self.run_execution()
+
+        self.assertTrue(summarization['skipped'])
+        mock_summarize.assert_not_called()
+        self.assertEqual(tts['result'], "TTS audio generated for: Short note.")
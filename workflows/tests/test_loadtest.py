@@ -0,0 +1,51 @@
+# workflows/tests/test_loadtest.py
+import random
+from unittest.mock import patch
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from workflows.management.commands.loadtest import Command, percentile, parse_mix, ENDPOINTS, USERNAME_PREFIX
+from workflows.models import Workflow
+
+
+class LoadTestHelpersTest(TestCase):
+    def test_percentile_nearest_rank(self):
+        values = [float(i) for i in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 95), 95.0)
+        self.assertEqual(percentile(values, 99), 99.0)
+        self.assertEqual(percentile(values, 100), 100.0)
+
+    def test_percentile_empty_and_single(self):
+        self.assertEqual(percentile([], 99), 0.0)
+        self.assertEqual(percentile([0.25], 50), 0.25)
+
+    def test_parse_mix_defaults(self):
+        weights = parse_mix('')
+        self.assertEqual(set(weights), set(ENDPOINTS))
+        self.assertTrue(all(weight > 0 for weight in weights.values()))
+
+    def test_parse_mix_custom(self):
+        weights = parse_mix('workflows=2,me=1')
+        self.assertEqual(weights['workflows'], 2)
+        self.assertEqual(weights['me'], 1)
+        self.assertEqual(weights['execute'], 0)
+
+    def test_parse_mix_invalid(self):
+        with self.assertRaises(CommandError):
+            parse_mix('unknown=1')
+        with self.assertRaises(CommandError):
+            parse_mix('me=0')
+
+    def test_provision_reuses_duplicate_workflows(self):
+        user = get_user_model().objects.create(username=f"{USERNAME_PREFIX}0")
+        first = Workflow.objects.create(user=user, name='Load test workflow', config={})
+        Workflow.objects.create(user=user, name='Load test workflow', config={})
+        [client] = Command().provision_users(1)
+        self.assertEqual(client['workflow_id'], first.id)
+
+    def test_worker_errors_are_raised(self):
+        options = {'base_url': 'http://testserver', 'duration': 5, 'requests': 1, 'concurrency': 1, 'timeout': 1}
+        with patch('workflows.management.commands.loadtest.requests.Session', side_effect=RuntimeError("boom")):
+            with self.assertRaisesMessage(CommandError, "Load test worker failed: boom"):
+                Command().run([{'token': 't', 'workflow_id': 1}], {'me': 1}, random.Random(0), options)
@@ -0,0 +1,124 @@
+# workflows/tests/test_map.py
+import threading
+import time
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from workflows.models import Workflow, Node, WorkflowExecution
+from workflows.streaming import STREAM_HANDLERS
+from workflows.tasks import run_workflow
+from workflows.utils import _map_items, execute_node
+
+User = get_user_model()
+
+@override_settings(WORKFLOW_MOCK_HANDLERS=False)
+class MapNodeTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='mapuser', password='mappass123')
+        self.sub_workflow = Workflow.objects.create(name="Per item", user=self.user, config={})
+        Node.objects.create(workflow=self.sub_workflow, type="text_input", config={}, order=1)
+        Node.objects.create(workflow=self.sub_workflow, type="huggingface_summarization", config={}, order=2)
+        self.workflow = Workflow.objects.create(name="Map", user=self.user, config={})
+        self.map_node = Node.objects.create(
+            workflow=self.workflow, type="map", order=1,
+            config={'workflow_id': self.sub_workflow.id, 'concurrency': 2}
+        )
+
+    def test_map_items(self):
+        self.assertEqual(_map_items({'result': "one\n\ntwo\n"}), ["one", "two"])
+        self.assertEqual(_map_items("One. Two.", "sentences"), ["One.", "Two."])
+        self.assertEqual(_map_items({'result': [{'text': 'a'}]}), [{'text': 'a'}])
+        with self.assertRaises(ValueError):
+            _map_items("text", "words")
+
+    @patch('workflows.utils.summarize')
+    def test_results_ordered_with_bounded_concurrency(self, mock_summarize):
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def summarize(text, backend, model):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            # Earlier items finish last
+            time.sleep(0.05 / int(text[-1]))
+            with lock:
+                active[0] -= 1
+            return [{'summary_text': f"summary of {text}"}]
+
+        mock_summarize.side_effect = summarize
+        trace = {}
+        result = execute_node(self.map_node, "item 1\nitem 2\nitem 3\nitem 4", trace=trace)
+
+        self.assertEqual(result, [f"summary of item {i}" for i in range(1, 5)])
+        self.assertEqual(peak[0], 2)
+        self.assertEqual(trace['map'], {'items': 4, 'failed': [], 'concurrency': 2})
+
+    @patch('workflows.utils.summarize')
+    def test_partial_failure(self, mock_summarize):
+        def summarize(text, backend, model):
+            if text == "bad":
+                raise RuntimeError("model error")
+            return [{'summary_text': text.upper()}]
+
+        mock_summarize.side_effect = summarize
+        with self.assertRaisesMessage(ValueError, "Map item 1 failed: model error"):
+            execute_node(self.map_node, ["good", "bad", "fine"])
+
+        self.workflow.config = {'continue_on_error': True}
+        self.workflow.save()
+        self.map_node.refresh_from_db()
+        trace = {}
+        result = execute_node(self.map_node, ["good", "bad", "fine"], trace=trace)
+        self.assertEqual(result, ["GOOD", None, "FINE"])
+        self.assertEqual(trace['map']['failed'], [{'index': 1, 'error': 'model error'}])
+
+    def test_recursive_map_rejected(self):
+        Node.objects.create(workflow=self.sub_workflow, type="map", order=3,
+                            config={'workflow_id': self.workflow.id})
+        with self.assertRaisesMessage(ValueError, "would recurse"):
+            execute_node(self.map_node, ["item"])
+
+    @patch('workflows.utils.summarize')
+    def test_items_skip_untaken_branches(self, mock_summarize):
+        mock_summarize.side_effect = lambda text, backend, model: [{'summary_text': f"summary of {text}"}]
+        summarization = self.sub_workflow.nodes.get(type="huggingface_summarization")
+        summarization.config = {'branch': 'long'}
+        summarization.save()
+        Node.objects.create(workflow=self.sub_workflow, type="condition", order=0, config={
+            'cases': [{'when': {'type': 'length', 'max_chars': 10}, 'branch': 'short'}], 'default': 'long'})
+
+        result = execute_node(self.map_node, ["tiny", "an item long enough to summarize"])
+        self.assertEqual(result, ["tiny", "summary of an item long enough to summarize"])
+        mock_summarize.assert_called_once()
+
+    @patch('workflows.utils.summarize')
+    def test_nested_maps_load_workflows_up_front(self, mock_summarize):
+        mock_summarize.side_effect = lambda text, backend, model: [{'summary_text': text.upper()}]
+        outer = Workflow.objects.create(name="Outer", user=self.user, config={'streaming': True})
+        Node.objects.create(workflow=outer, type="text_input", config={}, order=1)
+        Node.objects.create(workflow=outer, type="map", config={'workflow_id': self.workflow.id, 'concurrency': 2}, order=2)
+        self.map_node.config = {**self.map_node.config, 'split': 'sentences'}
+        self.map_node.save()
+
+        threads = []
+        get = Workflow.objects.get
+
+        def recording_get(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return get(*args, **kwargs)
+
+        async def source(node, chunks, trace):
+            yield "a b\nc"
+
+        execution = WorkflowExecution.objects.create(workflow=outer)
+        with patch.object(Workflow.objects, 'get', side_effect=recording_get), \
+                patch.dict(STREAM_HANDLERS, text_input=source):
+            run_workflow(outer.id, execution.id)
+        execution.refresh_from_db()
+
+        self.assertEqual(execution.status, 'completed')
+        self.assertEqual(execution.results[1]['result'], [["A B"], ["C"]])
+        # The executed workflow and both mapped-over workflows, all from the task's thread
+        self.assertEqual(len(threads), 3)
+        self.assertTrue(all(thread is threading.main_thread() for thread in threads))
@@ -0,0 +1,67 @@
+# workflows/tests/test_profiling.py
+from unittest.mock import patch
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework import status
+from workflows.models import Workflow, Node, WorkflowExecution, ExecutionProfile
+from workflows.tasks import run_workflow
+import marshal
+
+User = get_user_model()
+
+class ExecutionProfilingTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='profileuser', password='profilepass123')
+        self.workflow = Workflow.objects.create(name="Profiled Workflow", user=self.user)
+        Node.objects.create(workflow=self.workflow, type="text_input", config={}, order=1)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_profile_not_collected_by_default(self):
+        execution = WorkflowExecution.objects.create(workflow=self.workflow)
+        run_workflow(self.workflow.id, execution.id)
+        self.assertFalse(ExecutionProfile.objects.filter(execution=execution).exists())
+
+    def test_profile_collected_when_enabled(self):
+        execution = WorkflowExecution.objects.create(workflow=self.workflow, profile_enabled=True)
+        run_workflow(self.workflow.id, execution.id)
+
+        profile = ExecutionProfile.objects.get(execution=execution)
+        self.assertIsInstance(marshal.loads(bytes(profile.cpu_stats)), dict)
+        self.assertIn('peak', profile.memory_stats)
+        self.assertEqual(len(profile.node_stats), 1)
+        self.assertEqual(profile.node_stats[0]['type'], 'text_input')
+
+    def test_profile_download(self):
+        execution = WorkflowExecution.objects.create(workflow=self.workflow, profile_enabled=True)
+        run_workflow(self.workflow.id, execution.id)
+        url = reverse('workflowexecution-profile', kwargs={'pk': execution.id})
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('attachment', response['Content-Disposition'])
+
+        response = self.client.get(url, {'kind': 'memory'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['nodes']), 1)
+
+    def test_profile_download_missing(self):
+        execution = WorkflowExecution.objects.create(workflow=self.workflow)
+        url = reverse('workflowexecution-profile', kwargs={'pk': execution.id})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @patch('workflows.views.run_workflow.delay')
+    def test_execute_parses_profile_flag(self, mock_delay):
+        url = reverse('workflow-execute', kwargs={'pk': self.workflow.id})
+        response = self.client.post(url, {'profile': 'false'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(WorkflowExecution.objects.get(id=response.data['execution_id']).profile_enabled)
+
+        response = self.client.post(url, {'profile': 'true'}, format='json')
+        self.assertTrue(WorkflowExecution.objects.get(id=response.data['execution_id']).profile_enabled)
+
+        response = self.client.post(url, {'profile': 'sometimes'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,160 @@
+# workflows/tests/test_rerun.py
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from workflows.incremental import node_fingerprints
+from workflows.models import Workflow, Node, WorkflowExecution
+from workflows.tasks import run_workflow
+
+User = get_user_model()
+
+@override_settings(WORKFLOW_MOCK_HANDLERS=True)
+@patch('workflows.mock_handlers.MockTTSHandler.execute', side_effect=lambda node, data: f"audio in {node.config['voice']}")
+@patch('workflows.mock_handlers.MockSummarizationHandler.execute', return_value="Summary.")
+class RerunTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='rerunuser', password='rerunpass123')
+        self.workflow = Workflow.objects.create(name="Rerun", user=self.user, config={})
+        self.text_input = Node.objects.create(workflow=self.workflow, type="text_input", config={'text': "Article."}, order=1)
+        Node.objects.create(workflow=self.workflow, type="huggingface_summarization", config={}, order=2)
+        self.tts = Node.objects.create(workflow=self.workflow, type="openai_tts", config={'voice': 'echo'}, order=3)
+
+    def execute(self, rerun_of=None):
+        execution = WorkflowExecution.objects.create(workflow=self.workflow, rerun_of=rerun_of)
+        run_workflow(self.workflow.id, execution.id)
+        execution.refresh_from_db()
+        self.assertEqual(execution.status, 'completed')
+        return execution
+
+    def test_fingerprints_chain_upstream_changes(self, mock_summarize, mock_tts):
+        nodes = list(self.workflow.nodes.order_by('order'))
+        before = node_fingerprints(nodes)
+        nodes[2].config = {'voice': 'nova'}
+        after = node_fingerprints(nodes)
+        self.assertEqual([before[n.id] == after[n.id] for n in nodes], [True, True, False])
+        nodes[0].config = {'text': "Other."}
+        after = node_fingerprints(nodes)
+        self.assertEqual([before[n.id] == after[n.id] for n in nodes], [False, False, False])
+
+    def test_fingerprints_cover_workflow_settings_and_mapped_workflows(self, mock_summarize, mock_tts):
+        nodes = list(self.workflow.nodes.order_by('order'))
+        before = node_fingerprints(nodes, {'streaming': False, 'label': "a"})
+        self.assertEqual(node_fingerprints(nodes, {'label': "b"}), before)
+        self.assertNotEqual(node_fingerprints(nodes, {'streaming': True})[nodes[0].id], before[nodes[0].id])
+        self.assertNotEqual(node_fingerprints(nodes, {'latency_budget_ms': 500}), before)
+
+        sub_workflow = Workflow.objects.create(name="Per item", user=self.user, config={})
+        sub_node = Node.objects.create(workflow=sub_workflow, type="huggingface_summarization", config={}, order=1)
+        map_node = Node.objects.create(workflow=self.workflow, type="map", config={'workflow_id': sub_workflow.id}, order=4)
+        before = node_fingerprints([map_node])
+        sub_node.config = {'model': "other"}
+        sub_node.save()
+        self.assertNotEqual(node_fingerprints([map_node]), before)
+        before = node_fingerprints([map_node])
+        sub_workflow.config = {'continue_on_error': True}
+        sub_workflow.save()
+        self.assertNotEqual(node_fingerprints([map_node]), before)
+
+    def test_rerun_executes_only_changed_nodes(self, mock_summarize, mock_tts):
+        first = self.execute()
+        self.tts.config = {'voice': 'nova'}
+        self.tts.save()
+
+        second = self.execute(rerun_of=first)
+        text_input, summarization, tts = second.results
+        self.assertTrue(text_input['reused'])
+        self.assertEqual(summarization, {**first.results[1], 'reused': True})
+        self.assertNotIn('reused', tts)
+        self.assertEqual(tts['result'], "audio in nova")
+        self.assertEqual(mock_summarize.call_count, 1)
+        self.assertEqual(mock_tts.call_count, 2)
+        # The re-executed TTS node got the stored summary as its input
+        self.assertEqual(mock_tts.call_args.args[1]['result'], "Summary.")
+
+        # Rerunning a rerun with nothing changed executes nothing
+        self.execute(rerun_of=second)
+        self.assertEqual((mock_summarize.call_count, mock_tts.call_count), (1, 2))
+
+    def test_upstream_change_reruns_downstream(self, mock_summarize, mock_tts):
+        first = self.execute()
+        self.text_input.config = {'text': "Revised article."}
+        self.text_input.save()
+
+        second = self.execute(rerun_of=first)
+        self.assertFalse(any(entry.get('reused') for entry in second.results))
+        self.assertEqual(mock_summarize.call_count, 2)
+
+    def test_failed_nodes_are_not_reused(self, mock_summarize, mock_tts):
+        self.workflow.config = {'continue_on_error': True}
+        self.workflow.save()
+        mock_summarize.side_effect = RuntimeError("model error")
+        execution = WorkflowExecution.objects.create(workflow=self.workflow)
+        run_workflow(self.workflow.id, execution.id)
+        execution.refresh_from_db()
+        self.assertFalse(execution.results[1]['success'])
+
+        mock_summarize.side_effect = None
+        second = WorkflowExecution.objects.create(workflow=self.workflow, rerun_of=execution)
+        run_workflow(self.workflow.id, second.id)
+        second.refresh_from_db()
+        self.assertEqual([entry.get('reused', False) for entry in second.results], [True, False, False])
+        self.assertEqual(second.results[1]['result'], "Summary.")
+
+    def test_settings_change_reruns_everything(self, mock_summarize, mock_tts):
+        first = self.execute()
+        self.workflow.config = {'latency_budget_ms': 500}
+        self.workflow.save()
+
+        second = self.execute(rerun_of=first)
+        self.assertFalse(any(entry.get('reused') for entry in second.results))
+
+    def test_streaming_rerun_feeds_reused_output_downstream(self, mock_summarize, mock_tts):
+        self.workflow.config = {'streaming': True}
+        self.workflow.save()
+        first = self.execute()
+        self.tts.config = {'voice': 'nova'}
+        self.tts.save()
+
+        second = self.execute(rerun_of=first)
+        self.assertEqual([entry.get('reused', False) for entry in second.results], [True, True, False])
+        self.assertEqual(second.results[2]['result'], "audio in nova")
+        self.assertEqual(mock_summarize.call_count, 1)
+        self.assertEqual(mock_tts.call_args.args[1], "Summary.")
+
+    @override_settings(WORKFLOW_STREAM_BUFFER=1)
+    def test_streaming_rerun_with_single_chunk_buffer(self, mock_summarize, mock_tts):
+        self.workflow.config = {'streaming': True}
+        self.workflow.save()
+        first = self.execute()
+        self.tts.config = {'voice': 'nova'}
+        self.tts.save()
+
+        second = self.execute(rerun_of=first)
+        self.assertEqual(second.results[2]['result'], "audio in nova")
+
+    def test_rerun_action(self, mock_summarize, mock_tts):
+        first = WorkflowExecution.objects.create(workflow=self.workflow, status='completed', results=[])
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with patch('workflows.views.run_workflow.delay') as mock_delay:
+            response = client.post(f'/api/workflows/workflow_executions/{first.id}/rerun/')
+
+        self.assertEqual(response.status_code, 200)
+        execution = WorkflowExecution.objects.get(id=response.data['execution_id'])
+        self.assertEqual(execution.rerun_of, first)
+        self.assertEqual(response.data['rerun_of'], first.id)
+        mock_delay.assert_called_once_with(self.workflow.id, execution.id)
+
+    def test_rerun_action_parses_profile_flag(self, mock_summarize, mock_tts):
+        first = WorkflowExecution.objects.create(workflow=self.workflow, status='completed', results=[], profile_enabled=True)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f'/api/workflows/workflow_executions/{first.id}/rerun/'
+        with patch('workflows.views.run_workflow.delay'):
+            response = client.post(url, {'profile': 'false'}, format='json')
+            self.assertFalse(WorkflowExecution.objects.get(id=response.data['execution_id']).profile_enabled)
+            response = client.post(url, {}, format='json')
+            self.assertTrue(WorkflowExecution.objects.get(id=response.data['execution_id']).profile_enabled)
+            response = client.post(url, {'profile': 'maybe'}, format='json')
+            self.assertEqual(response.status_code, 400)
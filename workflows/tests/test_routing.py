@@ -0,0 +1,128 @@
+# workflows/tests/test_routing.py
+from unittest.mock import MagicMock, patch
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.contrib.auth import get_user_model
+from workflows.models import Workflow, Node, WorkflowExecution
+from workflows.routing import LatencyTracker, SummarizationModel, choose_summarization_model, queue_depth
+from workflows.tasks import run_workflow
+from workflows.utils import execute_node
+
+User = get_user_model()
+
+MODELS = [
+    {'model': 'distilbart', 'max_input_tokens': 1024, 'ms_per_token': 1.0, 'base_ms': 100},
+    {'model': 'bart-large', 'max_input_tokens': 1024, 'ms_per_token': 2.0, 'base_ms': 200},
+    {'model': 'long-t5', 'max_input_tokens': 4096, 'ms_per_token': 4.0, 'base_ms': 300},
+]
+
+def words(count):
+    return " ".join(["word"] * count)
+
+@override_settings(WORKFLOW_SUMMARIZATION_MODELS=MODELS, WORKFLOW_SUMMARIZATION_SHORT_INPUT_TOKENS=100,
+                   WORKFLOW_ROUTING_QUEUE_PENALTY=0.1)
+@patch('workflows.routing.queue_depth', return_value=0)
+@patch('workflows.routing.latency_tracker', LatencyTracker())
+class ChooseSummarizationModelTest(SimpleTestCase):
+    def test_short_input_uses_smallest_model(self, queue_depth):
+        decision = choose_summarization_model(words(50))
+        self.assertEqual((decision.model, decision.reason), ('distilbart', 'short_input'))
+        self.assertEqual(decision.input_tokens, 50)
+
+    def test_without_budget_uses_largest_model_that_fits(self, queue_depth):
+        decision = choose_summarization_model(words(500))
+        self.assertEqual((decision.model, decision.reason), ('long-t5', 'largest'))
+        self.assertEqual(decision.estimated_ms, {'distilbart': 600.0, 'bart-large': 1200.0, 'long-t5': 2300.0})
+
+    def test_long_input_needs_long_context_model(self, queue_depth):
+        decision = choose_summarization_model(words(2000), latency_budget_ms=1000)
+        self.assertEqual((decision.model, decision.reason), ('long-t5', 'over_budget'))
+
+    def test_latency_budget(self, queue_depth):
+        self.assertEqual(choose_summarization_model(words(500), latency_budget_ms=1500).model, 'bart-large')
+        decision = choose_summarization_model(words(500), latency_budget_ms=800)
+        self.assertEqual((decision.model, decision.reason), ('distilbart', 'latency_budget'))
+        decision = choose_summarization_model(words(500), latency_budget_ms=100)
+        self.assertEqual((decision.model, decision.reason), ('distilbart', 'over_budget'))
+
+    def test_queue_depth_slows_estimates(self, queue_depth):
+        queue_depth.return_value = 5
+        decision = choose_summarization_model(words(500), latency_budget_ms=1500)
+        self.assertEqual(decision.model, 'distilbart')
+        self.assertEqual(decision.queue_depth, 5)
+        self.assertEqual(decision.estimated_ms['bart-large'], 1800.0)
+
+    def test_pinned_model_skips_routing(self, queue_depth):
+        decision = choose_summarization_model(words(50), pinned='custom/model')
+        self.assertEqual((decision.model, decision.reason), ('custom/model', 'pinned'))
+        queue_depth.assert_not_called()
+
+class LatencyTrackerTest(SimpleTestCase):
+    def test_observations_update_estimates(self):
+        tracker = LatencyTracker()
+        model = SummarizationModel('bart', ms_per_token=2.0, base_ms=200)
+        self.assertEqual(tracker.estimate(model, 100), 400)
+        tracker.observe(model, 100, 700)  # 5 ms per token
+        self.assertEqual(tracker.estimate(model, 100), 700)
+        tracker.observe(model, 100, 200)  # 0 ms per token, averaged in
+        self.assertEqual(tracker.ms_per_token(model), 4.0)
+
+@override_settings(WORKFLOW_ROUTING_QUEUE_DEPTH_TTL=2, WORKFLOW_ROUTING_QUEUE_DEPTH_RETRY_INTERVAL=60,
+                   WORKFLOW_ROUTING_BROKER_TIMEOUT=0.5)
+class QueueDepthTest(SimpleTestCase):
+    def setUp(self):
+        patcher = patch('workflows.routing._queue_depth', {'value': None, 'valid_until': 0.0})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_depth_cached_for_ttl(self):
+        connection = MagicMock()
+        connection.__enter__.return_value.default_channel.queue_declare.return_value.message_count = 3
+        with patch('celery.current_app.connection_for_read', return_value=connection) as connect, \
+                patch('workflows.routing.time.monotonic', side_effect=[100.0, 101.0, 103.0]):
+            self.assertEqual([queue_depth(), queue_depth(), queue_depth()], [3, 3, 3])
+        self.assertEqual(connect.call_count, 2)
+        connect.assert_called_with(connect_timeout=0.5)
+        connection.__enter__.return_value.ensure_connection.assert_called_with(max_retries=0, timeout=0.5)
+
+    def test_unreachable_broker_retried_after_longer_interval(self):
+        connection = MagicMock()
+        connection.__enter__.return_value.ensure_connection.side_effect = ConnectionError("broker down")
+        with patch('celery.current_app.connection_for_read', return_value=connection) as connect, \
+                patch('workflows.routing.time.monotonic', side_effect=[100.0, 130.0, 161.0]):
+            self.assertEqual([queue_depth(), queue_depth(), queue_depth()], [None, None, None])
+        self.assertEqual(connect.call_count, 2)
+
+@override_settings(WORKFLOW_SUMMARIZATION_MODELS=MODELS, WORKFLOW_SUMMARIZATION_SHORT_INPUT_TOKENS=100)
+@patch('workflows.routing.queue_depth', return_value=None)
+@patch('workflows.routing.latency_tracker', LatencyTracker())
+class SummarizationRoutingTraceTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='routeuser', password='routepass123')
+        self.workflow = Workflow.objects.create(name="Routing", user=self.user, config={'latency_budget_ms': 800})
+        Node.objects.create(workflow=self.workflow, type="text_input", config={}, order=1)
+        Node.objects.create(workflow=self.workflow, type="huggingface_summarization", config={}, order=2)
+
+    @patch('workflows.utils.summarize', return_value=[{'summary_text': 'Short summary'}])
+    def test_workflow_latency_budget_routes_node(self, mock_summarize, queue_depth):
+        node = Node.objects.get(workflow=self.workflow, order=2)
+        trace = {}
+        result = execute_node(node, {'result': words(500)}, trace=trace)
+
+        self.assertEqual(result, 'Short summary')
+        mock_summarize.assert_called_once_with(words(500), 'eager', 'distilbart')
+        self.assertEqual(trace['routing']['model'], 'distilbart')
+        self.assertEqual(trace['routing']['reason'], 'latency_budget')
+        self.assertEqual(trace['routing']['latency_budget_ms'], 800)
+        self.assertIn('latency_ms', trace['routing'])
+
+    @patch('workflows.utils.summarize', return_value=[{'summary_text': 'Short summary'}])
+    def test_choice_is_recorded_in_execution_results(self, mock_summarize, queue_depth):
+        execution = WorkflowExecution.objects.create(workflow=self.workflow)
+        run_workflow(self.workflow.id, execution.id)
+
+        execution.refresh_from_db()
+        text_input, summarization = execution.results
+        self.assertNotIn('trace', text_input)
+        self.assertEqual(summarization['result'], 'Short summary')
+        self.assertEqual(summarization['trace']['routing']['model'], 'distilbart')
+        self.assertEqual(summarization['trace']['routing']['reason'], 'short_input')
@@ -0,0 +1,36 @@
+# workflows/tests/test_startup_profile.py
+from django.test import SimpleTestCase
+from workflows.management.commands.startup_profile import STAGE_MARKER, parse_importtime, requested_import_times
+
+SAMPLE_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       281 |        281 |   _io
+import time:       544 |       1560 | _frozen_importlib_external
+import time:        78 |         78 |     _codecs
+Traceback lines are ignored
+"""
+
+class ParseImportTimeTest(SimpleTestCase):
+    def test_parse_entries(self):
+        entries = parse_importtime(SAMPLE_OUTPUT)
+        self.assertEqual(entries, [
+            ('_io', 281, 281, 1),
+            ('_frozen_importlib_external', 544, 1560, 0),
+            ('_codecs', 78, 78, 2),
+        ])
+
+    def test_parse_empty(self):
+        self.assertEqual(parse_importtime(""), [])
+
+    def test_requested_modules_already_imported(self):
+        output = (
+            "import time:       120 |        300 | workflows.models\n"
+            f"{STAGE_MARKER}workflows.models\n"
+            f"{STAGE_MARKER}workflows.tasks\n"
+            "import time:        50 |         50 |   workflows.utils\n"
+            "import time:       200 |        250 | workflows.tasks\n"
+            f"{STAGE_MARKER}workflows.utils\n"
+        )
+        self.assertEqual(
+            requested_import_times(output, ['workflows.models', 'workflows.tasks', 'workflows.utils']),
+            {'workflows.models': None, 'workflows.tasks': 250, 'workflows.utils': None},
+        )
@@ -0,0 +1,118 @@
+# workflows/tests/test_streaming.py
+import asyncio
+import threading
+from unittest.mock import patch
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.contrib.auth import get_user_model
+from workflows.models import Workflow, Node, WorkflowExecution
+from workflows.streaming import STREAM_HANDLERS, ChunkStream, run_streaming
+from workflows.utils import split_sentences
+from workflows.tasks import run_workflow
+
+User = get_user_model()
+
+def sentences(count, words=10):
+    return " ".join(f"Sentence {i} " + "word " * (words - 2) + "end." for i in range(count))
+
+class ChunkStreamTest(SimpleTestCase):
+    def test_split_sentences(self):
+        self.assertEqual(split_sentences("One. Two?  Three! "), ["One.", "Two?", "Three!"])
+
+    def test_full_buffer_blocks_producer(self):
+        events = []
+
+        async def produce(stream):
+            for i in range(3):
+                await stream.put(i)
+                events.append(f"put {i}")
+            await stream.close()
+
+        async def consume(stream):
+            await asyncio.sleep(0.01)
+            async for chunk in stream:
+                events.append(f"got {chunk}")
+
+        async def main():
+            stream = ChunkStream(maxsize=1)
+            await asyncio.gather(produce(stream), consume(stream))
+
+        asyncio.run(main())
+        # The producer can only get one chunk ahead of the consumer
+        self.assertEqual(events[:2], ["put 0", "got 0"])
+        self.assertEqual(sorted(events), ["got 0", "got 1", "got 2", "put 0", "put 1", "put 2"])
+
+@override_settings(WORKFLOW_STREAM_SEGMENT_TOKENS=20, WORKFLOW_MOCK_HANDLERS=False)
+class StreamingWorkflowTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='streamuser', password='streampass123')
+        self.workflow = Workflow.objects.create(name="Streaming", user=self.user, config={'streaming': True})
+        Node.objects.create(workflow=self.workflow, type="text_input", config={}, order=1)
+        Node.objects.create(workflow=self.workflow, type="huggingface_summarization", config={}, order=2)
+        Node.objects.create(workflow=self.workflow, type="openai_tts", config={'voice': 'echo'}, order=3)
+
+    def nodes(self):
+        return self.workflow.nodes.all().order_by('order')
+
+    @patch('workflows.utils.gTTS')
+    @patch('workflows.utils.summarize')
+    def test_tts_starts_before_summarization_finishes(self, mock_summarize, mock_gtts):
+        first_spoken = threading.Event()
+        spoken_before_last_summary = []
+        mock_gtts.return_value.write_to_fp.side_effect = lambda fp: first_spoken.set()
+
+        def summarize(text, backend, model):
+            if mock_summarize.call_count > 1:
+                spoken_before_last_summary.append(first_spoken.wait(5))
+            return [{'summary_text': f"Summary {mock_summarize.call_count}."}]
+
+        mock_summarize.side_effect = summarize
+        with patch.dict(STREAM_HANDLERS, text_input=self.source(sentences(4))):
+            outcomes = run_streaming(self.workflow, self.nodes())
+
+        self.assertEqual(spoken_before_last_summary, [True])
+        self.assertEqual([outcome.status for outcome in outcomes], ['completed'] * 3)
+        summarization, tts = outcomes[1], outcomes[2]
+        self.assertEqual(summarization.result, "Summary 1. Summary 2.")
+        self.assertEqual(summarization.trace['segments'], 2)
+        self.assertEqual(summarization.trace['routing']['reason'], 'only_model')
+        self.assertEqual(tts.result, "TTS audio generated successfully")
+        self.assertEqual(mock_gtts.call_args_list[0].kwargs['text'], "Summary 1.")
+        self.assertIn('first_output_ms', tts.trace)
+
+    @staticmethod
+    def source(text):
+        """Stand-in text_input handler emitting text as one chunk."""
+        async def stream_text_input(node, chunks, trace):
+            async for _ in chunks:
+                pass
+            yield text
+        return stream_text_input
+
+    @patch('workflows.utils.gTTS')
+    @patch('workflows.utils.summarize', return_value=[{'summary_text': 'Summary.'}])
+    def test_failure_stops_pipeline_unless_continue_on_error(self, mock_summarize, mock_gtts):
+        Node.objects.filter(type="openai_tts").update(config={'voice': 'echo', 'simulate_failure': True})
+        with patch.dict(STREAM_HANDLERS, text_input=self.source(sentences(1))):
+            outcomes = run_streaming(self.workflow, self.nodes(), continue_on_error=True)
+        self.assertEqual([outcome.status for outcome in outcomes], ['completed', 'completed', 'failed'])
+        self.assertIsInstance(outcomes[2].error, ConnectionError)
+
+        with patch.dict(STREAM_HANDLERS, text_input=self.source(sentences(1))):
+            outcomes = run_streaming(self.workflow, self.nodes())
+        self.assertEqual(outcomes[-1].status, 'failed')
+        mock_gtts.assert_not_called()
+
+    @patch('workflows.utils.gTTS')
+    @patch('workflows.utils.summarize', return_value=[{'summary_text': 'Summary.'}])
+    def test_run_workflow_records_streamed_results(self, mock_summarize, mock_gtts):
+        execution = WorkflowExecution.objects.create(workflow=self.workflow)
+        with patch.dict(STREAM_HANDLERS, text_input=self.source(sentences(1))):
+            run_workflow(self.workflow.id, execution.id)
+
+        execution.refresh_from_db()
+        self.assertEqual(execution.status, 'completed')
+        text_input, summarization, tts = execution.results
+        self.assertEqual(text_input['result'], sentences(1))
+        self.assertEqual(summarization['result'], 'Summary.')
+        self.assertEqual(summarization['trace']['chunks'], 1)
+        self.assertEqual(tts['result'], "TTS audio generated successfully")
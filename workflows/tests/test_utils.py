@@ -73,6 +73,18 @@ class ExecuteNodeTest(TestCase):
         
         mock_summarizer.assert_called_once_with(input_data)
         self.assertEqual(result, "This is a summary")
+
+    @patch('workflows.utils.summarizer_pipeline')
+    @patch('workflows.utils.infer_remote')
+    def test_summarization_node_uses_inference_server(self, mock_infer, mock_summarizer):
+        """Summaries come from the host inference server when it is running"""
+        mock_infer.return_value = [{'output': [{'summary_text': 'Remote summary'}], 'usage': None}]
+
+        result = execute_node(self.summarization_node, "Some long text")
+
+        mock_infer.assert_called_once_with("summarization", "facebook/bart-large-cnn", ["Some long text"], backend="eager")
+        mock_summarizer.assert_not_called()
+        self.assertEqual(result, "Remote summary")
     
     def test_unknown_node_type(self):
         """Test execution of unknown node type"""
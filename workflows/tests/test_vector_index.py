@@ -0,0 +1,121 @@
+# workflows/tests/test_vector_index.py
+import tempfile
+from unittest.mock import patch
+import numpy as np
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework import status
+from workflows.models import Workflow, Node
+from workflows.utils import execute_node, index_documents
+from workflows.vector_index import VectorIndex, VectorIndexError
+
+User = get_user_model()
+
+# Deterministic stand-in embeddings: each known word is one axis
+VOCABULARY = ['cat', 'dog', 'car', 'boat', 'plane']
+
+def fake_embed(texts, backend=None, model=None, batch_size=None, base_url=None):
+    vectors = np.zeros((len(texts), len(VOCABULARY)), dtype=np.float32)
+    for i, text in enumerate(texts):
+        for word in text.lower().split():
+            if word in VOCABULARY:
+                vectors[i, VOCABULARY.index(word)] += 1
+    return vectors
+
+class VectorIndexTest(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.index = VectorIndex(self.tmp.name)
+
+    def test_top_k_cosine_search(self):
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(1000, 16)).astype(np.float32)
+        self.index.add(vectors, [{'text': str(i)} for i in range(1000)], model='test')
+        [matches] = self.index.search(vectors[42] * 3, k=3)
+        self.assertEqual(matches[0][0], 42)
+        self.assertAlmostEqual(matches[0][1], 1.0, places=5)
+        self.assertEqual(len(matches), 3)
+        self.assertGreaterEqual(matches[1][1], matches[2][1])
+
+    def test_incremental_appends(self):
+        self.index.add(np.eye(4)[:2], [{'text': 'a'}, {'text': 'b'}])
+        rows = self.index.add(np.eye(4)[2:], [{'text': 'c'}, {'text': 'd'}])
+        self.assertEqual(list(rows), [2, 3])
+        self.assertEqual(len(self.index), 4)
+        [result] = self.index.query(np.eye(4)[3], k=1)
+        self.assertEqual(result['text'], 'd')
+        self.assertEqual(result['row'], 3)
+
+    def test_rejects_dimension_and_model_mismatch(self):
+        self.index.add(np.eye(4)[:1], [{'text': 'a'}], model='one')
+        with self.assertRaises(VectorIndexError):
+            self.index.add(np.eye(3)[:1], [{'text': 'b'}])
+        with self.assertRaises(VectorIndexError):
+            self.index.add(np.eye(4)[:1], [{'text': 'b'}], model='two')
+
+    def test_empty_index(self):
+        self.assertEqual(len(self.index), 0)
+        self.assertEqual(self.index.search(np.ones(4)), [[]])
+
+@patch('workflows.embeddings.embed_texts', fake_embed)
+class EmbeddingNodeTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        settings_override = override_settings(WORKFLOW_VECTOR_INDEX_DIR=self.tmp.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(username='vectoruser', password='vectorpass123')
+        self.workflow = Workflow.objects.create(name="Vector Workflow", user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_embedding_then_similarity_search(self):
+        embed_node = Node.objects.create(workflow=self.workflow, type="embedding", config={'model': 'test'}, order=1)
+        search_node = Node.objects.create(workflow=self.workflow, type="similarity_search", config={'k': 2}, order=2)
+
+        indexed = execute_node(embed_node, {'result': ['a cat', 'a dog', 'a boat', '  ']})
+        self.assertEqual(indexed['added'], 3)
+        self.assertEqual(indexed['dim'], len(VOCABULARY))
+
+        matches = execute_node(search_node, {'result': 'boat trip'})
+        self.assertEqual([match['text'] for match in matches][0], 'a boat')
+        self.assertEqual(len(matches), 2)
+        self.assertAlmostEqual(matches[0]['score'], 1.0, places=5)
+
+    def test_dedupe_threshold(self):
+        first = index_documents(self.workflow.id, ['cat', 'car'], {'model': 'test'})
+        self.assertEqual(first['added'], 2)
+        second = index_documents(self.workflow.id, ['cat cat', 'plane', 'plane'], {'model': 'test', 'dedupe_threshold': 0.99})
+        self.assertEqual(second['added'], 1)
+        self.assertEqual(len(second['duplicates']), 2)
+        self.assertEqual(second['index_size'], 3)
+
+    def test_search_endpoint(self):
+        index_documents(self.workflow.id, ['cat', 'dog', 'car'], {'model': 'test'})
+        url = reverse('workflow-search', kwargs={'pk': self.workflow.id})
+        response = self.client.post(url, {'query': 'my dog', 'k': 2}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['text'], 'dog')
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_search_endpoint_requires_query(self):
+        url = reverse('workflow-search', kwargs={'pk': self.workflow.id})
+        response = self.client.post(url, {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_similarity_search_k_must_be_positive(self):
+        for k in (0, -1, "3", True):
+            response = self.client.post(reverse('node-list'), {
+                'workflow': self.workflow.id, 'type': 'similarity_search', 'config': {'k': k}, 'order': 1
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, k)
+            self.assertIn('config', response.data)
+        response = self.client.post(reverse('node-list'), {
+            'workflow': self.workflow.id, 'type': 'similarity_search', 'config': {'k': 3}, 'order': 1
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
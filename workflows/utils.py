@@ -1,15 +1,263 @@
 # workflows/utils.py
 import logging
 import io
-from gtts import gTTS
-from transformers import pipeline
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from .mock_handlers import HANDLERS as MOCK_HANDLERS
+from .routing import choose_summarization_model, record_latency
+from .conditions import choose_branch, is_skipped
+from ai_integration.inference_backends import DEFAULT_BACKEND
+from ai_integration.inference_server import InferenceUnavailable, infer_remote
 
 logger = logging.getLogger(__name__)
-summarizer_pipeline = pipeline("summarization", model="facebook/bart-large-cnn")
 
-def execute_node(node, input_data, continue_on_error=False):
+_sentence_end = re.compile(r'(?<=[.!?])\s+')
+
+# Heavy ML/TTS libraries are imported on first use so that importing this
+# module (web workers, Celery beat, manage.py) stays cheap.
+SUMMARIZATION_MODEL = "facebook/bart-large-cnn"
+summarizer_pipeline = None
+_summarizer_lock = threading.Lock()
+
+def get_summarizer_pipeline():
     """
-    Execute a node with enhanced error handling and logging
+    Return the shared summarization pipeline, loading it on first use.
+    """
+    global summarizer_pipeline
+    if summarizer_pipeline is None:
+        with _summarizer_lock:
+            if summarizer_pipeline is None:
+                from ai_integration.model_pool import load_pipeline
+                summarizer_pipeline = load_pipeline("summarization", SUMMARIZATION_MODEL)
+    return summarizer_pipeline
+
+def summarize(text, backend=DEFAULT_BACKEND, model=SUMMARIZATION_MODEL):
+    """
+    Summarize text on the host's inference server, falling back to the
+    in-process pipeline when it isn't running. Other models and quantized
+    or ONNX Runtime backends are loaded through the shared model pool.
+    """
+    try:
+        [item] = infer_remote("summarization", model, [text], backend=backend)
+        return item["output"]
+    except InferenceUnavailable:
+        if model == SUMMARIZATION_MODEL and backend == DEFAULT_BACKEND:
+            return get_summarizer_pipeline()(text)
+        from ai_integration.model_pool import model_pool
+
+        entry = model_pool.get("summarization", model, backend)
+        with entry.lock:
+            return entry.pipe(text)
+
+def gTTS(*args, **kwargs):
+    """
+    Lazily imported gtts.gTTS.
+    """
+    from gtts import gTTS as _gTTS
+    return _gTTS(*args, **kwargs)
+
+def _input_texts(input_data):
+    """
+    Texts from a node input: a string, a list of strings or {"text": ...}
+    dicts, or a previous node's result dict wrapping either.
+    """
+    if isinstance(input_data, dict):
+        input_data = input_data.get("result", "")
+    if isinstance(input_data, str):
+        input_data = [input_data]
+    if not isinstance(input_data, list):
+        return []
+    texts = [str(item.get("text", "")) if isinstance(item, dict) else str(item) for item in input_data]
+    return [text for text in texts if text.strip()]
+
+def split_sentences(text):
+    return [sentence for sentence in _sentence_end.split(text) if sentence.strip()]
+
+def _map_items(input_data, split="lines"):
+    """
+    Items for a map node: a list input as is, or text split into
+    non-empty lines or sentences.
+    """
+    if isinstance(input_data, dict):
+        input_data = input_data.get("result", "")
+    if isinstance(input_data, list):
+        return input_data
+    text = input_data if isinstance(input_data, str) else str(input_data)
+    if split == "sentences":
+        return split_sentences(text)
+    if split == "lines":
+        return [line for line in text.splitlines() if line.strip()]
+    raise ValueError(f"Unknown map split: {split}")
+
+def load_sub_workflow(workflow_id, ancestors=()):
+    """
+    Nodes of a workflow run by a map node, in order, with the nodes of
+    nested map nodes resolved too. Raises ValueError if it (or a workflow
+    it maps over) maps back over one of its ancestors.
+    """
+    from .models import Workflow
+
+    if workflow_id in ancestors:
+        raise ValueError(f"Map over workflow {workflow_id} would recurse")
+    workflow = Workflow.objects.get(id=workflow_id)
+    nodes = list(workflow.nodes.all().order_by('order'))
+    for node in nodes:
+        # Items run in worker threads, which shouldn't need the database
+        node.workflow = workflow
+        if node.type == "map":
+            node.map_nodes = load_sub_workflow(node.config.get("workflow_id"), (*ancestors, workflow_id))
+    return nodes
+
+def resolve_map_nodes(node):
+    """
+    Nodes a map node runs, loaded once and kept on the node. Resolve map
+    nodes in the thread that owns the database connection before running
+    them in worker threads; a failure to load is raised when the node runs.
+    """
+    if not hasattr(node, "map_nodes"):
+        try:
+            node.map_nodes = load_sub_workflow(node.config.get("workflow_id"), (node.workflow_id,))
+        except Exception as e:
+            node.map_nodes = e
+    if isinstance(node.map_nodes, Exception):
+        raise node.map_nodes
+    return node.map_nodes
+
+def run_map(node, input_data, continue_on_error=False, trace=None):
+    """
+    Run the node's sub-workflow once per input item, up to "concurrency"
+    items at a time, and return the item results in input order. A failed
+    item is None in the results when continue_on_error is set (in the node
+    or workflow config) and is reported in the trace; otherwise the first
+    failure is raised and items not yet started are skipped.
+    """
+    items = _map_items(input_data, node.config.get("split", "lines"))
+    nodes = resolve_map_nodes(node)
+    concurrency = int(node.config.get("concurrency", settings.WORKFLOW_MAP_CONCURRENCY))
+    continue_on_error = node.config.get("continue_on_error", node.workflow.config.get("continue_on_error", continue_on_error))
+
+    def run_item(item):
+        # Skips nodes on untaken branches like the engine does; the output of
+        # the last node that ran flows on
+        output, branch = item, None
+        for sub_node in nodes:
+            if is_skipped(sub_node, branch):
+                continue
+            sub_trace = {}
+            output = execute_node(sub_node, output, trace=sub_trace)
+            if sub_node.type == "condition":
+                branch = sub_trace["condition"]["branch"]
+        return output
+
+    results, failed = [], []
+    with ThreadPoolExecutor(max_workers=max(min(concurrency, len(items)), 1)) as executor:
+        futures = [executor.submit(run_item, item) for item in items]
+        for index, future in enumerate(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                if not continue_on_error:
+                    for pending in futures:
+                        pending.cancel()
+                    raise ValueError(f"Map item {index} failed: {e}") from e
+                results.append(None)
+                failed.append({"index": index, "error": str(e)})
+    if trace is not None:
+        trace["map"] = {"items": len(items), "failed": failed, "concurrency": concurrency}
+    return results
+
+def _embedding_model_id(config, header=None):
+    """Backend and model from a node config, defaulting to what built the index."""
+    backend, _, model = (header or {}).get('model', '').partition(':')
+    backend = config.get('backend') or backend or settings.WORKFLOW_EMBEDDING_BACKEND
+    model = config.get('model') or model or settings.WORKFLOW_EMBEDDING_MODEL
+    return backend, model
+
+def index_documents(workflow_id, texts, config):
+    """
+    Embed texts and append them to the workflow's vector index. With a
+    dedupe_threshold, texts whose cosine similarity to an indexed or earlier
+    text in the batch reaches it are reported as duplicates instead.
+    """
+    # numpy is only needed by workflows with embedding nodes
+    import numpy as np
+    from .embeddings import embed_texts
+    from .vector_index import VectorIndex
+
+    index = VectorIndex.for_workflow(workflow_id)
+    backend, model = _embedding_model_id(config, index.header)
+    vectors = embed_texts(texts, backend, model, config.get('batch_size'), config.get('base_url'))
+
+    keep = list(range(len(texts)))
+    duplicates = []
+    threshold = config.get('dedupe_threshold')
+    if threshold is not None:
+        keep = []
+        nearest = index.search(vectors, k=1)
+        normalized = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        for i, matches in enumerate(nearest):
+            if matches and matches[0][1] >= threshold:
+                duplicates.append({'text': texts[i], 'row': matches[0][0], 'score': matches[0][1]})
+                continue
+            if keep:
+                similarities = normalized[keep] @ normalized[i]
+                best = int(np.argmax(similarities))
+                if similarities[best] >= threshold:
+                    duplicates.append({'text': texts[i], 'duplicate_of': texts[keep[best]], 'score': float(similarities[best])})
+                    continue
+            keep.append(i)
+
+    rows = index.add(vectors[keep], [{'text': texts[i]} for i in keep], model=f"{backend}:{model}")
+    return {
+        'count': len(texts),
+        'added': len(rows),
+        'rows': [rows.start, rows.stop] if rows else [],
+        'duplicates': duplicates,
+        'dim': int(vectors.shape[1]),
+        'index_size': len(index),
+    }
+
+def search_index(workflow_id, query, k=5, config=None):
+    """Top-k indexed documents most similar to query, best first."""
+    from .embeddings import embed_texts
+    from .vector_index import VectorIndex
+
+    config = config or {}
+    index = VectorIndex.for_workflow(workflow_id)
+    if not index.exists():
+        return []
+    backend, model = _embedding_model_id(config, index.header)
+    vector = embed_texts([query], backend, model, base_url=config.get('base_url'))
+    return index.query(vector[0], k)
+
+def summarize_for_node(node, text, trace=None):
+    """
+    Summarize text with the model routed for a summarization node, feeding
+    the observed latency back to the router. The routing decision is
+    recorded in the trace unless an earlier call already recorded one.
+    """
+    budget = node.config.get("latency_budget_ms", node.workflow.config.get("latency_budget_ms"))
+    route = choose_summarization_model(text, budget, pinned=node.config.get("model"))
+    start = time.perf_counter()
+    summary = summarize(text, node.config.get("backend", DEFAULT_BACKEND), route.model)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    record_latency(route.model, route.input_tokens, elapsed_ms)
+    if trace is not None:
+        trace.setdefault("routing", {**route.as_trace(), "latency_ms": round(elapsed_ms, 1)})
+    return summary[0].get("summary_text", "No summary found")
+
+def synthesize_speech(text, audio_file):
+    """Append MP3 audio for text to a binary file object."""
+    gTTS(text=text, lang='en').write_to_fp(audio_file)
+
+def execute_node(node, input_data, continue_on_error=False, trace=None):
+    """
+    Execute a node with enhanced error handling and logging. Decisions made
+    while running the node (such as the summarization model chosen) are
+    added to the trace dict when one is given.
     """
     try:
         # Handle None input
@@ -20,7 +268,10 @@ def execute_node(node, input_data, continue_on_error=False):
         
         result = None
         
-        if node.type == "text_input":
+        if getattr(settings, 'WORKFLOW_MOCK_HANDLERS', False) and node.type in MOCK_HANDLERS:
+            result = MOCK_HANDLERS[node.type]().execute(node, input_data)
+
+        elif node.type == "text_input":
             result = input_data
             
         elif node.type == "openai_tts":
@@ -34,16 +285,40 @@ def execute_node(node, input_data, continue_on_error=False):
             if "simulate_failure" in node.config:
                 raise ConnectionError("Simulated API connection failure")
                 
-            tts = gTTS(text=input_data, lang='en')
             audio_file = io.BytesIO()
-           
-            tts.write_to_fp(audio_file)
+            synthesize_speech(input_data, audio_file)
             audio_file.seek(0)
             result = "TTS audio generated successfully"
             
         elif node.type == "huggingface_summarization":
-            summary = summarizer_pipeline(input_data)
-            result = summary[0].get("summary_text", "No summary found")
+            if isinstance(input_data, dict):
+                input_data = input_data.get("result", "")
+            text = input_data if isinstance(input_data, str) else str(input_data)
+            result = summarize_for_node(node, text, trace)
+            
+        elif node.type == "embedding":
+            texts = _input_texts(input_data)
+            if not texts:
+                raise ValueError("Invalid input for embedding: Expected text or a list of texts.")
+            result = index_documents(node.workflow_id, texts, node.config)
+            
+        elif node.type == "condition":
+            # Passes its input on; the engine skips nodes on untaken branches
+            if isinstance(input_data, dict):
+                input_data = input_data.get("result", "")
+            choice = choose_branch(node.config, input_data)
+            if trace is not None:
+                trace["condition"] = choice
+            result = input_data
+            
+        elif node.type == "map":
+            result = run_map(node, input_data, continue_on_error, trace)
+            
+        elif node.type == "similarity_search":
+            texts = _input_texts(input_data) or _input_texts(node.config.get("query", ""))
+            if not texts:
+                raise ValueError("Invalid input for similarity search: Expected a query string.")
+            result = search_index(node.workflow_id, texts[0], int(node.config.get("k", 5)), node.config)
             
         else:
             raise ValueError(f"Unknown node type: {node.type}")
@@ -0,0 +1,162 @@
+# workflows/vector_index.py
+import fcntl
+import json
+import logging
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = 'vectors.f32'
+OFFSETS_FILE = 'offsets.u64'
+DOCUMENTS_FILE = 'documents.jsonl'
+HEADER_FILE = 'index.json'
+
+
+class VectorIndexError(ValueError):
+    pass
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[np.newaxis, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class VectorIndex:
+    """
+    Append-only, per-workflow vector index on disk. Vectors are stored
+    L2-normalized as a raw float32 matrix that is memory-mapped for search,
+    so cosine similarity is a single matrix-vector product. Documents are
+    kept in a JSONL file with a parallel array of byte offsets so results
+    can be read back without loading the whole file.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    @classmethod
+    def for_workflow(cls, workflow_id) -> 'VectorIndex':
+        return cls(Path(settings.WORKFLOW_VECTOR_INDEX_DIR) / f"workflow_{workflow_id}")
+
+    @property
+    def header(self) -> dict:
+        try:
+            return json.loads((self.path / HEADER_FILE).read_text())
+        except FileNotFoundError:
+            return {}
+
+    @property
+    def dim(self):
+        return self.header.get('dim')
+
+    def exists(self) -> bool:
+        return (self.path / HEADER_FILE).exists()
+
+    def __len__(self) -> int:
+        dim = self.dim
+        if not dim:
+            return 0
+        # Rows are only counted once both the vector and its offset are written
+        vector_rows = os.path.getsize(self.path / VECTORS_FILE) // (dim * 4)
+        offset_rows = os.path.getsize(self.path / OFFSETS_FILE) // 8
+        return min(vector_rows, offset_rows)
+
+    @contextmanager
+    def _write_lock(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.path / '.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def add(self, vectors, documents, model: str = '') -> range:
+        """
+        Append vectors with their documents (dicts, stored as-is) and return
+        the row numbers they were given. The first append fixes the index's
+        dimension and embedding model.
+        """
+        vectors = _normalize(vectors)
+        if len(vectors) != len(documents):
+            raise VectorIndexError("Number of vectors and documents differ")
+        if not len(vectors):
+            return range(0)
+
+        with self._write_lock():
+            header = self.header
+            if not header:
+                header = {'dim': int(vectors.shape[1]), 'model': model}
+                for name in (VECTORS_FILE, OFFSETS_FILE, DOCUMENTS_FILE):
+                    (self.path / name).touch()
+                (self.path / HEADER_FILE).write_text(json.dumps(header))
+            elif vectors.shape[1] != header['dim']:
+                raise VectorIndexError(f"Index has dimension {header['dim']}, got {vectors.shape[1]}")
+            elif model and header.get('model') and model != header['model']:
+                raise VectorIndexError(f"Index was built with {header['model']}, got {model}")
+
+            start = len(self)
+            offsets = []
+            with open(self.path / DOCUMENTS_FILE, 'ab') as f:
+                for document in documents:
+                    offsets.append(f.tell())
+                    f.write(json.dumps(document).encode('utf-8') + b'\n')
+            with open(self.path / VECTORS_FILE, 'ab') as f:
+                f.write(vectors.tobytes())
+            with open(self.path / OFFSETS_FILE, 'ab') as f:
+                f.write(np.asarray(offsets, dtype=np.uint64).tobytes())
+        return range(start, start + len(vectors))
+
+    def _matrix(self):
+        count = len(self)
+        if not count:
+            return None
+        return np.memmap(self.path / VECTORS_FILE, dtype=np.float32, mode='r', shape=(count, self.dim))
+
+    def search(self, query, k: int = 5):
+        """
+        Top-k rows by cosine similarity to each query vector, as a list (one
+        per query) of (row, score) lists ordered best first.
+        """
+        queries = _normalize(query)
+        matrix = self._matrix()
+        if matrix is None:
+            return [[] for _ in queries]
+        if queries.shape[1] != matrix.shape[1]:
+            raise VectorIndexError(f"Index has dimension {matrix.shape[1]}, got {queries.shape[1]}")
+
+        k = min(k, matrix.shape[0])
+        scores = queries @ matrix.T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for query_scores, rows in zip(scores, top):
+            rows = rows[np.argsort(-query_scores[rows])]
+            results.append([(int(row), float(query_scores[row])) for row in rows])
+        return results
+
+    def documents(self, rows):
+        """Stored documents for the given rows, in the same order."""
+        offsets = np.memmap(self.path / OFFSETS_FILE, dtype=np.uint64, mode='r')
+        documents = []
+        with open(self.path / DOCUMENTS_FILE, 'rb') as f:
+            for row in rows:
+                f.seek(int(offsets[row]))
+                documents.append(json.loads(f.readline()))
+        return documents
+
+    def query(self, vector, k: int = 5):
+        """Top-k documents for one query vector with their row and score."""
+        [matches] = self.search(vector, k)
+        documents = self.documents([row for row, _ in matches])
+        return [
+            {'row': row, 'score': score, **document}
+            for (row, score), document in zip(matches, documents)
+        ]
@@ -1,14 +1,17 @@
 from django.shortcuts import render
 from rest_framework import viewsets, serializers
 from rest_framework.permissions import IsAuthenticated
-from .models import Workflow, Node, WorkflowExecution
-from .serializers import WorkflowSerializer, NodeSerializer, WorkflowExecutionSerializer
+from .models import Workflow, Node, WorkflowExecution, ExecutionProfile
+from .serializers import WorkflowSerializer, NodeSerializer, WorkflowExecutionSerializer, ExecutionOptionsSerializer
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from .tasks import run_workflow
+from .utils import search_index
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q
+from django.http import HttpResponse
+from rest_framework import status
 
 class WorkflowViewSet(viewsets.ModelViewSet):
     """
@@ -52,11 +55,17 @@ class WorkflowViewSet(viewsets.ModelViewSet):
         
         Starts asynchronous execution of the specified workflow.
         Returns the execution ID that can be used to track progress.
+        Pass "profile": true (or set "profile" in the workflow config) to
+        collect a cProfile/tracemalloc profile for the run.
         """
         workflow = self.get_object()
+        options = ExecutionOptionsSerializer(data=request.data)
+        if not options.is_valid():
+            return Response(options.errors, status=status.HTTP_400_BAD_REQUEST)
         execution = WorkflowExecution.objects.create(
             workflow=workflow,
-            status='pending'
+            status='pending',
+            profile_enabled=options.validated_data.get('profile', bool(workflow.config.get('profile', False)))
         )
         run_workflow.delay(workflow.id, execution.id)
         return Response({
@@ -64,6 +73,26 @@ class WorkflowViewSet(viewsets.ModelViewSet):
             "execution_id": execution.id
         })
 
+    @action(detail=True, methods=['post'])
+    def search(self, request, pk=None):
+        """
+        Search the workflow's vector index (filled by its embedding nodes).
+
+        Body: {"query": "...", "k": 5}. Returns the k most similar indexed
+        documents with their cosine similarity, best first.
+        """
+        workflow = self.get_object()
+        query = request.data.get('query')
+        if not isinstance(query, str) or not query.strip():
+            return Response({"error": "A non-empty query is required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            k = int(request.data.get('k', 5))
+        except (TypeError, ValueError):
+            return Response({"error": "k must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        if k < 1:
+            return Response({"error": "k must be at least 1"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'results': search_index(workflow.id, query, k)})
+
 class NodeViewSet(viewsets.ModelViewSet):
     serializer_class = NodeSerializer
     permission_classes = [IsAuthenticated]
@@ -87,4 +116,58 @@ class WorkflowExecutionViewSet(viewsets.ReadOnlyModelViewSet):
 
     def get_queryset(self):
         user_workflows = Workflow.objects.filter(user=self.request.user)
-        return self.queryset.filter(workflow__in=user_workflows)
\ No newline at end of file
+        return self.queryset.filter(workflow__in=user_workflows)
+
+    @action(detail=True, methods=['post'])
+    def rerun(self, request, pk=None):
+        """
+        Run the execution's workflow again with its current node configs,
+        reusing this execution's results for nodes whose config and upstream
+        nodes haven't changed since, so only the changed part is executed.
+        """
+        previous = self.get_object()
+        options = ExecutionOptionsSerializer(data=request.data)
+        if not options.is_valid():
+            return Response(options.errors, status=status.HTTP_400_BAD_REQUEST)
+        execution = WorkflowExecution.objects.create(
+            workflow=previous.workflow,
+            status='pending',
+            profile_enabled=options.validated_data.get('profile', previous.profile_enabled),
+            rerun_of=previous
+        )
+        run_workflow.delay(previous.workflow_id, execution.id)
+        return Response({
+            "status": "Workflow execution started",
+            "execution_id": execution.id,
+            "rerun_of": previous.id
+        })
+
+    @action(detail=True, methods=['get'])
+    def profile(self, request, pk=None):
+        """
+        Download the profile collected for an execution.
+
+        ?kind=cpu (default) returns the pstats file, loadable with pstats,
+        snakeviz or flameprof. ?kind=memory returns tracemalloc and per-node
+        statistics as JSON.
+        """
+        execution = self.get_object()
+        try:
+            profile = execution.profile
+        except ExecutionProfile.DoesNotExist:
+            return Response(
+                {"error": "No profile recorded for this execution"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        if request.query_params.get('kind', 'cpu') == 'memory':
+            return Response({
+                'execution_id': execution.id,
+                'memory': profile.memory_stats,
+                'nodes': profile.node_stats,
+                'cpu_summary': profile.cpu_summary,
+            })
+
+        response = HttpResponse(bytes(profile.cpu_stats), content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="execution_{execution.id}.prof"'
+        return response